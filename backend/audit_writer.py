@@ -0,0 +1,272 @@
+"""
+Gravação em lote (write-behind) das linhas de auditoria.
+
+RFIDEvent e RejectedReading são registros de auditoria: nenhuma decisão
+da API depende de lê-los de volta na mesma requisição. Com o buffer ativo
+eles entram em uma fila e uma thread os grava em um único commit (um
+fsync) a cada PORTAL_AUDIT_FLUSH_MS ou PORTAL_AUDIT_BATCH linhas, o que
+vier primeiro. O mesmo vale para o updated_at das leituras repetidas de
+uma sessão ativa ('touch'). Transições de sessão (início, fim,
+cancelamento) continuam síncronas na requisição.
+
+Ativado por variáveis de ambiente (desligado por padrão):
+
+    PORTAL_AUDIT_BUFFER=1          Ativa o buffer
+    PORTAL_AUDIT_FLUSH_MS=50       Intervalo máximo entre commits
+    PORTAL_AUDIT_BATCH=500         Linhas por commit
+    PORTAL_AUDIT_MAX_PENDING=20000 Tamanho da fila; cheia, a linha vai na transação da requisição
+    PORTAL_AUDIT_SPILL=database/audit_spill.jsonl  Linhas de lotes que falharam
+
+Garantias:
+    - submit() nunca bloqueia o event loop: com a fila cheia retorna False e
+      a requisição grava a linha na própria transação (caminho síncrono).
+    - Um lote que falha MAX_RETRIES vezes não é descartado: as linhas vão
+      para o arquivo de spill (JSON Lines) e são regravadas na próxima
+      subida do buffer. Pendências e perdas aparecem em /health.
+    - No shutdown da API a fila é esvaziada antes de encerrar (stop()); o que
+      não for gravado dentro do prazo vai para o spill.
+    - Janela máxima de perda em queda abrupta do processo (kill -9, falta
+      de energia): as linhas aceitas nos últimos PORTAL_AUDIT_FLUSH_MS mais
+      o lote em gravação, ou seja, no máximo ~FLUSH_MS + tempo de um commit,
+      limitado a MAX_PENDING linhas. Sessões de produção não são afetadas.
+    - Linhas recentes podem levar até FLUSH_MS para aparecer em
+      /api/events/recent e /api/rejected/recent.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, insert, or_, update
+
+from models import DATABASE_DIR, ProductionSession, RFIDEvent, RejectedReading
+
+DEFAULT_SPILL = os.path.join(DATABASE_DIR, 'audit_spill.jsonl')
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def audit_buffer_enabled() -> bool:
+    return os.environ.get('PORTAL_AUDIT_BUFFER', '').lower() in ('1', 'true', 'on', 'yes')
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Valor não serializável no spill de auditoria: {value!r}")
+
+
+def _decode(obj: dict):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+
+class AuditWriter:
+    """
+    Fila de linhas de auditoria gravadas em lote por uma thread
+
+    Args:
+        session_factory: Fábrica de sessões do banco (SessionLocal)
+        flush_ms: Intervalo máximo entre commits
+        batch_size: Linhas por commit
+        max_pending: Capacidade da fila (cheia, submit() recusa a linha)
+        spill_path: Arquivo das linhas de lotes que não puderam ser gravados
+    """
+
+    MODELS = {'event': RFIDEvent, 'rejected': RejectedReading}
+    # O touch pode ser gravado depois do fim síncrono da sessão (ou de um touch
+    # mais novo): só avança o updated_at, e só de sessões ainda em produção
+    _TOUCH = (update(ProductionSession.__table__)
+              .where(ProductionSession.__table__.c.id == bindparam('session_id'),
+                     ProductionSession.__table__.c.status == 'em_producao',
+                     or_(ProductionSession.__table__.c.updated_at.is_(None),
+                         ProductionSession.__table__.c.updated_at < bindparam('touched_at')))
+              .values(updated_at=bindparam('touched_at'))
+              .execution_options(bump_version=False))  # Não invalida ETags (conditional.py)
+    MAX_RETRIES = 3
+
+    def __init__(self, session_factory: Callable, flush_ms: int = 50, batch_size: int = 500,
+                 max_pending: int = 20000, spill_path: str = DEFAULT_SPILL):
+        self.session_factory = session_factory
+        self.flush_interval = flush_ms / 1000.0
+        self.batch_size = batch_size
+        self.spill_path = spill_path
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._spill_lock = threading.Lock()
+        # failed_rows: linhas de lotes que esgotaram as tentativas (foram para o spill);
+        # spill_pending: ainda no spill; lost_rows: nem o spill pôde ser gravado;
+        # overflow: recusadas com a fila cheia
+        self.stats = {'rows': 0, 'commits': 0, 'failed_rows': 0, 'max_batch': 0, 'overflow': 0,
+                      'spilled_rows': 0, 'spill_pending': 0, 'replayed_rows': 0, 'lost_rows': 0}
+
+    @classmethod
+    def from_env(cls, session_factory: Callable) -> "AuditWriter":
+        return cls(
+            session_factory,
+            flush_ms=_env_int('PORTAL_AUDIT_FLUSH_MS', 50),
+            batch_size=_env_int('PORTAL_AUDIT_BATCH', 500),
+            max_pending=_env_int('PORTAL_AUDIT_MAX_PENDING', 20000),
+            spill_path=os.environ.get('PORTAL_AUDIT_SPILL') or DEFAULT_SPILL,
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._worker, name="audit-writer", daemon=True)
+        self._thread.start()
+        print(f"📝 Buffer de auditoria ativo (commit a cada {self.flush_interval * 1000:.0f} ms "
+              f"ou {self.batch_size} linhas)")
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Esvazia a fila e para a thread
+
+        Se a thread não terminar em `timeout` (disco lento, banco travado), o
+        que ainda está na fila vai para o spill e é regravado na próxima subida.
+        """
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            print(f"⚠️ Buffer de auditoria não esvaziou em {timeout:g}s")
+            self._spill(leftover)
+        print(f"📝 Buffer de auditoria finalizado: {self.stats['rows']} linhas em {self.stats['commits']} commits")
+
+    def submit(self, kind: str, values: dict) -> bool:
+        """
+        Enfileira uma linha ('event', 'rejected' ou 'touch') sem bloquear
+
+        Returns:
+            False se a fila estiver cheia: quem chamou grava a linha por conta própria
+        """
+        try:
+            self._queue.put_nowait((kind, values))
+        except queue.Full:
+            self.stats['overflow'] += 1
+            return False
+        return True
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def snapshot(self) -> dict:
+        return {'pending': self.pending(), **self.stats}
+
+    def _drain(self, first) -> List[tuple]:
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and not self._stopping.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=max(remaining, 0)) if remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[tuple]):
+        grouped: Dict[str, List[dict]] = {}
+        for kind, values in batch:
+            grouped.setdefault(kind, []).append(values)
+
+        for attempt in range(1, self.MAX_RETRIES + 1):
+            db = self.session_factory()
+            try:
+                for kind, rows in grouped.items():
+                    if kind == 'touch':
+                        db.execute(self._TOUCH, [{'session_id': r['id'], 'touched_at': r['updated_at']} for r in rows])
+                    else:
+                        db.execute(insert(self.MODELS[kind].__table__), rows)
+                db.commit()
+                self.stats['rows'] += len(batch)
+                self.stats['commits'] += 1
+                self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+                return
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️ Erro ao gravar lote de auditoria ({len(batch)} linhas, tentativa {attempt}): {e}")
+                time.sleep(0.1 * attempt)
+            finally:
+                db.close()
+        self.stats['failed_rows'] += len(batch)
+        self._spill(batch)
+
+    def _spill(self, batch: List[tuple]):
+        """Guarda no arquivo de spill as linhas de um lote que não pôde ser gravado"""
+        try:
+            with self._spill_lock, open(self.spill_path, 'a', encoding='utf-8') as f:
+                for kind, values in batch:
+                    f.write(json.dumps({'kind': kind, 'values': values}, default=_encode) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        except (OSError, TypeError) as e:
+            self.stats['lost_rows'] += len(batch)
+            print(f"❌ Linhas de auditoria perdidas ({len(batch)}): spill falhou: {e}")
+            return
+        self.stats['spilled_rows'] += len(batch)
+        self.stats['spill_pending'] += len(batch)
+        print(f"💾 {len(batch)} linhas de auditoria guardadas em {self.spill_path} (regravadas na próxima subida)")
+
+    def replay_spill(self):
+        """
+        Regrava as linhas do spill (chamado pela thread ao iniciar)
+
+        O arquivo é renomeado antes da leitura: lotes que falharem de novo vão
+        para um spill novo, e uma regravação interrompida é retomada do .replay.
+        """
+        replay_path = self.spill_path + '.replay'
+        with self._spill_lock:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spill_path):
+                    return
+                os.replace(self.spill_path, replay_path)
+            with open(replay_path, encoding='utf-8') as f:
+                rows = [json.loads(line, object_hook=_decode) for line in f if line.strip()]
+        batch = [(row['kind'], row['values']) for row in rows]
+        print(f"💾 Regravando {len(batch)} linhas de auditoria do spill")
+        self.stats['spill_pending'] += len(batch)
+        for start in range(0, len(batch), self.batch_size):
+            self._write(batch[start:start + self.batch_size])
+        self.stats['replayed_rows'] += len(batch)
+        self.stats['spill_pending'] -= len(batch)
+        os.remove(replay_path)
+
+    def _worker(self):
+        try:
+            self.replay_spill()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Não foi possível regravar o spill de auditoria: {e}")
+        while True:
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            self._write(self._drain(first))
@@ -0,0 +1,173 @@
+"""
+Operações administrativas em massa.
+
+Cada operação roda como instruções sobre conjuntos (um DELETE/UPDATE com
+filtro) ou em lotes de executemany, em vez de carregar e alterar objetos
+ORM um a um, e retorna as contagens e o tempo gasto.
+"""
+
+import csv
+import io
+import time
+from datetime import timedelta
+from typing import BinaryIO, Iterable, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models import ProductionSession, RFIDTag, brasilia_now, epoch_ms
+import rollups
+
+TAG_LENGTH = 24
+IMPORT_BATCH_SIZE = 5000
+IN_CLAUSE_CHUNK = 500  # Abaixo do limite de variáveis de versões antigas do SQLite
+
+# Status que podem ser cancelados (sessões finalizadas são histórico)
+CANCELLABLE_STATUSES = ('em_producao', 'expirado')
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def cancel_sessions(db: Session, status: str = 'em_producao', older_than_minutes: Optional[float] = None,
+                    tag_prefix: Optional[str] = None) -> dict:
+    """
+    Cancela (remove) sessões por filtro em um único DELETE
+
+    Args:
+        status: Status das sessões a cancelar
+        older_than_minutes: Apenas sessões iniciadas há mais de N minutos
+        tag_prefix: Apenas tags que começam com o prefixo
+
+    Raises:
+        ValueError: status não cancelável
+    """
+    if status not in CANCELLABLE_STATUSES:
+        raise ValueError(f"Status não cancelável: {status}")
+
+    start = time.perf_counter()
+    now = brasilia_now()
+    stmt = delete(ProductionSession).where(ProductionSession.status == status)
+    if older_than_minutes is not None:
+        cutoff_ms = epoch_ms(now - timedelta(minutes=older_than_minutes))
+        stmt = stmt.where(ProductionSession.antenna_1_ms < cutoff_ms)
+    if tag_prefix:
+        stmt = stmt.where(ProductionSession.tag_id.startswith(tag_prefix, autoescape=True))
+
+    cancelled = db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+    rollups.record_cancelled(db, now, cancelled)
+    db.commit()
+    return {"cancelled_count": cancelled, "elapsed_ms": _elapsed_ms(start)}
+
+
+def _parse_tag_rows(rows: Iterable[List[str]], result: dict):
+    """
+    Valida linhas tag_id[,descrição[,ativa]] do CSV, pulando cabeçalho e linhas vazias
+
+    Uma tag repetida no arquivo vale pela primeira linha; as demais contam em "duplicates".
+    """
+    seen = set()
+    for line, row in enumerate(rows, 1):
+        if not row or not row[0].strip():
+            continue
+        tag_id = row[0].strip().upper()
+        if line == 1 and tag_id == 'TAG_ID':
+            continue
+        if len(tag_id) != TAG_LENGTH:
+            result["invalid"] += 1
+            if len(result["errors"]) < 20:
+                result["errors"].append(f"Linha {line}: tag inválida ({len(tag_id)} caracteres)")
+            continue
+        if tag_id in seen:
+            result["duplicates"] += 1
+            continue
+        seen.add(tag_id)
+        description = row[1].strip() if len(row) > 1 and row[1].strip() else f"Tag {tag_id}"
+        active = row[2].strip().lower() not in ('0', 'false', 'nao', 'não', 'n') if len(row) > 2 else True
+        yield {"tag_id": tag_id, "description": description, "active": active, "created_at": brasilia_now()}
+
+
+def import_tags(db: Session, stream: BinaryIO, update_existing: bool = False,
+                batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """
+    Importa tags de um CSV (tag_id[,descrição[,ativa]]) em lotes de executemany
+
+    Tags já cadastradas são ignoradas ou, com update_existing, têm
+    descrição e status atualizados. O CSV é lido em streaming.
+
+    As contagens são feitas por lote, dentro da transação da importação:
+    inserções de outras requisições no meio da importação não entram como
+    deste arquivo.
+    """
+    start = time.perf_counter()
+    result = {"rows": 0, "inserted": 0, "updated": 0, "skipped_existing": 0, "duplicates": 0,
+              "invalid": 0, "errors": []}
+
+    table = RFIDTag.__table__
+    stmt = insert(table)
+    if update_existing:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.tag_id],
+            set_={"description": stmt.excluded.description, "active": stmt.excluded.active}
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.tag_id])
+
+    def write(batch: List[dict]):
+        if update_existing:
+            # O upsert conta inserção e atualização igualmente no rowcount:
+            # as já cadastradas são contadas antes, na mesma transação
+            existing = 0
+            for offset in range(0, len(batch), IN_CLAUSE_CHUNK):
+                chunk = [record["tag_id"] for record in batch[offset:offset + IN_CLAUSE_CHUNK]]
+                existing += db.execute(
+                    select(func.count()).select_from(table).where(table.c.tag_id.in_(chunk))
+                ).scalar_one()
+            db.execute(stmt, batch)
+            inserted = len(batch) - existing
+        else:
+            # Com DO NOTHING o rowcount do executemany soma só as linhas inseridas
+            inserted = db.execute(stmt, batch).rowcount
+        result["rows"] += len(batch)
+        result["inserted"] += inserted
+        result["updated" if update_existing else "skipped_existing"] += len(batch) - inserted
+
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    batch = []
+    for record in _parse_tag_rows(reader, result):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            write(batch)
+            batch = []
+    if batch:
+        write(batch)
+    db.commit()
+
+    result["elapsed_ms"] = _elapsed_ms(start)
+    return result
+
+
+def deactivate_tags(db: Session, tag_ids: List[str]) -> dict:
+    """Desativa tags pela lista de ids (UPDATE ... WHERE tag_id IN, em blocos)"""
+    start = time.perf_counter()
+    unique_ids = list(dict.fromkeys(tag_id.strip().upper() for tag_id in tag_ids if tag_id.strip()))
+    deactivated = found = 0
+    for offset in range(0, len(unique_ids), IN_CLAUSE_CHUNK):
+        chunk = unique_ids[offset:offset + IN_CLAUSE_CHUNK]
+        found += db.execute(
+            select(func.count()).select_from(RFIDTag).where(RFIDTag.tag_id.in_(chunk))
+        ).scalar_one()
+        deactivated += db.execute(
+            update(RFIDTag).where(RFIDTag.tag_id.in_(chunk), RFIDTag.active == True)
+            .values(active=False).execution_options(synchronize_session=False)
+        ).rowcount
+    db.commit()
+    return {
+        "requested": len(unique_ids),
+        "deactivated": deactivated,
+        "already_inactive": found - deactivated,
+        "not_found": len(unique_ids) - found,
+        "elapsed_ms": _elapsed_ms(start),
+    }
@@ -0,0 +1,142 @@
+"""
+GET condicional (ETag / 304 Not Modified) para os endpoints consultados em polling.
+
+Cada tabela tem um contador de versão em memória, incrementado depois do
+commit de qualquer sessão do SQLAlchemy que a alterou (objetos ORM
+gravados no flush ou instruções insert/update/delete executadas pela
+sessão). O ETag de um endpoint é montado só com esses contadores (e, para
+arquivos, com mtime/tamanho), então uma requisição com If-None-Match
+igual recebe 304 sem executar nenhuma consulta.
+
+O incremento ocorre somente após o commit: um cliente nunca guarda dados
+antigos sob um ETag novo. O pior caso é o inverso (ETag antigo com dados
+novos), que só causa um download a mais no próximo polling.
+
+As versões valem para o processo da API, que é quem grava no banco (o
+leitor envia tudo por HTTP). Alterações feitas por fora (scripts direto
+no SQLite) só aparecem após a próxima gravação pela API ou um restart.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# Identifica a execução do processo (os contadores recomeçam a cada restart)
+BOOT_ID = format(time.time_ns() & 0xFFFFFFFFFF, 'x')
+
+# Colunas cuja alteração sozinha não muda nenhuma resposta (ex: heartbeat de sessão ativa)
+IGNORED_COLUMNS = {'updated_at'}
+
+_versions = {}
+_lock = threading.Lock()
+
+
+def bump(*tables: str):
+    with _lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+
+
+def version(table: str) -> int:
+    return _versions.get(table, 0)
+
+
+def file_version(path: str) -> str:
+    """Versão de um arquivo pelo mtime/tamanho (sem abrir o arquivo)"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 'none'
+    return f"{st.st_mtime_ns:x}.{st.st_size:x}"
+
+
+def make_etag(*parts) -> str:
+    return '"' + '-'.join([BOOT_ID, *map(str, parts)]) + '"'
+
+
+def _matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+def etag_guard(*tables: str, extra: Optional[Callable[[], object]] = None):
+    """
+    Dependência FastAPI: 304 se o If-None-Match bater, senão define ETag na resposta
+
+    Uso: @app.get(..., dependencies=[Depends(etag_guard('rfid_tags'))])
+
+    Args:
+        tables: Tabelas cujas versões compõem o ETag
+        extra: Parte adicional calculada a cada requisição (ex: data atual, mtime de arquivo)
+    """
+    async def dependency(request: Request, response: Response):
+        parts = [version(table) for table in tables]
+        if extra is not None:
+            parts.append(extra())
+        etag = make_etag(*parts)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if _matches(request.headers.get('if-none-match'), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+    return dependency
+
+
+# --- Rastreamento de gravações nas sessões do SQLAlchemy ---
+
+def _pending(session: Session) -> set:
+    return session.info.setdefault('changed_tables', set())
+
+
+def _table_name(obj) -> Optional[str]:
+    table = getattr(type(obj), '__table__', None)
+    return table.name if table is not None else None
+
+
+def _after_flush(session: Session, flush_context):
+    pending = _pending(session)
+    for obj in session.new:
+        pending.add(_table_name(obj))
+    for obj in session.deleted:
+        pending.add(_table_name(obj))
+    for obj in session.dirty:
+        changed = {attr.key for attr in inspect(obj).attrs if attr.history.has_changes()}
+        if changed - IGNORED_COLUMNS:
+            pending.add(_table_name(obj))
+
+
+def _do_orm_execute(state):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    if not state.execution_options.get('bump_version', True):
+        return
+    table = getattr(state.statement, 'table', None)
+    if table is not None:
+        _pending(state.session).add(table.name)
+
+
+def _after_commit(session: Session):
+    tables = session.info.pop('changed_tables', None)
+    if tables:
+        tables.discard(None)
+        bump(*tables)
+
+
+def _after_rollback(session: Session):
+    session.info.pop('changed_tables', None)
+
+
+def track_writes():
+    """Registra os listeners globais de Session (idempotente)"""
+    if event.contains(Session, 'after_commit', _after_commit):
+        return
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'do_orm_execute', _do_orm_execute)
+    event.listen(Session, 'after_commit', _after_commit)
+    event.listen(Session, 'after_rollback', _after_rollback)
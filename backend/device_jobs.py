@@ -0,0 +1,148 @@
+"""
+Fila de operações de dispositivo da API.
+
+Operações que tocam o UR4 (aplicar configuração, atualizar informações)
+são enviadas como jobs para um único worker, dono exclusivo do acesso ao
+dispositivo. A requisição HTTP retorna o id do job imediatamente e o status
+é consultado em GET /api/device/jobs/{id}.
+
+Jobs do mesmo tipo ainda não iniciados são coalescidos: o mais recente
+ocupa o lugar do anterior, que fica com status 'coalesced' e aponta para
+o job que o substituiu (merged_into).
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from models import brasilia_now
+
+# Status possíveis de um job
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+COALESCED = 'coalesced'
+
+
+class DeviceJob:
+    """Operação de dispositivo enviada ao worker"""
+
+    __slots__ = ('id', 'kind', 'payload', 'status', 'created_at', 'started_at',
+                 'finished_at', 'result', 'error', 'merged_into')
+
+    def __init__(self, kind: str, payload: Optional[dict] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.payload = payload or {}
+        self.status = QUEUED
+        self.created_at = brasilia_now()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.merged_into = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            "merged_into": self.merged_into,
+        }
+
+
+class DeviceJobQueue:
+    """
+    Worker único para operações de dispositivo
+
+    Args:
+        handlers: Função executora por tipo de job; recebe o job e retorna
+            um dict de resultado ou levanta exceção em caso de falha
+        history: Quantidade de jobs finalizados mantidos para consulta
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[[DeviceJob], dict]], history: int = 200):
+        self.handlers = handlers
+        self.history = history
+        self._jobs: "OrderedDict[str, DeviceJob]" = OrderedDict()
+        self._pending: "OrderedDict[str, DeviceJob]" = OrderedDict()  # tipo -> job aguardando
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._worker, name="device-jobs", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def submit(self, kind: str, payload: Optional[dict] = None) -> DeviceJob:
+        """Enfileira um job, coalescendo com job pendente do mesmo tipo"""
+        if kind not in self.handlers:
+            raise ValueError(f"Tipo de job desconhecido: {kind}")
+
+        job = DeviceJob(kind, payload)
+        with self._cond:
+            previous = self._pending.pop(kind, None)
+            if previous is not None:
+                previous.status = COALESCED
+                previous.merged_into = job.id
+                previous.finished_at = brasilia_now()
+            self._pending[kind] = job
+            self._jobs[job.id] = job
+            self._trim()
+            self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def _trim(self):
+        """Descarta os jobs finalizados mais antigos além do histórico (com lock)"""
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [jid for jid, job in self._jobs.items()
+                       if job.status not in (QUEUED, RUNNING)][:excess]:
+            del self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                _, job = self._pending.popitem(last=False)
+                job.status = RUNNING
+                job.started_at = brasilia_now()
+
+            try:
+                result = self.handlers[job.kind](job)
+                status, error = DONE, None
+            except Exception as e:
+                result, status, error = None, FAILED, str(e)
+
+            with self._cond:
+                job.result = result
+                job.error = error
+                job.status = status
+                job.finished_at = brasilia_now()
@@ -0,0 +1,102 @@
+"""
+Exportação em massa de sessões, eventos e leituras rejeitadas.
+
+As linhas são lidas com yield_per (cursor percorrido em lotes, sem carregar
+o resultado inteiro) e convertidas em blocos de CSV ou NDJSON, de modo que
+a memória da API fica constante qualquer que seja o volume exportado.
+Apenas colunas são selecionadas (sem montar objetos ORM por linha).
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import DateTime, select
+
+from models import ProductionSession, RFIDEvent, RejectedReading, epoch_ms
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Tipo de exportação -> (modelo, coluna inteira (ms da época) do filtro, colunas exportadas)
+EXPORTS = {
+    'sessions': (ProductionSession, 'created_ms',
+                 ('id', 'tag_id', 'antenna_1_time', 'antenna_2_time', 'duration_seconds',
+                  'status', 'station', 'created_at', 'updated_at')),
+    'events': (RFIDEvent, 'event_ms',
+               ('id', 'tag_id', 'antenna_number', 'event_time', 'session_id')),
+    'rejected': (RejectedReading, 'event_ms',
+                 ('id', 'tag_id', 'antenna_number', 'event_time', 'reason', 'reason_type')),
+}
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+def _row_formatter(columns) -> Callable:
+    """Formata em ISO 8601 só as posições de datetime (as demais passam direto)"""
+    positions = [i for i, col in enumerate(columns) if isinstance(col.type, DateTime)]
+    if not positions:
+        return list
+
+    def format_row(row):
+        values = list(row)
+        for i in positions:
+            if values[i] is not None:
+                values[i] = values[i].isoformat()
+        return values
+    return format_row
+
+
+def iter_export(session_factory: Callable, kind: str, fmt: str,
+                start: Optional[datetime] = None, end: Optional[datetime] = None,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Gera a exportação em blocos de bytes (um bloco por lote do cursor)
+
+    A sessão do banco é aberta e fechada pelo próprio gerador, pois ele é
+    consumido depois que a requisição já retornou a StreamingResponse.
+
+    Args:
+        session_factory: Fábrica de sessões (SessionLocal)
+        kind: 'sessions', 'events' ou 'rejected'
+        fmt: 'csv' ou 'ndjson'
+        start, end: Intervalo [start, end) sobre a coluna de data do tipo (sem timezone = Brasília)
+    """
+    model, time_column, columns = EXPORTS[kind]
+    time_attr = getattr(model, time_column)
+    table_columns = [model.__table__.c[name] for name in columns]
+    format_row = _row_formatter(table_columns)
+    stmt = select(*table_columns).order_by(model.__table__.c.id)
+    if start is not None:
+        stmt = stmt.where(time_attr >= epoch_ms(start))
+    if end is not None:
+        stmt = stmt.where(time_attr < epoch_ms(end))
+
+    db = session_factory()
+    try:
+        # Core (sem a camada de carregamento do ORM), cursor lido em lotes
+        result = db.connection().execute(stmt.execution_options(yield_per=batch_size))
+        buffer = io.StringIO()
+
+        if fmt == 'csv':
+            writer = csv.writer(buffer, lineterminator='\n')
+            writer.writerow(columns)
+            for rows in result.partitions():
+                writer.writerows(map(format_row, rows))
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode('utf-8')
+        else:
+            dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+            for rows in result.partitions():
+                yield ''.join(
+                    dumps(dict(zip(columns, format_row(row)))) + '\n' for row in rows
+                ).encode('utf-8')
+    finally:
+        db.close()
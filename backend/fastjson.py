@@ -0,0 +1,65 @@
+"""
+Serialização JSON rápida para as listagens (sessões, eventos, rejeitadas).
+
+As listagens selecionam só as colunas necessárias como tuplas e as
+convertem direto em bytes JSON, sem montar objetos ORM nem validar cada
+linha em um modelo Pydantic. Usa orjson quando instalado (opcional) e,
+sem ele, o json da biblioteca padrão.
+
+A saída é idêntica byte a byte à dos caminhos anteriores do FastAPI:
+chaves na ordem das colunas, separadores compactos, UTF-8 sem escapes
+e datetimes em ISO 8601 (isoformat()).
+"""
+
+import json
+from datetime import date, datetime
+from typing import Iterable, Optional, Sequence
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável em JSON: {type(value).__name__}")
+
+
+_encode = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':'),
+                           default=_default).encode
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return _encode(obj).encode('utf-8')
+
+
+def dumps_rows(columns: Sequence[str], rows: Iterable[tuple]) -> bytes:
+    """Lista de objetos JSON a partir de tuplas na ordem de columns"""
+    return dumps([dict(zip(columns, row)) for row in rows])
+
+
+class FastJSONResponse(Response):
+    media_type = 'application/json'
+
+    def render(self, content) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+def rows_response(columns: Sequence[str], rows: Iterable[tuple],
+                  response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Resposta JSON das linhas; repassa os cabeçalhos já definidos por dependências (ex: ETag)
+
+    Necessário porque uma Response retornada pelo endpoint substitui a
+    resposta temporária onde as dependências gravaram cabeçalhos.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(dumps_rows(columns, rows), headers=headers)
@@ -0,0 +1,171 @@
+"""
+Monitor de atraso (lag) do event loop da API.
+
+Todo handler `async def` roda na thread do event loop: uma chamada
+bloqueante dentro dele (sleep, I/O de serial ou arquivo, consulta pesada
+ao banco) segura a ingestão de leituras de todos os clientes. Uma tarefa
+em segundo plano dorme INTERVAL e mede quanto acordou atrasada; esse
+atraso é o tempo em que o loop ficou ocupado.
+
+Variáveis de ambiente:
+
+    PORTAL_LOOP_MONITOR=1           Liga o monitor (padrão ligado; 0 desliga)
+    PORTAL_LOOP_INTERVAL_MS=100     Intervalo entre medições
+    PORTAL_LOOP_THRESHOLD_MS=100    Atraso considerado travamento
+    PORTAL_LOOP_DEBUG=1             Imprime a pilha do código que travou o loop
+
+No modo debug uma thread vigia o loop e, quando ele passa do limite sem
+responder, imprime a pilha da thread do loop naquele instante, ou seja,
+a linha que está bloqueando (uma vez por travamento). Serve para pegar
+regressões desse tipo nos testes.
+
+As estatísticas ficam em /api/stats/loop.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+from models import brasilia_now
+
+# Medições mantidas para o percentil (com o intervalo padrão, ~100 s)
+WINDOW = 1000
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'on', 'yes')
+
+
+class LoopLagMonitor:
+    """
+    Mede continuamente o atraso do event loop
+
+    Args:
+        interval: Intervalo entre medições (s)
+        threshold: Atraso (s) contado como travamento
+        debug: Imprime a pilha da thread do loop quando ele trava além do limite
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1, debug: bool = False):
+        self.interval = interval
+        self.threshold = threshold
+        self.debug = debug
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._recent = deque(maxlen=WINDOW)
+        self.stats = {'samples': 0, 'stalls': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0,
+                      'last_stall_at': None, 'stacks_dumped': 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["LoopLagMonitor"]:
+        if not _env_flag('PORTAL_LOOP_MONITOR', True):
+            return None
+        return cls(
+            interval=_env_int('PORTAL_LOOP_INTERVAL_MS', 100) / 1000.0,
+            threshold=_env_int('PORTAL_LOOP_THRESHOLD_MS', 100) / 1000.0,
+            debug=_env_flag('PORTAL_LOOP_DEBUG'),
+        )
+
+    def start(self):
+        """Inicia a medição (chamar de dentro do event loop, no lifespan)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._stopping.clear()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        if self.debug:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+        print(f"⏱️ Monitor do event loop ativo (limite {self.threshold * 1000:.0f} ms"
+              f"{', pilhas de travamento no log' if self.debug else ''})")
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def _measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            before = loop.time()
+            await asyncio.sleep(self.interval)
+            self._heartbeat = time.monotonic()
+            self._record(max(loop.time() - before - self.interval, 0.0))
+
+    def _record(self, lag: float):
+        self._recent.append(lag)
+        self.stats['samples'] += 1
+        self.stats['total'] += lag
+        self.stats['last'] = lag
+        self.stats['max'] = max(self.stats['max'], lag)
+        if lag >= self.threshold:
+            self.stats['stalls'] += 1
+            self.stats['last_stall_at'] = brasilia_now()
+
+    def _watch(self):
+        """Thread do modo debug: captura a pilha do loop enquanto ele está travado"""
+        dumped_for = None
+        while not self._stopping.wait(self.threshold / 4):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked < self.threshold or dumped_for == heartbeat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            dumped_for = heartbeat
+            self.stats['stacks_dumped'] += 1
+            stack = ''.join(traceback.format_stack(frame))
+            print(f"🐢 Event loop bloqueado há {blocked * 1000:.0f} ms; pilha da thread do loop:\n{stack}",
+                  file=sys.stderr, flush=True)
+
+    def snapshot(self) -> dict:
+        """Estatísticas atuais (ms)"""
+        recent = sorted(self._recent)
+        samples = self.stats['samples']
+
+        def percentile(q: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(int(q * len(recent)), len(recent) - 1)] * 1000
+
+        return {
+            'interval_ms': self.interval * 1000,
+            'threshold_ms': self.threshold * 1000,
+            'samples': samples,
+            'last_ms': round(self.stats['last'] * 1000, 2),
+            'mean_ms': round(self.stats['total'] / samples * 1000, 2) if samples else 0.0,
+            'p99_ms': round(percentile(0.99), 2),
+            'max_ms': round(self.stats['max'] * 1000, 2),
+            'stalls': self.stats['stalls'],
+            'last_stall_at': self.stats['last_stall_at'],
+            'debug': self.debug,
+            'stacks_dumped': self.stats['stacks_dumped'],
+        }
@@ -1,20 +1,44 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, UploadFile, File, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, func, select, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Any, List, Literal, Optional
+from contextlib import asynccontextmanager
 import os
 import sys
 import json
 import platform
 from pathlib import Path
-import serial
 import time
 
-from models import RFIDTag, ProductionSession, RFIDEvent, RejectedReading, get_db, init_db, SessionLocal, brasilia_now, BRASILIA_TZ
-from pydantic import BaseModel
+# Biblioteca do leitor: mapa de zonas (ur4_zones) e codec (ur4_protocol, importado só
+# quando a API acessa a serial)
+BIBLIOTECA_DIR = str(Path(__file__).parent.parent / "scripts" / "biblioteca")
+if BIBLIOTECA_DIR not in sys.path:
+    sys.path.insert(0, BIBLIOTECA_DIR)
+
+from models import RFIDTag, ProductionSession, RFIDEvent, RejectedReading, EdgeAlias, get_db, init_db, SessionLocal, engine, brasilia_now, BRASILIA_TZ, epoch_ms
+from profiling import install_profiling, flush_profiles
+from device_jobs import DeviceJobQueue
+import exporter
+import rollups
+import sketches
+import bulk_admin
+import conditional
+import fastjson
+from conditional import etag_guard
+from audit_writer import AuditWriter, audit_buffer_enabled
+from static_assets import AssetStore
+from loop_monitor import LoopLagMonitor
+from session_sweeper import SessionSweeper
+from read_engine import ReadEngine
+import session_sweeper
+import ur4_zones
+from pydantic import BaseModel, ValidationError
 
 # Função auxiliar para garantir que datetime tenha timezone
 def ensure_timezone(dt):
@@ -32,19 +56,52 @@ def formatDateTime(dt):
         return "N/A"
     return dt.strftime("%d/%m/%Y %H:%M:%S")
 
-# Inicializar banco de dados
-try:
-    init_db()
-    print("✅ Banco de dados inicializado com sucesso!")
-except Exception as e:
-    print(f"❌ Erro ao inicializar banco de dados: {e}")
-    print(f"   Verifique as permissões do diretório database/")
-    sys.exit(1)
-
 # Variável para configuração (será definida depois das funções)
 CONFIG_PATH = None
 
-app = FastAPI(title="Portal RFID - Biamar UR4", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicialização e encerramento da API
+
+    O banco é preparado aqui e não na importação do módulo: importar main
+    fica barato e uma falha aborta a subida do servidor (uvicorn encerra
+    com erro, como o sys.exit de antes).
+    """
+    started = time.perf_counter()
+    try:
+        init_db()
+        print("✅ Banco de dados inicializado com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro ao inicializar banco de dados: {e}")
+        print(f"   Verifique as permissões do diretório database/")
+        raise
+    static_assets.load()
+    _ensure_config()
+    print("✅ Arquivo de configuração inicializado!")
+    device_jobs.start()
+    if audit_writer is not None:
+        audit_writer.start()
+    if loop_monitor is not None:
+        loop_monitor.start()
+    if sweeper is not None:
+        sweeper.start()
+    read_engine.start()
+    print(f"🚀 API pronta em {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    yield
+
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+    if sweeper is not None:
+        sweeper.stop()
+    read_engine.stop()
+    device_jobs.stop()
+    if audit_writer is not None:
+        audit_writer.stop()
+    flush_profiles()
+
+app = FastAPI(title="Portal RFID - Biamar UR4", version="1.0.0", lifespan=lifespan)
 
 # Configurar CORS para permitir requisições do frontend
 app.add_middleware(
@@ -53,13 +110,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# Versões por tabela para GET condicional (ETag / 304) nos endpoints de polling
+conditional.track_writes()
+
+# Profiling por requisição (opcional, controlado por PORTAL_PROFILE*)
+install_profiling(app)
+
+# Atraso do event loop (chamadas bloqueantes em handlers async), controlado por PORTAL_LOOP_*
+loop_monitor = LoopLagMonitor.from_env()
+
 # Modelos Pydantic para requisições/respostas
 class RFIDEventRequest(BaseModel):
     tag_id: str
     antenna_number: int
 
+class EdgeSessionRecord(BaseModel):
+    edge_id: str
+    kind: Literal['start', 'complete']
+    tag_id: str
+    antenna_1_time: datetime
+    antenna_2_time: Optional[datetime] = None
+    station: Optional[str] = None  # Estação do mapa de zonas do leitor (padrão: portal)
+    antenna_number: Optional[int] = None  # Antena que gerou o início/fim
+
+class EdgeSessionBatch(BaseModel):
+    portal_id: Optional[str] = None
+    records: List[Any]  # Validados um a um (EdgeSessionRecord): um registro ruim não recusa o lote
+
 class TagResponse(BaseModel):
     id: int
     tag_id: str
@@ -77,10 +157,26 @@ class ProductionSessionResponse(BaseModel):
     duration_seconds: Optional[float]
     status: str
     created_at: datetime
+    station: Optional[str] = None
     
     class Config:
         from_attributes = True
 
+# Colunas das listagens servidas pelo caminho rápido (fastjson), na ordem das chaves do JSON
+SESSION_COLUMNS = tuple(ProductionSessionResponse.model_fields)
+EVENT_COLUMNS = ('id', 'tag_id', 'antenna_number', 'event_time', 'session_id')
+REJECTED_COLUMNS = ('id', 'tag_id', 'antenna_number', 'event_time', 'reason', 'reason_type')
+
+def _select_columns(model, columns):
+    table = model.__table__
+    return select(*[table.c[name] for name in columns])
+
+class StationStats(BaseModel):
+    station: str
+    active_sessions: int
+    completed_today: int
+    average_duration_today: float
+
 class DashboardStats(BaseModel):
     total_sessions: int
     active_sessions: int
@@ -88,6 +184,7 @@ class DashboardStats(BaseModel):
     total_completed: int
     average_duration: float
     average_duration_today: float
+    stations: List[StationStats] = []
 
 # Dependência para obter sessão do banco
 def get_db_session():
@@ -97,34 +194,57 @@ def get_db_session():
     finally:
         db.close()
 
-@app.on_event("startup")
-async def startup_event():
-    """Inicializar configurações ao iniciar a API"""
-    _ensure_config()
-    print("✅ Arquivo de configuração inicializado!")
+# Linhas de auditoria (RFIDEvent, RejectedReading) em lote, se PORTAL_AUDIT_BUFFER=1
+audit_writer = AuditWriter.from_env(SessionLocal) if audit_buffer_enabled() else None
+AUDIT_MODELS = {'event': RFIDEvent, 'rejected': RejectedReading}
+
+# Expiração das sessões paradas em produção, controlada por PORTAL_SESSION_*
+sweeper = SessionSweeper.from_env(SessionLocal)
+
+# Engine das consultas pesadas de leitura (mode=ro ou snapshot), controlado por PORTAL_READ_*
+read_engine = ReadEngine.from_env(SessionLocal, engine)
+
+def _record_audit(db: Session, kind: str, values: dict):
+    """Registra uma linha de auditoria no buffer (se ativo) ou na transação da requisição"""
+    if audit_writer is not None:
+        # Insert direto (Core) não passa pelos listeners do ORM que preenchem event_ms
+        buffered = dict(values, event_ms=epoch_ms(values['event_time']))
+        if audit_writer.submit(kind, buffered):
+            return
+    # Sem buffer, ou fila cheia: grava na transação da requisição (nunca espera a fila)
+    db.add(AUDIT_MODELS[kind](**values))
+
+def _touch_session(db: Session, session: ProductionSession):
+    """Marca que a tag ainda está presente; com o buffer, o updated_at vai no próximo lote"""
+    now = brasilia_now()
+    if audit_writer is None or not audit_writer.submit('touch', {"id": session.id, "updated_at": now}):
+        session.updated_at = now
+
+# Frontend servido da memória (gzip, ETag, versões por hash no index.html)
+static_assets = AssetStore.from_env(Path(__file__).parent.parent / "frontend")
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Serve a página principal do dashboard"""
-    frontend_path = Path(__file__).parent.parent / "frontend" / "index.html"
-    if frontend_path.exists():
-        return FileResponse(frontend_path)
+    response = static_assets.response(request, "index.html")
+    if response is not None:
+        return response
     return {"message": "Portal RFID - Biamar UR4 API", "status": "online"}
 
 @app.get("/static/styles.css")
-async def get_styles():
+async def get_styles(request: Request):
     """Serve o arquivo CSS"""
-    css_path = Path(__file__).parent.parent / "frontend" / "styles.css"
-    if css_path.exists():
-        return FileResponse(css_path, media_type="text/css")
+    response = static_assets.response(request, "styles.css")
+    if response is not None:
+        return response
     raise HTTPException(status_code=404, detail="CSS not found")
 
 @app.get("/static/app.js")
-async def get_app_js():
+async def get_app_js(request: Request):
     """Serve o arquivo JavaScript"""
-    js_path = Path(__file__).parent.parent / "frontend" / "app.js"
-    if js_path.exists():
-        return FileResponse(js_path, media_type="application/javascript")
+    response = static_assets.response(request, "app.js")
+    if response is not None:
+        return response
     raise HTTPException(status_code=404, detail="JS not found")
 
 @app.get("/health")
@@ -133,13 +253,20 @@ async def health_check():
     try:
         # Testar conexão com banco de dados
         db = SessionLocal()
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1"))
         db.close()
-        return {
+        result = {
             "status": "healthy",
             "database": "connected",
             "timestamp": brasilia_now().isoformat()
         }
+        if audit_writer is not None:
+            # Linhas de auditoria em spill (aguardando regravação) ou perdidas
+            audit = audit_writer.snapshot()
+            result["audit_buffer"] = audit
+            if audit["spill_pending"] or audit["lost_rows"]:
+                result["status"] = "degraded"
+        return result
     except Exception as e:
         return {
             "status": "unhealthy",
@@ -150,19 +277,27 @@ async def health_check():
 
 @app.post("/api/rfid/event")
 async def register_rfid_event(event: RFIDEventRequest, db: Session = Depends(get_db_session)):
-    """Registra um evento de leitura RFID"""
+    """
+    Registra um evento de leitura RFID
+
+    Estações (mapa de zonas): uma etiqueta tem no máximo uma sessão em
+    produção em toda a planta, e uma etiqueta produzida em qualquer estação
+    fica bloqueada. Por isso o início não filtra por estação: a antena de
+    início de outra estação só renova a sessão já aberta (que continua na
+    estação de origem). O fim filtra: só finaliza a sessão aberta na
+    própria estação.
+    """
     
     # Validar comprimento da tag (deve ter exatamente 24 caracteres)
     if len(event.tag_id) != 24:
         # Registrar leitura rejeitada
-        rejected = RejectedReading(
+        _record_audit(db, 'rejected', dict(
             tag_id=event.tag_id,
             antenna_number=event.antenna_number,
             event_time=brasilia_now(),
             reason=f"Tag inválida: deve ter 24 caracteres (recebido: {len(event.tag_id)})",
             reason_type="validation"
-        )
-        db.add(rejected)
+        ))
         db.commit()
         
         return {
@@ -172,10 +307,11 @@ async def register_rfid_event(event: RFIDEventRequest, db: Session = Depends(get
         }
     
     # Criar o evento
-    rfid_event = RFIDEvent(
+    rfid_event = dict(
         tag_id=event.tag_id,
         antenna_number=event.antenna_number,
-        event_time=brasilia_now()
+        event_time=brasilia_now(),
+        session_id=None
     )
     
     # Verificar se a tag existe, senão criar
@@ -183,11 +319,13 @@ async def register_rfid_event(event: RFIDEventRequest, db: Session = Depends(get
     if not tag:
         tag = RFIDTag(tag_id=event.tag_id, description=f"Tag {event.tag_id}")
         db.add(tag)
-        db.commit()
+        db.flush()  # Gravada no mesmo commit da leitura
+    
+    # Processar baseado no papel da antena no mapa de zonas (config.json)
+    zone = current_zones().get(event.antenna_number)
     
-    # Processar baseado na antena
-    # Antena 1: Início de produção (entrada)
-    if event.antenna_number == 1:
+    # Antena de início da estação: início de produção (entrada)
+    if zone is not None and zone.role == ur4_zones.ROLE_START:
         # PROTEÇÃO: Verificar se esta etiqueta já foi produzida (tem sessão finalizada)
         finished_session = db.query(ProductionSession).filter(
             ProductionSession.tag_id == event.tag_id,
@@ -196,15 +334,14 @@ async def register_rfid_event(event: RFIDEventRequest, db: Session = Depends(get
         
         if finished_session:
             # Registrar leitura rejeitada
-            rejected = RejectedReading(
+            _record_audit(db, 'rejected', dict(
                 tag_id=event.tag_id,
                 antenna_number=event.antenna_number,
                 event_time=brasilia_now(),
                 reason=f"Etiqueta já foi produzida em {formatDateTime(finished_session.antenna_2_time)}",
                 reason_type="blocked"
-            )
-            db.add(rejected)
-            db.add(rfid_event)
+            ))
+            _record_audit(db, 'event', rfid_event)
             db.commit()
             
             return {
@@ -218,104 +355,294 @@ async def register_rfid_event(event: RFIDEventRequest, db: Session = Depends(get
                 }
             }
         
-        # Verificar se já existe sessão ativa para esta tag
+        # Verificar se já existe sessão ativa para esta tag (em qualquer estação)
         active_session = db.query(ProductionSession).filter(
             ProductionSession.tag_id == event.tag_id,
             ProductionSession.status == 'em_producao'
         ).first()
+        if active_session and _expire_if_overdue(active_session, rfid_event["event_time"]):
+            active_session = None
         
         if active_session:
             # Sessão já existe - não atualizar antenna_1_time para preservar tempo de produção
             # Apenas atualizar updated_at para indicar que a tag ainda está presente
-            active_session.updated_at = brasilia_now()
-            rfid_event.session_id = active_session.id
+            _touch_session(db, active_session)
+            rfid_event["session_id"] = active_session.id
         else:
             # Criar nova sessão
             session = ProductionSession(
                 tag_id=event.tag_id,
                 antenna_1_time=brasilia_now(),
-                status='em_producao'
+                status='em_producao',
+                station=zone.station
             )
             db.add(session)
             db.commit()
             db.refresh(session)
-            rfid_event.session_id = session.id
+            rfid_event["session_id"] = session.id
     
-    # Antena 0 ou 2: Fim de produção (saída)
-    elif event.antenna_number in [0, 2]:
-        # Antena 2: Fim de produção
-        # Buscar sessão ativa para esta tag
+    # Antena de fim da estação: fim de produção (saída)
+    elif zone is not None and zone.role == ur4_zones.ROLE_FINISH:
+        # Buscar sessão ativa desta tag aberta na mesma estação
         active_session = db.query(ProductionSession).filter(
             ProductionSession.tag_id == event.tag_id,
-            ProductionSession.status == 'em_producao'
+            ProductionSession.status == 'em_producao',
+            ProductionSession.station == zone.station
         ).first()
+        if active_session and _expire_if_overdue(active_session, rfid_event["event_time"]):
+            active_session = None
         
         if active_session and active_session.antenna_1_time:
-            # Finalizar sessão
+            # Finalizar sessão (duração calculada sobre os milissegundos da época)
             active_session.antenna_2_time = brasilia_now()
+            active_session.antenna_2_ms = epoch_ms(active_session.antenna_2_time)
             
-            # Garantir que ambos os datetimes tenham timezone antes de subtrair
-            antenna_1_aware = ensure_timezone(active_session.antenna_1_time)
-            antenna_2_aware = ensure_timezone(active_session.antenna_2_time)
-            
-            duration = (antenna_2_aware - antenna_1_aware).total_seconds()
+            duration = (active_session.antenna_2_ms - epoch_ms(active_session.antenna_1_time)) / 1000
             active_session.duration_seconds = duration
             active_session.status = 'finalizado'
             active_session.updated_at = brasilia_now()
-            rfid_event.session_id = active_session.id
+            rfid_event["session_id"] = active_session.id
+            rollups.record_completed(db, active_session)
+            sketches.record_duration(db, active_session.antenna_2_time, duration)
         else:
-            # Sessão não encontrada ou não iniciada corretamente
-            return {"error": "Sessão não encontrada ou não iniciada na antena 1"}
+            # Sessão expirada pela varredura: não é finalizada nem contada como produzida
+            expired_session = db.query(ProductionSession).filter(
+                ProductionSession.tag_id == event.tag_id,
+                ProductionSession.status == session_sweeper.EXPIRED_STATUS,
+                ProductionSession.station == zone.station
+            ).order_by(ProductionSession.antenna_1_ms.desc()).first()
+            if expired_session:
+                _record_expired_finish(db, event.tag_id, event.antenna_number, rfid_event["event_time"],
+                                       expired_session)
+                rfid_event["session_id"] = expired_session.id
+                _record_audit(db, 'event', rfid_event)
+                db.commit()
+                return {"error": f"Sessão expirada: iniciada em {formatDateTime(expired_session.antenna_1_time)} "
+                                 f"na estação {zone.station}",
+                        "expired": True, "session_id": expired_session.id}
+
+            # Sessão não encontrada ou não iniciada corretamente (ou aberta em outra estação)
+            db.commit()
+            return {"error": f"Sessão não encontrada ou não iniciada na entrada da estação {zone.station}"}
     
-    db.add(rfid_event)
+    _record_audit(db, 'event', rfid_event)
     db.commit()
     
     return {
         "success": True,
         "tag_id": event.tag_id,
         "antenna": event.antenna_number,
-        "timestamp": rfid_event.event_time
+        "station": zone.station if zone is not None else None,
+        "timestamp": rfid_event["event_time"]
     }
 
-@app.get("/api/sessions", response_model=List[ProductionSessionResponse])
+def _expire_if_overdue(session: ProductionSession, at: datetime) -> bool:
+    """
+    Expira na hora a sessão em produção que já passou da idade máxima em `at`
+
+    A varredura (session_sweeper) só roda a cada intervalo; sem isto uma
+    leitura entre duas varreduras ainda renovaria ou finalizaria a sessão,
+    enquanto o leitor em modo edge, que aplica a mesma idade, já a trata
+    como expirada.
+    """
+    if sweeper is None or session.antenna_1_time is None:
+        return False
+    if epoch_ms(at) - epoch_ms(session.antenna_1_time) <= sweeper.max_age_minutes * 60_000:
+        return False
+    session.status = session_sweeper.EXPIRED_STATUS
+    session.updated_at = brasilia_now()
+    return True
+
+def _record_expired_finish(db: Session, tag_id: str, antenna_number: int, event_time: datetime,
+                           session: ProductionSession):
+    """Leitura de fim de uma sessão já expirada (mesmo tratamento na API e no modo edge)"""
+    _record_audit(db, 'rejected', dict(
+        tag_id=tag_id,
+        antenna_number=antenna_number,
+        event_time=event_time,
+        reason=f"Sessão iniciada em {formatDateTime(session.antenna_1_time)} já havia expirado",
+        reason_type="expired"
+    ))
+
+def _edge_session(db: Session, edge_id: str) -> Optional[ProductionSession]:
+    """Sessão pelo edge_id próprio ou por um apelido (início incorporado)"""
+    session = db.query(ProductionSession).filter(ProductionSession.edge_id == edge_id).first()
+    if session is None:
+        alias = db.query(EdgeAlias).filter(EdgeAlias.edge_id == edge_id).first()
+        if alias is not None:
+            session = db.get(ProductionSession, alias.session_id)
+    return session
+
+def _apply_edge_record(db: Session, record: EdgeSessionRecord) -> dict:
+    """
+    Aplica um início/fim de sessão calculado no leitor (modo edge)
+
+    Idempotente pelo edge_id: reenvios retornam 'duplicate' sem alterar nada.
+    As mesmas proteções de register_rfid_event valem aqui (etiqueta já
+    produzida é bloqueada; fim sem sessão, ex: cancelada, é ignorado; fim de
+    sessão expirada volta 'expired' sem finalizá-la).
+    Um início incorporado a uma sessão que já tem outro edge_id fica
+    registrado em edge_aliases, então o fim com esse edge_id a encontra.
+    """
+    result = {"edge_id": record.edge_id, "session_id": None}
+    session = _edge_session(db, record.edge_id)
+    antenna_1_time = ensure_timezone(record.antenna_1_time).astimezone(BRASILIA_TZ)
+    station = record.station or ur4_zones.DEFAULT_STATION
+
+    if record.kind == 'start':
+        if session:
+            return {**result, "status": "duplicate", "session_id": session.id}
+
+        finished_session = db.query(ProductionSession).filter(
+            ProductionSession.tag_id == record.tag_id,
+            ProductionSession.status == 'finalizado'
+        ).first()
+        if finished_session:
+            db.add(RejectedReading(
+                tag_id=record.tag_id,
+                antenna_number=record.antenna_number or 1,
+                event_time=antenna_1_time,
+                reason=f"Etiqueta já foi produzida em {formatDateTime(finished_session.antenna_2_time)}",
+                reason_type="blocked"
+            ))
+            return {**result, "status": "blocked", "session_id": finished_session.id}
+
+        active_session = db.query(ProductionSession).filter(
+            ProductionSession.tag_id == record.tag_id,
+            ProductionSession.status == 'em_producao'
+        ).first()
+        if active_session and _expire_if_overdue(active_session, antenna_1_time):
+            active_session = None
+        if active_session:
+            # Sessão aberta por outro caminho (ex: /api/rfid/event): passa a ser desta borda;
+            # se já for de outra borda, o edge_id novo vira um apelido da mesma sessão
+            if active_session.edge_id is None:
+                active_session.edge_id = record.edge_id
+            else:
+                db.add(EdgeAlias(edge_id=record.edge_id, session_id=active_session.id))
+            return {**result, "status": "merged", "session_id": active_session.id}
+
+        if not db.query(RFIDTag).filter(RFIDTag.tag_id == record.tag_id).first():
+            db.add(RFIDTag(tag_id=record.tag_id, description=f"Tag {record.tag_id}"))
+
+        session = ProductionSession(
+            tag_id=record.tag_id,
+            antenna_1_time=antenna_1_time,
+            status='em_producao',
+            edge_id=record.edge_id,
+            station=station
+        )
+        db.add(session)
+        db.flush()
+        db.add(RFIDEvent(tag_id=record.tag_id, antenna_number=record.antenna_number or 1,
+                         event_time=antenna_1_time, session_id=session.id))
+        return {**result, "status": "created", "session_id": session.id}
+
+    # kind == 'complete'
+    if session is None:
+        return {**result, "status": "missing"}
+    if session.status == 'finalizado':
+        return {**result, "status": "duplicate", "session_id": session.id}
+    if record.antenna_2_time is None:
+        return {**result, "status": "invalid", "session_id": session.id}
+
+    antenna_2_time = ensure_timezone(record.antenna_2_time).astimezone(BRASILIA_TZ)
+    if session.status == 'em_producao':
+        _expire_if_overdue(session, antenna_2_time)
+    if session.status == session_sweeper.EXPIRED_STATUS:
+        # Como em register_rfid_event: sessão expirada não é finalizada nem entra nos agregados
+        _record_expired_finish(db, record.tag_id, record.antenna_number or 2, antenna_2_time, session)
+        return {**result, "status": "expired", "session_id": session.id}
+    session.antenna_2_time = antenna_2_time
+    session.antenna_2_ms = epoch_ms(antenna_2_time)
+    session.duration_seconds = (session.antenna_2_ms - epoch_ms(session.antenna_1_time)) / 1000
+    session.status = 'finalizado'
+    session.updated_at = brasilia_now()
+    db.add(RFIDEvent(tag_id=record.tag_id, antenna_number=record.antenna_number or 2,
+                     event_time=antenna_2_time, session_id=session.id))
+    rollups.record_completed(db, session)
+    sketches.record_duration(db, antenna_2_time, session.duration_seconds)
+    return {**result, "status": "completed", "session_id": session.id}
+
+@app.post("/api/edge/sessions")
+async def register_edge_sessions(batch: EdgeSessionBatch, db: Session = Depends(get_db_session)):
+    """
+    Recebe em lote os inícios/fins de sessão calculados no leitor (rfid_reader.py --edge)
+
+    Cada registro é validado e aplicado separadamente: um registro inválido
+    ou que falha volta como 'invalid'/'error' (a borda o descarta da fila)
+    sem recusar os demais. A falha desfaz a transação e o lote é reaplicado
+    sem esse registro (savepoints não servem aqui: com o driver sqlite3 o
+    RELEASE do primeiro savepoint já efetiva a transação). Só falhas do
+    banco como um todo (ex: banco travado) recusam o lote, que a borda
+    reenvia depois.
+    """
+    rejected = {}  # Índice no lote -> resultado do registro que falhou
+    try:
+        while True:
+            results = []
+            for index, raw in enumerate(batch.records):
+                edge_id = raw.get('edge_id') if isinstance(raw, dict) else None
+                if index in rejected:
+                    results.append(rejected[index])
+                    continue
+                try:
+                    record = EdgeSessionRecord.model_validate(raw)
+                except ValidationError as e:
+                    results.append({"edge_id": edge_id, "session_id": None, "status": "invalid",
+                                    "error": str(e)})
+                    continue
+                try:
+                    results.append(_apply_edge_record(db, record))
+                    db.flush()
+                except OperationalError:
+                    raise
+                except Exception as e:
+                    db.rollback()
+                    print(f"⚠️ Registro da borda {edge_id} recusado: {e}")
+                    rejected[index] = {"edge_id": edge_id, "session_id": None, "status": "error",
+                                       "error": str(e)}
+                    break
+            else:
+                db.commit()
+                break
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao registrar sessões: {str(e)}")
+
+    return {"success": True, "portal_id": batch.portal_id, "results": results}
+
+@app.get("/api/sessions", response_model=List[ProductionSessionResponse],
+         dependencies=[Depends(etag_guard("production_sessions", extra=lambda: read_engine.version('sessions')))])
 async def get_sessions(
+    response: Response,
     status: Optional[str] = None,
     limit: int = 100,
-    db: Session = Depends(get_db_session)
+    db: Session = Depends(read_engine.dependency('sessions'))
 ):
     """Retorna as sessões de produção"""
-    query = db.query(ProductionSession)
+    query = _select_columns(ProductionSession, SESSION_COLUMNS)
     
     if status:
-        query = query.filter(ProductionSession.status == status)
+        query = query.where(ProductionSession.status == status)
     
-    sessions = query.order_by(ProductionSession.created_at.desc()).limit(limit).all()
-    return sessions
+    rows = db.execute(query.order_by(ProductionSession.created_ms.desc()).limit(limit))
+    return fastjson.rows_response(SESSION_COLUMNS, rows, response)
 
-@app.get("/api/sessions/active", response_model=List[ProductionSessionResponse])
-async def get_active_sessions(db: Session = Depends(get_db_session)):
+@app.get("/api/sessions/active", response_model=List[ProductionSessionResponse],
+         dependencies=[Depends(etag_guard("production_sessions"))])
+async def get_active_sessions(response: Response, db: Session = Depends(get_db_session)):
     """Retorna sessões ativas (em produção)"""
-    sessions = db.query(ProductionSession).filter(
+    rows = db.execute(_select_columns(ProductionSession, SESSION_COLUMNS).where(
         ProductionSession.status == 'em_producao'
-    ).order_by(ProductionSession.created_at.desc()).all()
-    return sessions
+    ).order_by(ProductionSession.created_ms.desc()))
+    return fastjson.rows_response(SESSION_COLUMNS, rows, response)
 
 @app.post("/api/sessions/cancel-active")
 async def cancel_active_sessions(db: Session = Depends(get_db_session)):
     """Cancela todas as sessões ativas (em produção)"""
     try:
-        # Buscar todas as sessões ativas
-        active_sessions = db.query(ProductionSession).filter(
-            ProductionSession.status == 'em_producao'
-        ).all()
-        
-        cancelled_count = len(active_sessions)
-        
-        # Deletar todas as sessões ativas
-        for session in active_sessions:
-            db.delete(session)
-        
-        db.commit()
+        cancelled_count = bulk_admin.cancel_sessions(db)["cancelled_count"]
         
         return {
             "success": True,
@@ -326,8 +653,62 @@ async def cancel_active_sessions(db: Session = Depends(get_db_session)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao cancelar produções: {str(e)}")
 
-@app.get("/api/stats", response_model=DashboardStats)
-async def get_dashboard_stats(db: Session = Depends(get_db_session)):
+class BulkCancelRequest(BaseModel):
+    status: str = 'em_producao'
+    older_than_minutes: Optional[float] = None
+    tag_prefix: Optional[str] = None
+
+class BulkDeactivateRequest(BaseModel):
+    tag_ids: List[str]
+
+@app.post("/api/admin/sessions/cancel")
+def bulk_cancel_sessions(request: BulkCancelRequest, db: Session = Depends(get_db_session)):
+    """Cancela sessões por filtro (status, idade em minutos, prefixo da tag) em um único DELETE"""
+    try:
+        return {"success": True, **bulk_admin.cancel_sessions(
+            db, request.status, request.older_than_minutes, request.tag_prefix)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao cancelar sessões: {str(e)}")
+
+@app.post("/api/admin/sessions/expire")
+def expire_sessions_now():
+    """Executa a varredura de expiração imediatamente (fora do intervalo)"""
+    if sweeper is None:
+        raise HTTPException(status_code=409, detail="Expiração de sessões desligada (PORTAL_SESSION_EXPIRY_MIN=0)")
+    expired = sweeper.sweep_now()
+    return {"success": True, "expired_count": expired, "elapsed_ms": sweeper.stats["last_elapsed_ms"]}
+
+@app.post("/api/admin/tags/import")
+def bulk_import_tags(file: UploadFile = File(...), update_existing: bool = False,
+                     db: Session = Depends(get_db_session)):
+    """Importa tags de um CSV enviado (tag_id[,descrição[,ativa]]), em lotes"""
+    try:
+        return {"success": True, **bulk_admin.import_tags(db, file.file, update_existing)}
+    except UnicodeDecodeError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="CSV deve estar em UTF-8")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao importar tags: {str(e)}")
+
+@app.post("/api/admin/tags/deactivate")
+def bulk_deactivate_tags(request: BulkDeactivateRequest, db: Session = Depends(get_db_session)):
+    """Desativa as tags informadas"""
+    try:
+        return {"success": True, **bulk_admin.deactivate_tags(db, request.tag_ids)}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao desativar tags: {str(e)}")
+
+# completed_today muda à meia-noite mesmo sem gravações: a data entra no ETag
+@app.get("/api/stats", response_model=DashboardStats,
+         dependencies=[Depends(etag_guard("production_sessions",
+                                          extra=lambda: f"{brasilia_now().date()}{read_engine.version('stats')}."
+                                                        f"{conditional.file_version(CONFIG_PATH)}"))])
+async def get_dashboard_stats(db: Session = Depends(read_engine.dependency('stats'))):
     """Retorna estatísticas para o dashboard"""
     
     total_sessions = db.query(ProductionSession).count()
@@ -340,38 +721,50 @@ async def get_dashboard_stats(db: Session = Depends(get_db_session)):
         ProductionSession.status == 'finalizado'
     ).count()
     
-    # Sessões completadas hoje
-    today_start = brasilia_now().replace(hour=0, minute=0, second=0, microsecond=0)
+    # Sessões completadas hoje (filtro inteiro sobre antenna_2_ms)
+    today_start_ms = epoch_ms(brasilia_now().replace(hour=0, minute=0, second=0, microsecond=0))
     completed_today = db.query(ProductionSession).filter(
         ProductionSession.status == 'finalizado',
-        ProductionSession.antenna_2_time >= today_start
+        ProductionSession.antenna_2_ms >= today_start_ms
     ).count()
     
-    # Duração média geral (todas as sessões finalizadas)
-    avg_result = db.query(ProductionSession).filter(
-        ProductionSession.status == 'finalizado',
-        ProductionSession.duration_seconds.isnot(None)
-    ).all()
-
+    # Duração média em ms calculada no banco (durações zeradas ficam de fora, como antes)
+    duration_ms = ProductionSession.antenna_2_ms - ProductionSession.antenna_1_ms
+    finished = (ProductionSession.status == 'finalizado', duration_ms != 0)
     
-    if avg_result:
-        durations = [s.duration_seconds for s in avg_result if s.duration_seconds]
-        average_duration = sum(durations) / len(durations) if durations else 0
-    else:
-        average_duration = 0
+    # Duração média geral (todas as sessões finalizadas)
+    average_ms = db.query(func.avg(duration_ms)).filter(*finished).scalar()
+    average_duration = average_ms / 1000 if average_ms else 0
     
     # Duração média das sessões de hoje
-    avg_today = db.query(ProductionSession).filter(
-        ProductionSession.status == 'finalizado',
-        ProductionSession.antenna_2_time >= today_start,
-        ProductionSession.duration_seconds.isnot(None)
-    ).all()
+    average_today_ms = db.query(func.avg(duration_ms)).filter(
+        *finished, ProductionSession.antenna_2_ms >= today_start_ms
+    ).scalar()
+    average_duration_today = average_today_ms / 1000 if average_today_ms else 0
     
-    if avg_today:
-        durations_today = [s.duration_seconds for s in avg_today if s.duration_seconds]
-        average_duration_today = sum(durations_today) / len(durations_today) if durations_today else 0
-    else:
-        average_duration_today = 0
+    # Por estação do mapa de zonas (sessões antigas sem estação contam na padrão)
+    station_col = func.coalesce(ProductionSession.station, ur4_zones.DEFAULT_STATION)
+    active_by_station = dict(db.query(station_col, func.count()).filter(
+        ProductionSession.status == 'em_producao'
+    ).group_by(station_col).all())
+    today_by_station = {
+        station: (count, avg_ms) for station, count, avg_ms in db.query(
+            station_col, func.count(), func.avg(case((duration_ms != 0, duration_ms)))
+        ).filter(
+            ProductionSession.status == 'finalizado', ProductionSession.antenna_2_ms >= today_start_ms
+        ).group_by(station_col).all()
+    }
+    station_names = ur4_zones.stations(current_zones())
+    station_names += sorted((set(active_by_station) | set(today_by_station)) - set(station_names))
+    stations = [
+        StationStats(
+            station=station,
+            active_sessions=active_by_station.get(station, 0),
+            completed_today=today_by_station.get(station, (0, None))[0],
+            average_duration_today=(today_by_station.get(station, (0, None))[1] or 0) / 1000
+        )
+        for station in station_names
+    ]
     
     return DashboardStats(
         total_sessions=total_sessions,
@@ -379,45 +772,132 @@ async def get_dashboard_stats(db: Session = Depends(get_db_session)):
         completed_today=completed_today,
         total_completed=total_completed,
         average_duration=average_duration,
-        average_duration_today=average_duration_today
+        average_duration_today=average_duration_today,
+        stations=stations
     )
 
-@app.get("/api/tags", response_model=List[TagResponse])
-async def get_tags(db: Session = Depends(get_db_session)):
+@app.get("/api/stats/loop")
+async def get_loop_stats():
+    """Atraso do event loop da API (ms); travamentos indicam chamadas bloqueantes"""
+    if loop_monitor is None:
+        return {"enabled": False}
+    return {"enabled": True, **loop_monitor.snapshot()}
+
+@app.get("/api/stats/expiry")
+def get_expiry_stats(db: Session = Depends(get_db_session)):
+    """Varredura de expiração de sessões e quantidade de sessões por status"""
+    by_status = session_sweeper.count_by_status(db)
+    result = sweeper.snapshot() if sweeper is not None else {"enabled": False}
+    return {**result, "sessions_by_status": by_status}
+
+@app.get("/api/stats/read-engine")
+async def get_read_engine_stats():
+    """Engine usado pelas rotas de leitura pesadas (PORTAL_READ_*) e estado do snapshot"""
+    return read_engine.snapshot()
+
+@app.get("/api/stats/rollup")
+async def get_stats_rollup(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    granularity: str = "day",
+    db: Session = Depends(get_db_session)
+):
+    """
+    Contagens e durações por dia/hora lidas só da tabela de agregados
+
+    Padrão: últimos 30 dias (day) ou últimas 48 horas (hour).
+    """
+    if granularity not in rollups.GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity deve ser 'day' ou 'hour'")
+    end = end or brasilia_now()
+    start = start or end - (timedelta(days=30) if granularity == 'day' else timedelta(hours=48))
+    return {"from": start, "to": end, **rollups.query_rollups(db, start, end, granularity)}
+
+@app.get("/api/stats/durations")
+async def get_stats_durations(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    quantiles: str = "0.5,0.9,0.99",
+    buckets: int = 20,
+    db: Session = Depends(get_db_session)
+):
+    """
+    Percentis e histograma das durações, pela mescla dos sketches diários
+
+    Padrão: últimos 30 dias. Erro relativo dos percentis de até 1%.
+    """
+    try:
+        qs = [float(q) for q in quantiles.split(",") if q.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="quantiles deve ser uma lista como 0.5,0.9,0.99")
+    if any(not 0 <= q <= 1 for q in qs) or not 1 <= buckets <= 200:
+        raise HTTPException(status_code=400, detail="quantis entre 0 e 1 e buckets entre 1 e 200")
+
+    end = end or brasilia_now()
+    start = start or end - timedelta(days=30)
+    sketch = sketches.merged_sketch(db, start, end)
+    return {
+        "from": start,
+        "to": end,
+        "count": sketch.count,
+        "average_duration": sketch.sum / sketch.count if sketch.count else None,
+        "min_duration": sketch.min if sketch.count else None,
+        "max_duration": sketch.max if sketch.count else None,
+        "relative_accuracy": sketch.relative_accuracy,
+        "quantiles": {str(q): sketch.quantile(q) for q in qs},
+        "histogram": sketch.histogram(buckets),
+    }
+
+@app.get("/api/tags", response_model=List[TagResponse],
+         dependencies=[Depends(etag_guard("rfid_tags", extra=lambda: read_engine.version('tags')))])
+async def get_tags(db: Session = Depends(read_engine.dependency('tags'))):
     """Retorna todas as tags cadastradas"""
     tags = db.query(RFIDTag).filter(RFIDTag.active == True).all()
     return tags
 
-@app.get("/api/events/recent")
-async def get_recent_events(limit: int = 50, db: Session = Depends(get_db_session)):
+@app.get("/api/events/recent",
+         dependencies=[Depends(etag_guard("rfid_events", extra=lambda: read_engine.version('events')))])
+async def get_recent_events(response: Response, limit: int = 50,
+                            db: Session = Depends(read_engine.dependency('events'))):
     """Retorna eventos recentes"""
-    events = db.query(RFIDEvent).order_by(
-        RFIDEvent.event_time.desc()
-    ).limit(limit).all()
-    
-    return [{
-        "id": e.id,
-        "tag_id": e.tag_id,
-        "antenna_number": e.antenna_number,
-        "event_time": e.event_time,
-        "session_id": e.session_id
-    } for e in events]
-
-@app.get("/api/rejected/recent")
-async def get_rejected_readings(limit: int = 100, db: Session = Depends(get_db_session)):
+    rows = db.execute(_select_columns(RFIDEvent, EVENT_COLUMNS).order_by(
+        RFIDEvent.event_ms.desc()
+    ).limit(limit))
+    return fastjson.rows_response(EVENT_COLUMNS, rows, response)
+
+@app.get("/api/rejected/recent",
+         dependencies=[Depends(etag_guard("rejected_readings", extra=lambda: read_engine.version('rejected')))])
+async def get_rejected_readings(response: Response, limit: int = 100,
+                                db: Session = Depends(read_engine.dependency('rejected'))):
     """Retorna leituras rejeitadas ou bloqueadas"""
-    rejected = db.query(RejectedReading).order_by(
-        RejectedReading.event_time.desc()
-    ).limit(limit).all()
-    
-    return [{
-        "id": r.id,
-        "tag_id": r.tag_id,
-        "antenna_number": r.antenna_number,
-        "event_time": r.event_time,
-        "reason": r.reason,
-        "reason_type": r.reason_type
-    } for r in rejected]
+    rows = db.execute(_select_columns(RejectedReading, REJECTED_COLUMNS).order_by(
+        RejectedReading.event_ms.desc()
+    ).limit(limit))
+    return fastjson.rows_response(REJECTED_COLUMNS, rows, response)
+
+@app.get("/api/export/{kind}")
+async def export_data(
+    kind: str,
+    format: str = "csv",
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+):
+    """
+    Exporta sessões, eventos ou leituras rejeitadas em CSV ou NDJSON (streaming)
+
+    O intervalo [from, to) filtra pela data de criação (sessões) ou do evento.
+    """
+    if kind not in exporter.EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Exportação desconhecida: {kind}")
+    if format not in exporter.FORMATS:
+        raise HTTPException(status_code=400, detail="Formato deve ser 'csv' ou 'ndjson'")
+
+    filename = f"{kind}_{brasilia_now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        exporter.iter_export(read_engine.session_factory('export'), kind, format, start, end),
+        media_type=exporter.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 # Runtime config file for antenna settings (created if missing)
@@ -429,7 +909,8 @@ def _ensure_config():
         "antenna2_enabled": True,
         "antenna1_power": 5,
         "antenna2_power": 5,
-        "save_on_poweroff": True
+        "save_on_poweroff": True,
+        "zones": ur4_zones.zones_to_config(ur4_zones.DEFAULT_ZONES)
     }
     if not CONFIG_PATH.exists():
         try:
@@ -457,22 +938,20 @@ def save_runtime_config(data: dict):
     except Exception:
         return False
 
+_zones_cache = (None, ur4_zones.DEFAULT_ZONES)
 
-def _build_frame(cmd: int, data_bytes: bytes | bytearray) -> bytes:
-    """Builds a frame according to the protocol in the PDF.
-    Frame: Header(2) + Length(2) + CMD(1) + Data(N) + BCC(1) + Trailer(2)
-    Length = total bytes count (header..trailer)
-    BCC = XOR of length bytes, cmd and data bytes
-    """
-    header = bytearray([0xC8, 0x8C])
-    length = 8 + len(data_bytes)  # total frame size
-    length_bytes = bytearray([(length >> 8) & 0xFF, length & 0xFF])
-    body = bytearray([cmd]) + bytearray(data_bytes)
-    bcc = 0
-    for b in length_bytes + body:
-        bcc ^= b
-    trailer = bytearray([0x0D, 0x0A])
-    return bytes(header + length_bytes + body + bytearray([bcc]) + trailer)
+def current_zones():
+    """Mapa de zonas do config.json, relido só quando o arquivo muda (mtime/tamanho)"""
+    global _zones_cache
+    version = conditional.file_version(CONFIG_PATH)
+    if _zones_cache[0] != version:
+        try:
+            zones = ur4_zones.load_zones(load_runtime_config())
+        except ValueError as e:
+            print(f"⚠️ Mapa de zonas inválido no config.json ({e}), usando o padrão")
+            zones = dict(ur4_zones.DEFAULT_ZONES)
+        _zones_cache = (version, zones)
+    return _zones_cache[1]
 
 
 def _apply_config_to_device(cfg: dict, port: str = None) -> dict:
@@ -497,6 +976,9 @@ def _apply_config_to_device(cfg: dict, port: str = None) -> dict:
             import platform
             port = 'COM4' if platform.system() == 'Windows' else '/dev/ttyUSB0'
     
+    import serial
+    import ur4_protocol
+
     try:
         ser = serial.Serial(port=port, baudrate=115200, timeout=1)
     except Exception as e:
@@ -504,54 +986,34 @@ def _apply_config_to_device(cfg: dict, port: str = None) -> dict:
         return result
 
     try:
-        # Configurar antenas ativas (comando 0x28)
-        # Apenas antenas 1 e 2 devem estar ativas
-        save_flag = 0x01 if cfg.get('save_on_poweroff', True) else 0x00
-        
-        # Criar bitmask: bit 0 = antena 1, bit 1 = antena 2
-        a1 = 1 if cfg.get('antenna1_enabled', True) else 0
-        a2 = 1 if cfg.get('antenna2_enabled', True) else 0
-        
-        # Bitmask de 16 bits (apenas bits 0 e 1 usados para antenas 1 e 2)
-        antenna_bitmask = (a1 << 0) | (a2 << 1)
+        # Configurar antenas ativas (comando 0x28): as habilitadas do mapa de zonas
+        save = cfg.get('save_on_poweroff', True)
         
-        # Protocolo UR4: DByte2=save_flag, DByte1=MSB, DByte0=LSB
-        dbyte0 = antenna_bitmask & 0xFF  # LSB
-        dbyte1 = (antenna_bitmask >> 8) & 0xFF  # MSB (sempre 0 para 2 antenas)
-        dbyte2 = save_flag
+        # Criar bitmask: bit 0 = antena 1, bit 1 = antena 2, ...
+        antennas = ur4_zones.enabled_antennas(cfg)
+        antenna_bitmask = ur4_protocol.antenna_bitmask(antennas)
         
-        frame_antenna = _build_frame(0x28, bytes([dbyte2, dbyte1, dbyte0]))
         try:
+            frame_antenna = ur4_protocol.encode_set_antennas(antennas, save=save)
             ser.write(frame_antenna)
             result['sent'].append({
                 'cmd': 'antenna', 
                 'frame': frame_antenna.hex(),
                 'bitmask': f'0x{antenna_bitmask:04X}',
-                'antennas': [i+1 for i in range(16) if antenna_bitmask & (1 << i)]
+                'antennas': ur4_protocol.antennas_from_bitmask(antenna_bitmask)
             })
             time.sleep(0.1)
         except Exception as e:
             result['errors'].append(f"Error sending antenna frame: {e}")
 
         # Configurar potências das antenas
-        for ant_idx, key in ((1, 'antenna1_power'), (2, 'antenna2_power')):
-            if key in cfg:
-                power_dbm = int(cfg.get(key, 5))  # Default 5 dBm
-                
-                # Potência é enviada multiplicada por 100
-                power_val = int(power_dbm * 100)
-                power_msb = (power_val >> 8) & 0xFF
-                power_lsb = power_val & 0xFF
-                
-                # Status: 0x02 = salvar, 0x00 = não salvar
-                status = 0x02 if cfg.get('save_on_poweroff', True) else 0x00
-                
-                # Protocolo UR4 Set Power (0x10):
-                # Status, Antenna, Read_Power_MSB, Read_Power_LSB, Write_Power_MSB, Write_Power_LSB
-                data = bytes([status, ant_idx, power_msb, power_lsb, power_msb, power_lsb])
-                frame_power = _build_frame(0x10, data)
+        for ant_idx in ur4_zones.configured_antennas(cfg):
+            if f'antenna{ant_idx}_power' in cfg:
+                power_dbm = ur4_zones.antenna_power(cfg, ant_idx)
                 
                 try:
+                    # Protocolo UR4 Set Power (0x10): leitura e escrita com a mesma potência
+                    frame_power = ur4_protocol.encode_set_power(ant_idx, power_dbm, power_dbm, save=save)
                     ser.write(frame_power)
                     result['sent'].append({
                         'cmd': f'power_ant{ant_idx}', 
@@ -580,30 +1042,98 @@ def _apply_config_to_device(cfg: dict, port: str = None) -> dict:
     return result
 
 
-@app.get("/api/config")
+# ==================== JOBS DE DISPOSITIVO ====================
+# Arquivos de sinalização lidos pelo rfid_reader.py (dono da porta serial)
+DATABASE_DIR = Path(__file__).parent.parent / "database"
+DEVICE_INFO_PATH = DATABASE_DIR / "device_info.json"
+SERIES_PATH = DATABASE_DIR / "read_series.json"
+CONFIG_SIGNAL_PATH = DATABASE_DIR / "config_changed.txt"
+REFRESH_SIGNAL_PATH = DATABASE_DIR / "refresh_signal.txt"
+
+# O leitor verifica os sinais a cada 5 s e grava device_info.json a cada 2 min
+READER_ACK_TIMEOUT = 30.0
+READER_ALIVE_WINDOW = 10 * 60
+
+
+def _reader_alive() -> bool:
+    """O rfid_reader.py está rodando se renovou o device_info.json recentemente"""
+    try:
+        return time.time() - DEVICE_INFO_PATH.stat().st_mtime < READER_ALIVE_WINDOW
+    except OSError:
+        return False
+
+
+def _signal_reader(signal_path: Path, job_id: str, done) -> bool:
+    """Cria o arquivo de sinal e aguarda (na thread do worker) a confirmação do leitor"""
+    signal_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(signal_path, "w") as f:
+        f.write(f"{brasilia_now().isoformat()} {job_id}")
+
+    deadline = time.monotonic() + READER_ACK_TIMEOUT
+    while time.monotonic() < deadline:
+        if done():
+            return True
+        time.sleep(0.25)
+    return False
+
+
+def _job_apply_config(job) -> dict:
+    """Aplica config.json ao dispositivo via leitor (ou direto, se o leitor não estiver rodando)"""
+    if not _reader_alive():
+        result = _apply_config_to_device(load_runtime_config())
+        if result["errors"]:
+            raise RuntimeError("; ".join(result["errors"]))
+        return {"applied_by": "api", **result}
+
+    # O leitor remove o arquivo de sinal depois de aplicar a configuração
+    if not _signal_reader(CONFIG_SIGNAL_PATH, job.id, lambda: not CONFIG_SIGNAL_PATH.exists()):
+        raise TimeoutError("Leitor RFID não confirmou a aplicação da configuração")
+    return {"applied_by": "reader"}
+
+
+def _job_refresh_info(job) -> dict:
+    """Pede ao leitor para reler as informações do dispositivo"""
+    submitted = time.time()
+
+    def refreshed():
+        try:
+            return not REFRESH_SIGNAL_PATH.exists() and DEVICE_INFO_PATH.stat().st_mtime >= submitted
+        except OSError:
+            return False
+
+    if not _signal_reader(REFRESH_SIGNAL_PATH, job.id, refreshed):
+        raise TimeoutError("Leitor RFID não atualizou as informações do dispositivo")
+    return {"device_info_updated": True}
+
+
+device_jobs = DeviceJobQueue({
+    "apply_config": _job_apply_config,
+    "refresh_info": _job_refresh_info,
+})
+
+
+@app.get("/api/config", dependencies=[Depends(etag_guard(extra=lambda: conditional.file_version(CONFIG_PATH)))])
 async def get_config():
     """Retorna a configuração runtime (antenas/potência)"""
     return load_runtime_config()
 
 
-@app.get("/api/rejected/recent")
-async def get_rejected_readings(limit: int = 10, db: Session = Depends(get_db_session)):
+@app.get("/api/rejected/recent",
+         dependencies=[Depends(etag_guard("rejected_readings", extra=lambda: read_engine.version('rejected')))])
+async def get_rejected_readings(response: Response, limit: int = 10,
+                                db: Session = Depends(read_engine.dependency('rejected'))):
     """Retorna leituras rejeitadas recentes"""
-    rejected = db.query(RejectedReading).order_by(
-        RejectedReading.event_time.desc()
-    ).limit(limit).all()
-    
-    return [{
-        "id": r.id,
-        "tag_id": r.tag_id,
-        "antenna_number": r.antenna_number,
-        "event_time": r.event_time,
-        "reason": r.reason,
-        "reason_type": r.reason_type
-    } for r in rejected]
+    rows = db.execute(_select_columns(RejectedReading, REJECTED_COLUMNS).order_by(
+        RejectedReading.event_ms.desc()
+    ).limit(limit))
+    return fastjson.rows_response(REJECTED_COLUMNS, rows, response)
 
 
-@app.get("/api/device/info")
+def _device_info_version() -> str:
+    """Versão dos arquivos lidos por /api/device/info e se o leitor ainda conta como ativo"""
+    return f"{conditional.file_version(DEVICE_INFO_PATH)}.{conditional.file_version(CONFIG_PATH)}.{int(_reader_alive())}"
+
+@app.get("/api/device/info", dependencies=[Depends(etag_guard(extra=_device_info_version))])
 async def get_device_info():
     """Retorna informações do dispositivo UR4 (número de série, firmware, etc.)"""
     result = {
@@ -627,9 +1157,13 @@ async def get_device_info():
                 device_info = json.load(f)
             
             # Verificar se a informação não está muito antiga (mais de 10 minutos)
+            # O leitor só reescreve o arquivo quando algo muda; nas verificações sem
+            # mudança ele apenas renova o mtime, por isso vale o mais recente dos dois
             from datetime import datetime, timedelta
             last_update = datetime.fromisoformat(device_info.get('last_update', '2000-01-01'))
             last_update = ensure_timezone(last_update)
+            checked_at = datetime.fromtimestamp(os.path.getmtime(device_info_file), BRASILIA_TZ)
+            last_update = max(last_update, checked_at)
             if brasilia_now() - last_update < timedelta(minutes=10):
                 # Informação recente, usar ela
                 result.update(device_info)
@@ -656,51 +1190,84 @@ async def get_device_info():
     return result
 
 
+SERIES_RESOLUTIONS = ('second', 'minute', 'hour')
+
+@app.get("/api/device/series",
+         dependencies=[Depends(etag_guard(extra=lambda: conditional.file_version(SERIES_PATH)))])
+async def get_device_series(
+    resolution: Optional[str] = None,
+    antenna: Optional[int] = Query(None, ge=0, le=16)
+):
+    """
+    Séries de leituras por antena (contagem, EPCs distintos, RSSI mín/médio/máx)
+
+    Gravadas pelo rfid_reader.py em read_series.json a cada 2 s. Cada série
+    traz 'start' (segundos da época) e 'width' do balde, mais um array por
+    métrica do balde mais antigo ao atual; baldes sem leitura têm RSSI null.
+    """
+    if resolution is not None and resolution not in SERIES_RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution deve ser {', '.join(SERIES_RESOLUTIONS)}")
+    try:
+        with open(SERIES_PATH, 'rb') as f:
+            series = json.load(f)
+    except FileNotFoundError:
+        return {"available": False, "antennas": {}}
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=f"Séries ilegíveis: {e}")
+
+    antennas = series.get('antennas', {})
+    if antenna is not None:
+        antennas = {key: value for key, value in antennas.items() if key == str(antenna)}
+    if resolution is not None:
+        antennas = {key: {resolution: value[resolution]} for key, value in antennas.items() if resolution in value}
+    return {"available": True, "generated_at": series.get('generated_at'), "antennas": antennas}
+
+
 @app.post("/api/device/refresh")
 async def refresh_device_info():
-    """Sinaliza para o leitor RFID atualizar as informações do dispositivo"""
+    """Enfileira a atualização das informações do dispositivo (retorna o id do job)"""
     try:
-        # Criar arquivo de sinal para o leitor
-        signal_file = os.path.join(os.path.dirname(__file__), '..', 'database', 'refresh_signal.txt')
-        with open(signal_file, 'w') as f:
-            f.write(brasilia_now().isoformat())
-        
-        # Aguardar um pouco para o leitor processar
-        time.sleep(0.5)
-        
-        return {"success": True, "message": "Sinal de atualização enviado"}
+        job = device_jobs.submit("refresh_info")
+        return {"success": True, "job_id": job.id, "message": "Atualização enfileirada"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+@app.get("/api/device/jobs/{job_id}")
+async def get_device_job(job_id: str):
+    """Retorna o status de um job de dispositivo"""
+    job = device_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
 @app.post("/api/config")
 async def set_config(payload: dict):
     """Atualiza a configuração runtime e salva em arquivo"""
     # Validação simples
     cfg = load_runtime_config()
     try:
-        if 'antenna1_enabled' in payload:
-            cfg['antenna1_enabled'] = bool(payload['antenna1_enabled'])
-        if 'antenna2_enabled' in payload:
-            cfg['antenna2_enabled'] = bool(payload['antenna2_enabled'])
-        if 'antenna1_power' in payload:
-            cfg['antenna1_power'] = int(payload['antenna1_power'])
-        if 'antenna2_power' in payload:
-            cfg['antenna2_power'] = int(payload['antenna2_power'])
+        # antennaN_enabled / antennaN_power para as antenas 1-16
+        for key, cast in ur4_zones.antenna_keys().items():
+            if key in payload:
+                cfg[key] = cast(payload[key])
+        # Mapa de zonas (antena -> estação/papel), validado antes de salvar
+        if 'zones' in payload:
+            cfg['zones'] = ur4_zones.zones_to_config(ur4_zones.parse_zones(payload['zones']))
 
         saved = save_runtime_config(cfg)
         if not saved:
             raise Exception('Não foi possível salvar configuração')
 
-        # Criar arquivo de sinalização para o rfid_reader.py aplicar as novas configurações
-        # O rfid_reader.py tem acesso exclusivo à porta serial
-        signal_file = os.path.join(os.path.dirname(__file__), '..', 'database', 'config_changed.txt')
-        with open(signal_file, 'w') as f:
-            f.write(brasilia_now().isoformat())
+        # Aplicação no dispositivo é assíncrona: o worker sinaliza o rfid_reader.py
+        # (dono da porta serial) e saves em sequência enviam apenas a última configuração
+        job = device_jobs.submit("apply_config")
 
         return {
             "success": True, 
             "config": cfg, 
+            "job_id": job.id,
             "message": "Configuração salva. O leitor RFID aplicará as mudanças automaticamente."
         }
     except Exception as e:
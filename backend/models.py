@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, create_engine
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Float, Boolean, LargeBinary, Index, UniqueConstraint, create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timezone, timedelta
@@ -13,6 +13,26 @@ def brasilia_now():
     """Retorna o datetime atual no timezone de Brasília"""
     return datetime.now(BRASILIA_TZ)
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def epoch_ms(dt):
+    """Milissegundos desde a época Unix (datetime sem timezone = horário de Brasília)"""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=BRASILIA_TZ)
+    # Arredonda ao milissegundo mais próximo, como o julianday() do SQLite no backfill
+    return ((dt - EPOCH) // timedelta(microseconds=1) + 500) // 1000
+
+def now_ms():
+    return epoch_ms(brasilia_now())
+
+def from_epoch_ms(ms):
+    """Converte milissegundos da época para datetime no horário de Brasília (apresentação)"""
+    if ms is None:
+        return None
+    return (EPOCH + timedelta(milliseconds=ms)).astimezone(BRASILIA_TZ)
+
 class RFIDTag(Base):
     """Modelo para armazenar informações das tags RFID"""
     __tablename__ = 'rfid_tags'
@@ -26,15 +46,32 @@ class RFIDTag(Base):
 class ProductionSession(Base):
     """Modelo para sessões de produção"""
     __tablename__ = 'production_sessions'
+    # Sessões em produção por idade (varredura de expiração, ver session_sweeper.py)
+    __table_args__ = (Index('ix_production_sessions_status_start', 'status', 'antenna_1_ms'),)
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tag_id = Column(String(100), nullable=False, index=True)
     antenna_1_time = Column(DateTime)  # Entrada na antena 1
     antenna_2_time = Column(DateTime)  # Saída na antena 2
     duration_seconds = Column(Float)  # Tempo de produção em segundos
-    status = Column(String(20), default='em_producao')  # em_producao, finalizado
+    status = Column(String(20), default='em_producao')  # em_producao, finalizado, expirado
     created_at = Column(DateTime, default=brasilia_now)
     updated_at = Column(DateTime, default=brasilia_now, onupdate=brasilia_now)
+    edge_id = Column(String(36), unique=True, index=True)  # Id da sessão criada no leitor (modo edge)
+    station = Column(String(50), default='portal', index=True)  # Estação do mapa de zonas (ur4_zones)
+    # Mesmos instantes em milissegundos da época (filtros de intervalo e durações)
+    antenna_1_ms = Column(BigInteger, index=True)
+    antenna_2_ms = Column(BigInteger, index=True)
+    created_ms = Column(BigInteger, index=True)
+
+class EdgeAlias(Base):
+    """Outro edge_id de uma sessão (início da borda incorporado a uma sessão já aberta)"""
+    __tablename__ = 'edge_aliases'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    edge_id = Column(String(36), unique=True, nullable=False, index=True)
+    session_id = Column(Integer, nullable=False, index=True)
+    created_at = Column(DateTime, default=brasilia_now)
 
 class RFIDEvent(Base):
     """Modelo para registrar todos os eventos de leitura RFID"""
@@ -45,6 +82,7 @@ class RFIDEvent(Base):
     antenna_number = Column(Integer, nullable=False)  # 1 ou 2
     event_time = Column(DateTime, default=brasilia_now, index=True)
     session_id = Column(Integer)  # Referência à sessão de produção
+    event_ms = Column(BigInteger, index=True)  # event_time em milissegundos da época
 
 class RejectedReading(Base):
     """Modelo para registrar leituras rejeitadas ou bloqueadas"""
@@ -56,10 +94,58 @@ class RejectedReading(Base):
     event_time = Column(DateTime, default=brasilia_now, index=True)
     reason = Column(String(255), nullable=False)  # Motivo da rejeição
     reason_type = Column(String(50))  # 'validation', 'timeout', 'blocked', etc.
+    event_ms = Column(BigInteger, index=True)  # event_time em milissegundos da época
+    
+class ProductionRollup(Base):
+    """Agregados de sessões por dia/hora, mantidos a cada sessão finalizada ou cancelada"""
+    __tablename__ = 'production_rollups'
+    __table_args__ = (UniqueConstraint('granularity', 'bucket_start', name='uq_rollup_bucket'),)
     
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String(5), nullable=False)  # day, hour
+    bucket_start = Column(DateTime, nullable=False)  # Início do período (horário de Brasília)
+    completed = Column(Integer, nullable=False, default=0)
+    cancelled = Column(Integer, nullable=False, default=0)
+    duration_count = Column(Integer, nullable=False, default=0)  # Finalizadas com duração
+    duration_sum = Column(Float, nullable=False, default=0.0)
+    duration_sumsq = Column(Float, nullable=False, default=0.0)
+    duration_min = Column(Float)
+    duration_max = Column(Float)
+
+class DurationSketch(Base):
+    """Sketch diário (DDSketch) das durações das sessões finalizadas, ver sketches.py"""
+    __tablename__ = 'duration_sketches'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(DateTime, unique=True, nullable=False)  # Dia (horário de Brasília)
+    count = Column(Integer, nullable=False, default=0)
+    sketch = Column(LargeBinary, nullable=False)
+
+# Colunas *_ms derivadas das colunas DateTime (coluna datetime, coluna ms)
+EPOCH_COLUMNS = {
+    ProductionSession: (('antenna_1_time', 'antenna_1_ms'), ('antenna_2_time', 'antenna_2_ms'), ('created_at', 'created_ms')),
+    RFIDEvent: (('event_time', 'event_ms'),),
+    RejectedReading: (('event_time', 'event_ms'),),
+}
+
+def _sync_epoch_columns(mapper, connection, target):
+    """Mantém as colunas *_ms iguais às DateTime em toda gravação via ORM"""
+    if isinstance(target, ProductionSession) and target.created_at is None:
+        target.created_at = brasilia_now()
+    if isinstance(target, (RFIDEvent, RejectedReading)) and target.event_time is None:
+        target.event_time = brasilia_now()
+    for dt_attr, ms_attr in EPOCH_COLUMNS[type(target)]:
+        value = getattr(target, dt_attr)
+        if value is not None:
+            setattr(target, ms_attr, epoch_ms(value))
+
+for _model in EPOCH_COLUMNS:
+    event.listen(_model, 'before_insert', _sync_epoch_columns)
+    event.listen(_model, 'before_update', _sync_epoch_columns)
+
 # Configuração do banco de dados
 DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database')
-DATABASE_PATH = os.path.join(DATABASE_DIR, 'rfid_portal.db')
+DATABASE_PATH = os.environ.get('PORTAL_DATABASE') or os.path.join(DATABASE_DIR, 'rfid_portal.db')
 
 # Criar diretório do banco de dados se não existir
 if not os.path.exists(DATABASE_DIR):
@@ -69,6 +155,62 @@ if not os.path.exists(DATABASE_DIR):
 engine = create_engine(f'sqlite:///{DATABASE_PATH}', echo=False)
 SessionLocal = sessionmaker(bind=engine)
 
+def migrate_db(bind):
+    """
+    Adiciona colunas novas dos modelos a tabelas já existentes
+
+    create_all só cria tabelas ausentes; colunas acrescentadas depois
+    (sempre anuláveis) são criadas aqui com ALTER TABLE, assim como os
+    índices que ainda não existem no banco. Colunas com default fixo
+    recebem esse valor nas linhas existentes.
+    """
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {col['name'] for col in inspector.get_columns(table.name)}
+        missing = [col for col in table.columns if col.name not in existing]
+        if missing:
+            with bind.begin() as conn:
+                for col in missing:
+                    col_type = col.type.compile(dialect=bind.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type}'))
+                    if col.default is not None and col.default.is_scalar:
+                        conn.execute(text(f'UPDATE {table.name} SET {col.name} = :value'),
+                                     {'value': col.default.arg})
+                    print(f"🔧 Coluna adicionada: {table.name}.{col.name}")
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind, checkfirst=True)
+                print(f"🔧 Índice criado: {index.name}")
+    backfill_epoch_columns(bind)
+
+def backfill_epoch_columns(bind, batch_size: int = 50000):
+    """
+    Preenche colunas *_ms vazias a partir das DateTime (gravadas no horário de Brasília)
+
+    Feito em lotes de rowid para não manter uma transação gigante em bancos grandes.
+    """
+    offset_ms = -int(BRASILIA_TZ.utcoffset(None).total_seconds() * 1000)
+    for model, pairs in EPOCH_COLUMNS.items():
+        table = model.__tablename__
+        for dt_col, ms_col in pairs:
+            filled = 0
+            while True:
+                with bind.begin() as conn:
+                    updated = conn.execute(text(
+                        f"UPDATE {table} SET {ms_col} = "
+                        f"CAST(ROUND((julianday({dt_col}) - 2440587.5) * 86400000.0) AS INTEGER) + {offset_ms} "
+                        f"WHERE rowid IN (SELECT rowid FROM {table} WHERE {ms_col} IS NULL AND julianday({dt_col}) IS NOT NULL "
+                        f"LIMIT {batch_size})"
+                    )).rowcount
+                filled += updated
+                if updated < batch_size:
+                    break
+            if filled:
+                print(f"🔧 {table}.{ms_col}: {filled} linha(s) preenchida(s)")
+
 def init_db():
     """Inicializa o banco de dados criando todas as tabelas"""
     # Garantir que o diretório existe
@@ -87,6 +229,7 @@ def init_db():
         engine = create_engine(f'sqlite:///{DATABASE_PATH}', echo=False)
         SessionLocal = sessionmaker(bind=engine)
         Base.metadata.create_all(engine)
+        migrate_db(engine)
         print(f"Banco de dados inicializado em: {DATABASE_PATH}")
 
 def get_db():
@@ -0,0 +1,293 @@
+"""
+Profiling opcional por requisição para a API do Portal RFID.
+
+Ativado exclusivamente por variáveis de ambiente (desligado por padrão):
+
+    PORTAL_PROFILE=cprofile|wall   Modo de profiling (vazio/off = desativado)
+    PORTAL_PROFILE_RATE=0.05       Fração de requisições amostradas (0.0 a 1.0)
+    PORTAL_PROFILE_ROUTE=/api/stats  Prefixo de rota sempre perfilada
+    PORTAL_PROFILE_DIR=logs/profiles Diretório de saída
+    PORTAL_PROFILE_TOP=30          Quantidade de funções no relatório agregado
+    PORTAL_PROFILE_INTERVAL_MS=5   Intervalo do amostrador de parede (modo wall)
+
+Cada requisição perfilada gera um arquivo próprio (.prof para cProfile,
+.txt com pilhas colapsadas para o amostrador de parede) e o relatório
+agregado top-N é regravado em `aggregate_top.txt`. A gravação dos
+arquivos (e a montagem das estatísticas) roda em uma thread própria,
+nunca no event loop.
+
+Limites (ambos os modos observam só a thread do event loop):
+    - Handlers `async def` rodam no loop intercalados com outras
+      corrotinas: enquanto a requisição perfilada espera (await), o que
+      roda no loop (outras requisições, tarefas de fundo) também entra no
+      profile. Use uma taxa baixa ou PORTAL_PROFILE_ROUTE e compare com
+      várias amostras.
+    - Handlers `def` (síncronos, ex: rotas /api/admin/*) rodam no
+      threadpool e não aparecem no profile: o relatório mostra apenas a
+      validação e a serialização feitas no loop. Para eles, use o
+      benchmark dedicado ou perfile a função diretamente.
+
+Exemplo:
+    PORTAL_PROFILE=cprofile PORTAL_PROFILE_ROUTE=/api/stats uvicorn main:app
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+PROFILE_MODES = ('cprofile', 'wall')
+
+# Regravar o relatório agregado a cada N requisições perfiladas
+AGGREGATE_EVERY = 10
+
+# Middlewares instanciados (para gravar o relatório final no shutdown)
+_instances = []
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class WallClockSampler:
+    """Amostrador de parede: coleta a pilha de uma thread em intervalos fixos"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if self._stop.is_set():
+                break
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 0.1):
+        """
+        Para a amostragem (chamado no event loop)
+
+        A thread acorda assim que o evento é setado; o join tem limite para
+        nunca travar o loop, e uma pilha coletada depois do stop é descartada.
+        """
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que perfila uma amostra das requisições HTTP.
+
+    Apenas uma requisição é perfilada por vez: requisições concorrentes
+    durante um profiling ativo seguem sem instrumentação.
+    """
+
+    def __init__(self, app, mode: str, rate: float = 0.0, route: Optional[str] = None,
+                 output_dir: str = 'logs/profiles', top_n: int = 30, interval: float = 0.005):
+        self.app = app
+        self.mode = mode
+        self.rate = rate
+        self.route = route
+        self.output_dir = Path(output_dir)
+        self.top_n = top_n
+        self.interval = interval
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self._busy = threading.Lock()
+        self._aggregate_lock = threading.Lock()
+        self._aggregate_stats: Optional[pstats.Stats] = None
+        self._aggregate_samples = Counter()
+        self._route_totals = Counter()
+        self._route_times = Counter()
+        self._profiled = 0
+        # Gravação dos resultados fora do event loop (uma thread, em ordem)
+        self._pending: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_pending, name="profile-writer", daemon=True)
+        self._writer.start()
+        _instances.append(self)
+
+    def _should_profile(self, path: str) -> bool:
+        if self.route and path.startswith(self.route):
+            return True
+        return self.rate > 0 and random.random() < self.rate
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self._should_profile(scope['path']):
+            await self.app(scope, receive, send)
+            return
+
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            start = time.perf_counter()
+            if self.mode == 'cprofile':
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    profiler.disable()
+                    self._pending.put((self._record_cprofile, scope, profiler, time.perf_counter() - start))
+            else:
+                sampler = WallClockSampler(threading.get_ident(), self.interval)
+                sampler.start()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    sampler.stop()
+                    self._pending.put((self._record_samples, scope, sampler.samples, time.perf_counter() - start))
+        finally:
+            self._busy.release()
+
+    def _write_pending(self):
+        """Thread de gravação: processa as requisições perfiladas na ordem em que terminaram"""
+        while True:
+            record, *args = self._pending.get()
+            try:
+                record(*args)
+            finally:
+                self._pending.task_done()
+
+    def _base_name(self, scope, elapsed: float) -> str:
+        route = re.sub(r'[^A-Za-z0-9]+', '_', scope['path']).strip('_') or 'root'
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        return f"{stamp}_{scope['method']}_{route}_{elapsed * 1000:.0f}ms"
+
+    def _record_cprofile(self, scope, profiler: cProfile.Profile, elapsed: float):
+        try:
+            profiler.dump_stats(str(self.output_dir / f"{self._base_name(scope, elapsed)}.prof"))
+            with self._aggregate_lock:
+                if self._aggregate_stats is None:
+                    self._aggregate_stats = pstats.Stats(profiler)
+                else:
+                    self._aggregate_stats.add(profiler)
+                self._account(scope, elapsed)
+        except Exception as e:
+            print(f"⚠️ Erro ao gravar profile: {e}")
+
+    def _record_samples(self, scope, samples: Counter, elapsed: float):
+        try:
+            path = self.output_dir / f"{self._base_name(scope, elapsed)}.txt"
+            with open(path, 'w') as f:
+                for stack, count in samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            with self._aggregate_lock:
+                self._aggregate_samples.update(samples)
+                self._account(scope, elapsed)
+        except Exception as e:
+            print(f"⚠️ Erro ao gravar amostras: {e}")
+
+    def _account(self, scope, elapsed: float):
+        """Contabiliza a requisição e regrava o relatório periodicamente (com lock)"""
+        self._route_totals[scope['path']] += 1
+        self._route_times[scope['path']] += elapsed
+        self._profiled += 1
+        if self._profiled % AGGREGATE_EVERY == 1:
+            self._write_aggregate()
+
+    def _write_aggregate(self):
+        out = io.StringIO()
+        out.write(f"Relatório agregado ({self.mode}) - {datetime.now().isoformat()}\n")
+        out.write(f"Requisições perfiladas: {self._profiled}\n\n")
+        out.write(f"{'Rota':<40} {'Qtd':>6} {'Média (ms)':>12}\n")
+        for route, count in self._route_totals.most_common():
+            out.write(f"{route:<40} {count:>6} {self._route_times[route] / count * 1000:>12.2f}\n")
+        out.write("\n")
+
+        if self.mode == 'cprofile' and self._aggregate_stats is not None:
+            self._aggregate_stats.stream = out
+            self._aggregate_stats.sort_stats('cumulative').print_stats(self.top_n)
+        else:
+            # Tempo próprio: função no topo de cada pilha amostrada
+            leaf = Counter()
+            for stack, count in self._aggregate_samples.items():
+                leaf[stack.rsplit(';', 1)[-1]] += count
+            total = sum(leaf.values()) or 1
+            out.write(f"{'Amostras':>9} {'%':>6}  Função\n")
+            for func, count in leaf.most_common(self.top_n):
+                out.write(f"{count:>9} {count * 100.0 / total:>6.1f}  {func}\n")
+
+        with open(self.output_dir / 'aggregate_top.txt', 'w') as f:
+            f.write(out.getvalue())
+
+    def flush(self):
+        """Grava o relatório agregado final (chamado no shutdown, após os pendentes)"""
+        self._pending.join()
+        with self._aggregate_lock:
+            if self._profiled:
+                self._write_aggregate()
+
+
+def flush_profiles():
+    """Grava o relatório agregado de todos os middlewares ativos"""
+    for middleware in _instances:
+        try:
+            middleware.flush()
+        except Exception as e:
+            print(f"⚠️ Erro ao gravar relatório de profiling: {e}")
+
+
+def install_profiling(app) -> Optional[dict]:
+    """
+    Registra o ProfilingMiddleware na aplicação se PORTAL_PROFILE estiver definido.
+
+    Returns:
+        dict com a configuração ativa ou None se desativado
+    """
+    mode = os.environ.get('PORTAL_PROFILE', '').strip().lower()
+    if mode not in PROFILE_MODES:
+        return None
+
+    options = {
+        'mode': mode,
+        'rate': min(max(_env_float('PORTAL_PROFILE_RATE', 0.0), 0.0), 1.0),
+        'route': os.environ.get('PORTAL_PROFILE_ROUTE') or None,
+        'output_dir': os.environ.get(
+            'PORTAL_PROFILE_DIR',
+            str(Path(__file__).parent.parent / 'logs' / 'profiles')
+        ),
+        'top_n': _env_int('PORTAL_PROFILE_TOP', 30),
+        'interval': _env_int('PORTAL_PROFILE_INTERVAL_MS', 5) / 1000.0,
+    }
+    if options['rate'] == 0.0 and not options['route']:
+        print("⚠️ PORTAL_PROFILE definido sem PORTAL_PROFILE_RATE nem PORTAL_PROFILE_ROUTE; profiling inativo")
+        return None
+
+    app.add_middleware(ProfilingMiddleware, **options)
+    print(f"🔬 Profiling ativo: modo={mode} taxa={options['rate']} rota={options['route']} saída={options['output_dir']}")
+    return options
@@ -0,0 +1,221 @@
+"""
+Conexão somente leitura para as consultas pesadas (auditoria, exportação).
+
+Relatórios longos (/api/sessions?limit=500, /api/export/*) rodando no
+mesmo engine da ingestão seguram o banco enquanto o cursor é lido e podem
+atrasar o commit de register_rfid_event. Com PORTAL_READ_ENGINE essas
+rotas passam a usar outro engine:
+
+    primary   Mesmo engine da API (padrão, comportamento anterior)
+    ro        O próprio arquivo aberto com URI mode=ro. O banco é passado
+              para WAL, em que leitores não bloqueiam o escritor e veem o
+              último commit
+    snapshot  Cópia periódica feita com a API de backup online do SQLite
+              (PORTAL_READ_SNAPSHOT). As leituras nunca tocam o arquivo da
+              ingestão; os dados ficam até PORTAL_READ_REFRESH_S atrasados
+
+Variáveis de ambiente:
+
+    PORTAL_READ_ENGINE=primary                 primary, ro ou snapshot
+    PORTAL_READ_ROUTES=sessions,export         Rotas que usam o engine de leitura
+    PORTAL_READ_SNAPSHOT=database/rfid_portal_snapshot.db
+    PORTAL_READ_REFRESH_S=60                   Intervalo entre cópias (snapshot)
+
+Rotas disponíveis: sessions, export, stats, events, rejected, tags.
+
+No modo snapshot a geração da cópia entra no ETag das rotas desviadas
+(version()), senão um cliente guardaria dados antigos sob um ETag novo.
+O estado fica em /api/stats/read-engine.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, Optional
+from urllib.parse import quote
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from models import DATABASE_DIR, DATABASE_PATH, brasilia_now
+
+MODES = ('primary', 'ro', 'snapshot')
+ROUTES = ('sessions', 'export', 'stats', 'events', 'rejected', 'tags')
+DEFAULT_ROUTES = ('sessions', 'export')
+DEFAULT_SNAPSHOT = os.path.join(DATABASE_DIR, 'rfid_portal_snapshot.db')
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _ro_uri(path: str) -> str:
+    return f"file:{quote(os.path.abspath(path))}?mode=ro"
+
+
+def _ro_engine(path: str):
+    """Engine do SQLAlchemy sobre conexões sqlite3 abertas com mode=ro"""
+    def connect():
+        return sqlite3.connect(_ro_uri(path), uri=True, check_same_thread=False, timeout=30)
+
+    # NullPool: cada sessão abre a sua conexão (barato no SQLite) e nenhuma
+    # conexão ociosa fica segurando uma versão antiga do arquivo
+    engine = create_engine('sqlite://', creator=connect, poolclass=NullPool)
+
+    @event.listens_for(engine, 'connect')
+    def _query_only(dbapi_connection, _):
+        dbapi_connection.execute("PRAGMA query_only=1")
+    return engine
+
+
+class ReadEngine:
+    """
+    Escolhe o engine de cada rota de leitura
+
+    Args:
+        primary_factory: Fábrica de sessões da API (SessionLocal)
+        primary_engine: Engine da API (para ativar WAL e ler na cópia)
+        mode: 'primary', 'ro' ou 'snapshot'
+        routes: Rotas desviadas para o engine de leitura
+        database_path: Arquivo do banco da API
+        snapshot_path: Destino da cópia (modo snapshot)
+        refresh_interval: Intervalo entre cópias (s)
+    """
+
+    def __init__(self, primary_factory: Callable, primary_engine, mode: str = 'primary',
+                 routes: Iterable[str] = DEFAULT_ROUTES, database_path: str = DATABASE_PATH,
+                 snapshot_path: str = DEFAULT_SNAPSHOT, refresh_interval: float = 60):
+        if mode not in MODES:
+            raise ValueError(f"PORTAL_READ_ENGINE inválido: {mode} (use {', '.join(MODES)})")
+        unknown = set(routes) - set(ROUTES)
+        if unknown:
+            raise ValueError(f"Rotas desconhecidas em PORTAL_READ_ROUTES: {', '.join(sorted(unknown))}")
+        self.primary_factory = primary_factory
+        self.primary_engine = primary_engine
+        self.mode = mode
+        self.routes = frozenset(routes)
+        self.database_path = database_path
+        self.snapshot_path = snapshot_path
+        self.refresh_interval = refresh_interval
+        self._factory: Optional[Callable] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self.stats = {'refreshes': 0, 'last_refresh_at': None, 'last_copy_ms': 0.0, 'errors': 0,
+                      'last_error': None}
+
+    @classmethod
+    def from_env(cls, primary_factory: Callable, primary_engine) -> "ReadEngine":
+        raw_routes = os.environ.get('PORTAL_READ_ROUTES')
+        routes = DEFAULT_ROUTES if raw_routes is None else \
+            [route.strip() for route in raw_routes.split(',') if route.strip()]
+        return cls(
+            primary_factory, primary_engine,
+            mode=os.environ.get('PORTAL_READ_ENGINE', 'primary').strip().lower(),
+            routes=routes,
+            snapshot_path=os.environ.get('PORTAL_READ_SNAPSHOT') or DEFAULT_SNAPSHOT,
+            refresh_interval=_env_float('PORTAL_READ_REFRESH_S', 60),
+        )
+
+    def start(self):
+        """Prepara o engine de leitura (chamar depois do init_db, no lifespan)"""
+        if self.mode == 'primary' or not self.routes:
+            return
+        if not os.path.exists(self.database_path):
+            # init_db caiu no banco em memória: não há arquivo para abrir em outra conexão
+            print("⚠️ Banco em memória: rotas de leitura continuam no engine principal")
+            self.mode = 'primary'
+            return
+
+        with self.primary_engine.connect() as conn:
+            journal = conn.exec_driver_sql("PRAGMA journal_mode=WAL").scalar()
+        if journal != 'wal':
+            print(f"⚠️ Não foi possível ativar WAL (journal_mode={journal})")
+
+        if self.mode == 'ro':
+            self._factory = sessionmaker(bind=_ro_engine(self.database_path))
+        else:
+            self.refresh()
+            self._factory = sessionmaker(bind=_ro_engine(self.snapshot_path))
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._worker, name="read-snapshot", daemon=True)
+            self._thread.start()
+        print(f"📖 Engine de leitura '{self.mode}' para: {', '.join(sorted(self.routes))}")
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _worker(self):
+        while not self._stopping.wait(self.refresh_interval):
+            self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        Copia o banco para o snapshot com a API de backup online
+
+        A cópia é feita de uma vez (um passo): com WAL ela lê um instante
+        consistente sem bloquear o escritor; um passo por vez seria
+        reiniciado a cada commit da ingestão. Leitores do snapshot em
+        andamento apenas atrasam a cópia.
+        """
+        with self._refresh_lock:
+            start = time.perf_counter()
+            try:
+                source = sqlite3.connect(_ro_uri(self.database_path), uri=True, timeout=30)
+                try:
+                    target = sqlite3.connect(self.snapshot_path, timeout=30)
+                    try:
+                        source.backup(target)
+                        # A cópia herda o WAL do cabeçalho; volta ao journal comum para
+                        # abrir em mode=ro sem precisar criar -wal/-shm
+                        target.execute("PRAGMA journal_mode=DELETE")
+                    finally:
+                        target.close()
+                finally:
+                    source.close()
+            except sqlite3.Error as e:
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+                print(f"⚠️ Erro ao atualizar o snapshot de leitura: {e}")
+                return False
+            self.stats['refreshes'] += 1
+            self.stats['last_refresh_at'] = brasilia_now()
+            self.stats['last_copy_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            return True
+
+    def routed(self, route: str) -> bool:
+        return self._factory is not None and route in self.routes
+
+    def session_factory(self, route: str) -> Callable:
+        """Fábrica de sessões da rota (a de leitura se a rota estiver desviada)"""
+        return self._factory if self.routed(route) else self.primary_factory
+
+    def dependency(self, route: str) -> Callable:
+        """Dependência FastAPI com a sessão da rota (no lugar de get_db_session)"""
+        def get_session():
+            db: Session = self.session_factory(route)()
+            try:
+                yield db
+            finally:
+                db.close()
+        return get_session
+
+    def version(self, route: str) -> object:
+        """Parte do ETag: a geração do snapshot, se a rota lê dele"""
+        if self.mode == 'snapshot' and self.routed(route):
+            return f"s{self.stats['refreshes']}"
+        return ''
+
+    def snapshot(self) -> dict:
+        result = {'mode': self.mode, 'routes': sorted(self.routes)}
+        if self.mode == 'snapshot':
+            result.update(path=self.snapshot_path, refresh_interval_s=self.refresh_interval, **self.stats)
+        return result
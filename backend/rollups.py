@@ -0,0 +1,177 @@
+"""
+Agregados de produção por dia e por hora (tabela production_rollups).
+
+Cada sessão finalizada soma contagem, duração, soma dos quadrados e
+mínimo/máximo no período da sua saída (antenna_2_time); cancelamentos
+somam no período em que ocorreram. A atualização é um upsert executado na
+mesma transação que finaliza/cancela a sessão, então os agregados nunca
+divergem do que foi gravado. Como são somas, períodos podem ser combinados
+(média e desvio padrão saem de count, sum e sumsq).
+
+Reconstrução a partir das sessões existentes:
+    python rollups.py rebuild
+"""
+
+import math
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func, select, update, delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models import ProductionRollup, ProductionSession, BRASILIA_TZ
+
+GRANULARITIES = ('day', 'hour')
+
+
+def bucket_start(dt: datetime, granularity: str) -> datetime:
+    """Início do período (horário de Brasília, sem timezone, como gravado no banco)"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(BRASILIA_TZ).replace(tzinfo=None)
+    if granularity == 'day':
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _upsert(db: Session, granularity: str, bucket: datetime, completed: int = 0, cancelled: int = 0,
+            duration_count: int = 0, duration_sum: float = 0.0, duration_sumsq: float = 0.0,
+            duration_min: Optional[float] = None, duration_max: Optional[float] = None):
+    table = ProductionRollup.__table__
+    stmt = insert(table).values(
+        granularity=granularity, bucket_start=bucket, completed=completed, cancelled=cancelled,
+        duration_count=duration_count, duration_sum=duration_sum, duration_sumsq=duration_sumsq,
+        duration_min=duration_min, duration_max=duration_max
+    )
+    excluded = stmt.excluded
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.granularity, table.c.bucket_start],
+        set_={
+            'completed': table.c.completed + excluded.completed,
+            'cancelled': table.c.cancelled + excluded.cancelled,
+            'duration_count': table.c.duration_count + excluded.duration_count,
+            'duration_sum': table.c.duration_sum + excluded.duration_sum,
+            'duration_sumsq': table.c.duration_sumsq + excluded.duration_sumsq,
+            # min/max escalares do SQLite retornam NULL se um lado for NULL
+            'duration_min': func.min(func.coalesce(table.c.duration_min, excluded.duration_min),
+                                     func.coalesce(excluded.duration_min, table.c.duration_min)),
+            'duration_max': func.max(func.coalesce(table.c.duration_max, excluded.duration_max),
+                                     func.coalesce(excluded.duration_max, table.c.duration_max)),
+        }
+    ))
+
+
+def record_completed(db: Session, session: ProductionSession):
+    """Soma uma sessão finalizada (chamar antes do commit que a finaliza)"""
+    duration = session.duration_seconds
+    has_duration = duration is not None
+    for granularity in GRANULARITIES:
+        _upsert(
+            db, granularity, bucket_start(session.antenna_2_time, granularity), completed=1,
+            duration_count=1 if has_duration else 0,
+            duration_sum=duration if has_duration else 0.0,
+            duration_sumsq=duration * duration if has_duration else 0.0,
+            duration_min=duration, duration_max=duration
+        )
+
+
+def record_cancelled(db: Session, when: datetime, count: int = 1):
+    """Soma cancelamentos no período em que ocorreram (antes do commit)"""
+    if count <= 0:
+        return
+    for granularity in GRANULARITIES:
+        _upsert(db, granularity, bucket_start(when, granularity), cancelled=count)
+
+
+def _summary(count: int, total: float, sumsq: float) -> dict:
+    if not count:
+        return {"average_duration": None, "stddev_duration": None}
+    mean = total / count
+    variance = max(sumsq / count - mean * mean, 0.0)
+    return {"average_duration": mean, "stddev_duration": math.sqrt(variance)}
+
+
+def query_rollups(db: Session, start: datetime, end: datetime, granularity: str) -> dict:
+    """Períodos em [start, end) e o total combinado, lidos só dos agregados"""
+    start_bucket = bucket_start(start, granularity)
+    end_value = end.astimezone(BRASILIA_TZ).replace(tzinfo=None) if end.tzinfo else end
+    rows = db.execute(
+        select(ProductionRollup)
+        .where(ProductionRollup.granularity == granularity,
+               ProductionRollup.bucket_start >= start_bucket,
+               ProductionRollup.bucket_start < end_value)
+        .order_by(ProductionRollup.bucket_start)
+    ).scalars().all()
+
+    buckets: List[dict] = []
+    totals = {"completed": 0, "cancelled": 0, "duration_count": 0, "duration_sum": 0.0,
+              "duration_sumsq": 0.0, "min_duration": None, "max_duration": None}
+    for row in rows:
+        buckets.append({
+            "bucket_start": row.bucket_start,
+            "completed": row.completed,
+            "cancelled": row.cancelled,
+            **_summary(row.duration_count, row.duration_sum, row.duration_sumsq),
+            "min_duration": row.duration_min,
+            "max_duration": row.duration_max,
+        })
+        totals["completed"] += row.completed
+        totals["cancelled"] += row.cancelled
+        totals["duration_count"] += row.duration_count
+        totals["duration_sum"] += row.duration_sum
+        totals["duration_sumsq"] += row.duration_sumsq
+        if row.duration_min is not None and (totals["min_duration"] is None or row.duration_min < totals["min_duration"]):
+            totals["min_duration"] = row.duration_min
+        if row.duration_max is not None and (totals["max_duration"] is None or row.duration_max > totals["max_duration"]):
+            totals["max_duration"] = row.duration_max
+
+    summary = _summary(totals.pop("duration_count"), totals.pop("duration_sum"), totals.pop("duration_sumsq"))
+    return {"granularity": granularity, "buckets": buckets, "totals": {**totals, **summary}}
+
+
+def rebuild(db: Session) -> int:
+    """
+    Recalcula os agregados de sessões finalizadas a partir de production_sessions
+
+    Cancelamentos não podem ser reconstruídos (as sessões canceladas são
+    removidas), então as contagens de cancelled existentes são preservadas.
+    Retorna a quantidade de períodos gravados.
+    """
+    table = ProductionRollup.__table__
+    db.execute(update(table).values(completed=0, duration_count=0, duration_sum=0.0,
+                                    duration_sumsq=0.0, duration_min=None, duration_max=None))
+
+    duration = ProductionSession.duration_seconds
+    written = 0
+    for granularity, pattern in (('day', '%Y-%m-%d 00:00:00'), ('hour', '%Y-%m-%d %H:00:00')):
+        bucket = func.strftime(pattern, ProductionSession.antenna_2_time)
+        rows = db.execute(
+            select(bucket, func.count(), func.count(duration), func.coalesce(func.sum(duration), 0.0),
+                   func.coalesce(func.sum(duration * duration), 0.0), func.min(duration), func.max(duration))
+            .where(ProductionSession.status == 'finalizado', ProductionSession.antenna_2_time.isnot(None))
+            .group_by(bucket)
+        ).all()
+        for key, completed, count, total, sumsq, low, high in rows:
+            _upsert(db, granularity, datetime.strptime(key, '%Y-%m-%d %H:%M:%S'), completed=completed,
+                    duration_count=count, duration_sum=total, duration_sumsq=sumsq,
+                    duration_min=low, duration_max=high)
+            written += 1
+
+    db.execute(delete(table).where(table.c.completed == 0, table.c.cancelled == 0))
+    db.commit()
+    return written
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2 or sys.argv[1] != 'rebuild':
+        print("Uso: python rollups.py rebuild")
+        sys.exit(1)
+
+    import models
+    models.init_db()
+    db = models.SessionLocal()
+    try:
+        print(f"✅ Agregados reconstruídos: {rebuild(db)} período(s)")
+    finally:
+        db.close()
@@ -0,0 +1,202 @@
+"""
+Expiração em segundo plano de sessões paradas em produção.
+
+Uma etiqueta que entra pela antena de início e nunca passa pela de fim
+(peça descartada, etiqueta perdida) deixaria a sessão 'em_producao' para
+sempre, inflando /api/sessions/active e o conjunto varrido nas consultas
+de sessão ativa. Uma thread passa periodicamente as sessões iniciadas há
+mais de PORTAL_SESSION_EXPIRY_MIN minutos para o status 'expirado'.
+
+A sessão expirada continua no banco (histórico e exportação), não conta
+como produzida: a etiqueta pode abrir uma sessão nova.
+
+Desligada por padrão: sessões longas de instalações existentes só passam a
+expirar quando PORTAL_SESSION_EXPIRY_MIN é definido. O leitor em modo
+edge (scripts/edge_sessions.py) lê a mesma variável e expira as sessões
+locais com a mesma idade, senão a borda continuaria tratando como ativa uma
+sessão que a API já expirou.
+
+Cada lote é um UPDATE ... WHERE id IN (...) com commit próprio, então a
+varredura nunca segura o banco por muito tempo e a ingestão
+(register_rfid_event) intercala entre os lotes.
+
+Variáveis de ambiente:
+
+    PORTAL_SESSION_EXPIRY_MIN=0     Idade máxima de uma sessão em produção (0 = desligada)
+    PORTAL_SESSION_SWEEP_S=60       Intervalo entre varreduras
+    PORTAL_SESSION_SWEEP_BATCH=500  Sessões por lote (por commit)
+
+As contagens ficam em /api/stats/expiry.
+"""
+
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from models import ProductionSession, brasilia_now, epoch_ms
+
+ACTIVE_STATUS = 'em_producao'
+EXPIRED_STATUS = 'expirado'
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def expire_sessions(db: Session, max_age_minutes: float, batch_size: int = 500,
+                    pause: float = 0.0) -> int:
+    """
+    Expira as sessões em produção iniciadas antes do limite, em lotes
+
+    Args:
+        max_age_minutes: Idade (desde a antena de início) a partir da qual a sessão expira
+        batch_size: Sessões por UPDATE/commit
+        pause: Espera entre lotes (s), para dar vez às gravações da ingestão
+
+    Returns:
+        Quantidade de sessões expiradas
+    """
+    table = ProductionSession.__table__
+    cutoff_ms = epoch_ms(brasilia_now() - timedelta(minutes=max_age_minutes))
+    expired = 0
+    while True:
+        ids = db.execute(
+            select(table.c.id)
+            .where(table.c.status == ACTIVE_STATUS, table.c.antenna_1_ms < cutoff_ms)
+            .order_by(table.c.antenna_1_ms)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        # O status é conferido de novo: a sessão pode ter sido finalizada entre o SELECT e o UPDATE
+        expired += db.execute(
+            update(table)
+            .where(table.c.id.in_(ids), table.c.status == ACTIVE_STATUS)
+            .values(status=EXPIRED_STATUS, updated_at=brasilia_now())
+        ).rowcount
+        db.commit()
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return expired
+
+
+class SessionSweeper:
+    """
+    Thread que expira periodicamente as sessões paradas em produção
+
+    Args:
+        session_factory: Fábrica de sessões do banco (SessionLocal)
+        max_age_minutes: Idade máxima de uma sessão em produção
+        interval: Intervalo entre varreduras (s)
+        batch_size: Sessões por lote
+    """
+
+    BATCH_PAUSE = 0.01
+
+    def __init__(self, session_factory: Callable, max_age_minutes: float, interval: float = 60,
+                 batch_size: int = 500):
+        self.session_factory = session_factory
+        self.max_age_minutes = max_age_minutes
+        self.interval = interval
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()  # Uma varredura por vez (thread ou sweep_now)
+        self.stats = {'runs': 0, 'expired_total': 0, 'last_expired': 0, 'last_run_at': None,
+                      'last_elapsed_ms': 0.0, 'errors': 0, 'last_error': None}
+
+    @classmethod
+    def from_env(cls, session_factory: Callable) -> Optional["SessionSweeper"]:
+        max_age = _env_float('PORTAL_SESSION_EXPIRY_MIN', 0)
+        if max_age <= 0:
+            return None
+        return cls(
+            session_factory,
+            max_age_minutes=max_age,
+            interval=_env_float('PORTAL_SESSION_SWEEP_S', 60),
+            batch_size=max(_env_int('PORTAL_SESSION_SWEEP_BATCH', 500), 1),
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._worker, name="session-sweeper", daemon=True)
+        self._thread.start()
+        print(f"🧹 Expiração de sessões ativa (após {self.max_age_minutes:g} min, "
+              f"varredura a cada {self.interval:g} s)")
+
+    def stop(self, timeout: float = 5.0):
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _worker(self):
+        # Primeira varredura logo na subida: limpa o que acumulou com a API parada
+        while True:
+            self.sweep_now()
+            if self._stopping.wait(self.interval):
+                return
+
+    def sweep_now(self) -> int:
+        """Executa uma varredura completa e retorna quantas sessões expiraram"""
+        with self._lock:
+            start = time.perf_counter()
+            db = self.session_factory()
+            expired = 0
+            try:
+                expired = expire_sessions(db, self.max_age_minutes, self.batch_size, self.BATCH_PAUSE)
+            except Exception as e:
+                db.rollback()
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+                print(f"⚠️ Erro ao expirar sessões: {e}")
+            finally:
+                db.close()
+            self.stats['runs'] += 1
+            self.stats['expired_total'] += expired
+            self.stats['last_expired'] = expired
+            self.stats['last_run_at'] = brasilia_now()
+            self.stats['last_elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            if expired:
+                print(f"🧹 {expired} sessão(ões) em produção há mais de {self.max_age_minutes:g} min expirada(s)")
+            return expired
+
+    def snapshot(self) -> dict:
+        return {
+            'enabled': True,
+            'max_age_minutes': self.max_age_minutes,
+            'interval_s': self.interval,
+            'batch_size': self.batch_size,
+            **self.stats,
+        }
+
+
+def count_by_status(db: Session) -> dict:
+    """Quantidade de sessões por status"""
+    return dict(db.execute(
+        select(ProductionSession.status, func.count()).group_by(ProductionSession.status)
+    ).all())
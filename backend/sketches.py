@@ -0,0 +1,236 @@
+"""
+Percentis de duração por sketches mescláveis (estilo DDSketch).
+
+Cada dia guarda um sketch das durações das sessões finalizadas nele:
+contadores em faixas logarítmicas, com erro relativo limitado (1% por
+padrão) em qualquer quantil. Sketches são somas de contadores, então os
+percentis de um intervalo saem da mescla dos sketches diários, sem ler
+production_sessions; o custo depende do número de dias e de faixas
+(poucas centenas para durações de segundos a dias), não de sessões.
+
+Persistência (tabela duration_sketches, coluna BLOB):
+    cabeçalho '>BdQQddd' (versão, precisão, zeros, total, soma, mín, máx)
+    + pares (delta do índice zigzag, contagem) em varint, índices ordenados
+
+Reconstrução a partir das sessões existentes:
+    python sketches.py rebuild
+"""
+
+import math
+import struct
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models import DurationSketch, ProductionSession, BRASILIA_TZ
+
+DEFAULT_ACCURACY = 0.01
+MIN_INDEXABLE = 1e-3  # Durações abaixo disso (s) contam como zero
+
+HEADER = struct.Struct('>BdQQddd')
+VERSION = 1
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class DDSketch:
+    """
+    Sketch de quantis com erro relativo limitado
+
+    Args:
+        relative_accuracy: Erro relativo máximo dos quantis (0.01 = 1%)
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        """Valor representativo da faixa (erro relativo <= precisão)"""
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, weight: int = 1):
+        if value < MIN_INDEXABLE:
+            self.zero_count += weight
+        else:
+            index = self._index(value)
+            self.bins[index] = self.bins.get(index, 0) + weight
+        self.count += weight
+        self.sum += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "DDSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Sketches com precisões diferentes não podem ser mesclados")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.min, 0.0)
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                # Limitado a [min, max] observados
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def histogram(self, buckets: int = 20) -> List[dict]:
+        """Histograma em faixas logarítmicas entre o mínimo e o máximo observados"""
+        if not self.count:
+            return []
+        low = max(self.min, MIN_INDEXABLE)
+        high = max(self.max, low)
+        if high <= low:
+            return [{"start": self.min, "end": self.max, "count": self.count}]
+        ratio = (high / low) ** (1.0 / buckets)
+        edges = [low * ratio ** i for i in range(buckets)] + [high]
+        counts = [0] * buckets
+        counts[0] += self.zero_count
+        log_ratio = math.log(ratio)
+        for index, count in self.bins.items():
+            value = self._value(index)
+            position = int(math.log(value / low) / log_ratio) if value > low else 0
+            counts[min(position, buckets - 1)] += count
+        return [{"start": edges[i], "end": edges[i + 1], "count": counts[i]} for i in range(buckets)]
+
+    def to_bytes(self) -> bytes:
+        out = bytearray(HEADER.pack(VERSION, self.relative_accuracy, self.zero_count, self.count,
+                                    self.sum, self.min, self.max))
+        previous = 0
+        for index in sorted(self.bins):
+            delta = index - previous
+            _write_varint(out, (delta << 1) ^ (delta >> 63))  # zigzag
+            _write_varint(out, self.bins[index])
+            previous = index
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DDSketch":
+        version, accuracy, zero_count, count, total, low, high = HEADER.unpack_from(data)
+        if version != VERSION:
+            raise ValueError(f"Versão de sketch desconhecida: {version}")
+        sketch = cls(accuracy)
+        sketch.zero_count, sketch.count, sketch.sum, sketch.min, sketch.max = zero_count, count, total, low, high
+        pos, index = HEADER.size, 0
+        while pos < len(data):
+            encoded, pos = _read_varint(data, pos)
+            count, pos = _read_varint(data, pos)
+            index += (encoded >> 1) ^ -(encoded & 1)
+            sketch.bins[index] = count
+        return sketch
+
+
+def _day(dt: datetime) -> datetime:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(BRASILIA_TZ).replace(tzinfo=None)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def record_duration(db: Session, when: datetime, duration: Optional[float]):
+    """
+    Soma uma duração ao sketch do dia (chamar antes do commit que finaliza a sessão)
+
+    O upsert do contador vem antes da leitura do BLOB para que a transação
+    já detenha o lock de escrita do SQLite durante o ler-mesclar-gravar.
+    """
+    if duration is None:
+        return
+    day = _day(when)
+    table = DurationSketch.__table__
+    stmt = insert(table).values(day=day, count=1, sketch=b'')
+    db.execute(stmt.on_conflict_do_update(index_elements=[table.c.day],
+                                          set_={'count': table.c.count + 1}))
+    blob = db.execute(select(table.c.sketch).where(table.c.day == day)).scalar_one()
+    sketch = DDSketch.from_bytes(blob) if blob else DDSketch()
+    sketch.add(max(duration, 0.0))
+    db.execute(update(table).where(table.c.day == day).values(sketch=sketch.to_bytes()))
+
+
+def merged_sketch(db: Session, start: datetime, end: datetime) -> DDSketch:
+    """Mescla os sketches diários dos dias em [start, end)"""
+    table = DurationSketch.__table__
+    end_value = end.astimezone(BRASILIA_TZ).replace(tzinfo=None) if end.tzinfo else end
+    merged = DDSketch()
+    for blob, in db.execute(select(table.c.sketch).where(table.c.day >= _day(start), table.c.day < end_value)):
+        if blob:
+            merged.merge(DDSketch.from_bytes(blob))
+    return merged
+
+
+def rebuild(db: Session) -> int:
+    """Recalcula os sketches diários a partir das sessões finalizadas; retorna os dias gravados"""
+    sketches: Dict[datetime, DDSketch] = {}
+    rows = db.execute(
+        select(ProductionSession.antenna_2_time, ProductionSession.duration_seconds)
+        .where(ProductionSession.status == 'finalizado',
+               ProductionSession.antenna_2_time.isnot(None),
+               ProductionSession.duration_seconds.isnot(None))
+        .execution_options(yield_per=5000)
+    )
+    for when, duration in rows:
+        sketches.setdefault(_day(when), DDSketch()).add(max(duration, 0.0))
+
+    table = DurationSketch.__table__
+    db.execute(delete(table))
+    if sketches:
+        db.execute(insert(table), [
+            {"day": day, "count": sketch.count, "sketch": sketch.to_bytes()}
+            for day, sketch in sketches.items()
+        ])
+    db.commit()
+    return len(sketches)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2 or sys.argv[1] != 'rebuild':
+        print("Uso: python sketches.py rebuild")
+        sys.exit(1)
+
+    import models
+    models.init_db()
+    db = models.SessionLocal()
+    try:
+        print(f"✅ Sketches de duração reconstruídos: {rebuild(db)} dia(s)")
+    finally:
+        db.close()
@@ -0,0 +1,151 @@
+"""
+Arquivos do frontend (index.html, styles.css, app.js) servidos da memória.
+
+Na inicialização cada arquivo é lido uma vez, comprimido em gzip e recebe
+um ETag forte (hash do conteúdo). O index.html é reescrito para apontar
+para /static/<arquivo>?v=<hash>: como a URL muda quando o conteúdo muda,
+os arquivos versionados podem ser guardados pelo navegador por um ano
+(immutable), e só o index.html é revalidado a cada carregamento (304 via
+If-None-Match quando nada mudou).
+
+Os arquivos são reconferidos no disco (mtime/tamanho) no máximo a cada
+PORTAL_STATIC_CHECK_S segundos (padrão 2) e recarregados apenas se
+mudaram, então editar o frontend não exige reiniciar a API.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+# Arquivo -> tipo de conteúdo
+ASSETS = {
+    'index.html': 'text/html; charset=utf-8',
+    'styles.css': 'text/css; charset=utf-8',
+    'app.js': 'application/javascript; charset=utf-8',
+}
+INDEX = 'index.html'
+STATIC_PREFIX = '/static/'
+
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDATE = 'no-cache'
+MIN_GZIP_SIZE = 512
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class StaticAsset:
+    """Conteúdo de um arquivo em memória (original e gzip) com o ETag de cada um"""
+
+    __slots__ = ('media_type', 'body', 'gzip_body', 'version', 'etag', 'gzip_etag', 'stamp')
+
+    def __init__(self, media_type: str, body: bytes, stamp: tuple):
+        self.media_type = media_type
+        self.body = body
+        self.version = hashlib.sha256(body).hexdigest()[:16]
+        self.etag = f'"{self.version}"'
+        compressed = gzip.compress(body, compresslevel=9, mtime=0) if len(body) >= MIN_GZIP_SIZE else None
+        # Representações diferentes precisam de ETags fortes diferentes
+        self.gzip_body = compressed if compressed is not None and len(compressed) < len(body) else None
+        self.gzip_etag = f'"{self.version}-gz"'
+        self.stamp = stamp
+
+
+def _stamp(path: Path) -> Optional[tuple]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class AssetStore:
+    """
+    Cache dos arquivos do frontend com recarga quando mudam no disco
+
+    Args:
+        directory: Pasta do frontend
+        check_interval: Intervalo mínimo (s) entre verificações no disco
+    """
+
+    def __init__(self, directory: Path, check_interval: float = 2.0):
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self._assets: Dict[str, StaticAsset] = {}
+        self._stamps: Dict[str, Optional[tuple]] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, directory: Path) -> "AssetStore":
+        return cls(directory, check_interval=_env_float('PORTAL_STATIC_CHECK_S', 2.0))
+
+    def load(self):
+        """Lê e comprime todos os arquivos (chamado na inicialização e quando algo muda)"""
+        stamps = {name: _stamp(self.directory / name) for name in ASSETS}
+        assets = {}
+        for name, media_type in ASSETS.items():
+            if name == INDEX or stamps[name] is None:
+                continue
+            assets[name] = StaticAsset(media_type, (self.directory / name).read_bytes(), stamps[name])
+
+        if stamps[INDEX] is not None:
+            html = (self.directory / INDEX).read_text(encoding='utf-8')
+            for name, asset in assets.items():
+                url = f'{STATIC_PREFIX}{name}'
+                html = html.replace(f'"{url}"', f'"{url}?v={asset.version}"')
+            assets[INDEX] = StaticAsset(ASSETS[INDEX], html.encode('utf-8'), stamps[INDEX])
+
+        with self._lock:
+            self._assets = assets
+            self._stamps = stamps
+            self._checked_at = time.monotonic()
+        return assets
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        if any(_stamp(self.directory / name) != stamp for name, stamp in self._stamps.items()):
+            print("♻️ Arquivos do frontend alterados, recarregando cache")
+            self.load()
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        self._refresh()
+        return self._assets.get(name)
+
+    def response(self, request: Request, name: str) -> Optional[Response]:
+        """Resposta do arquivo (200 ou 304), ou None se ele não existir"""
+        asset = self.get(name)
+        if asset is None:
+            return None
+
+        use_gzip = asset.gzip_body is not None and 'gzip' in request.headers.get('accept-encoding', '')
+        etag = asset.gzip_etag if use_gzip else asset.etag
+        versioned = name != INDEX and request.query_params.get('v') == asset.version
+        headers = {
+            'ETag': etag,
+            'Cache-Control': CACHE_IMMUTABLE if versioned else CACHE_REVALIDATE,
+            'Vary': 'Accept-Encoding',
+        }
+
+        if_none_match = request.headers.get('if-none-match', '')
+        if if_none_match and any(tag.strip().removeprefix('W/') in (asset.etag, asset.gzip_etag)
+                                 for tag in if_none_match.split(',')):
+            return Response(status_code=304, headers=headers)
+
+        if use_gzip:
+            headers['Content-Encoding'] = 'gzip'
+            return Response(asset.gzip_body, media_type=asset.media_type, headers=headers)
+        return Response(asset.body, media_type=asset.media_type, headers=headers)
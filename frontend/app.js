@@ -8,6 +8,28 @@ let currentView = 'dashboard';
 let filteredSessions = [];
 let lastRejectedReadingId = 0; // Para rastrear novas leituras rejeitadas
 
+// Respostas guardadas por URL para GET condicional (If-None-Match / 304)
+const etagCache = new Map();
+
+// GET com ETag: se a API responder 304, devolve o corpo guardado como uma resposta 200
+async function fetchWithETag(url) {
+    const cached = etagCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    const response = await fetch(url, { headers, cache: 'no-store' });
+    
+    if (response.status === 304 && cached) {
+        return new Response(cached.body, { status: 200, headers: { 'Content-Type': 'application/json' } });
+    }
+    
+    const etag = response.headers.get('ETag');
+    if (!response.ok || !etag) {
+        return response;
+    }
+    const body = await response.text();
+    etagCache.set(url, { etag, body });
+    return new Response(body, { status: response.status, headers: response.headers });
+}
+
 // Funções de Notificação
 function showNotification(title, message, type = 'info') {
     const container = document.getElementById('notificationContainer');
@@ -105,6 +127,16 @@ function formatDuration(seconds) {
     }
 }
 
+const STATUS_LABELS = {
+    em_producao: '⚡ Em Produção',
+    finalizado: '✅ Finalizado',
+    expirado: '⌛ Expirado'
+};
+
+function formatStatus(status) {
+    return STATUS_LABELS[status] || status;
+}
+
 function calculateElapsedTime(startTime) {
     const start = new Date(startTime);
     const now = new Date();
@@ -138,7 +170,7 @@ function updateLastUpdateTime() {
 async function fetchDashboardStats() {
     try {
         console.log('📊 Buscando estatísticas do dashboard...');
-        const response = await fetch(`${API_URL}/stats`);
+        const response = await fetchWithETag(`${API_URL}/stats`);
         if (!response.ok) throw new Error('Erro ao buscar estatísticas');
         
         const stats = await response.json();
@@ -164,7 +196,7 @@ async function fetchDashboardStats() {
 // Buscar sessões ativas
 async function fetchActiveSessions() {
     try {
-        const response = await fetch(`${API_URL}/sessions/active`);
+        const response = await fetchWithETag(`${API_URL}/sessions/active`);
         if (!response.ok) throw new Error('Erro ao buscar sessões ativas');
         
         const sessions = await response.json();
@@ -196,7 +228,7 @@ async function fetchActiveSessions() {
 // Buscar histórico de sessões
 async function fetchSessionsHistory() {
     try {
-        const response = await fetch(`${API_URL}/sessions?limit=50`);
+        const response = await fetchWithETag(`${API_URL}/sessions?limit=50`);
         if (!response.ok) throw new Error('Erro ao buscar histórico');
         
         const sessions = await response.json();
@@ -213,7 +245,7 @@ async function fetchSessionsHistory() {
                     <td><strong>${formatDuration(session.duration_seconds)}</strong></td>
                     <td>
                         <span class="status-badge status-${session.status}">
-                            ${session.status === 'em_producao' ? '⚡ Em Produção' : '✅ Finalizado'}
+                            ${formatStatus(session.status)}
                         </span>
                     </td>
                 </tr>
@@ -227,7 +259,7 @@ async function fetchSessionsHistory() {
 // Buscar eventos recentes
 async function fetchRecentEvents() {
     try {
-        const response = await fetch(`${API_URL}/events/recent?limit=20`);
+        const response = await fetchWithETag(`${API_URL}/events/recent?limit=20`);
         if (!response.ok) throw new Error('Erro ao buscar eventos');
         
         const events = await response.json();
@@ -256,7 +288,7 @@ async function fetchRecentEvents() {
 // Monitorar leituras rejeitadas (etiquetas bloqueadas)
 async function checkRejectedReadings() {
     try {
-        const response = await fetch(`${API_URL}/rejected/recent?limit=10`);
+        const response = await fetchWithETag(`${API_URL}/rejected/recent?limit=10`);
         if (!response.ok) return;
         
         const rejected = await response.json();
@@ -307,7 +339,7 @@ async function loadAuditData() {
 // Buscar leituras rejeitadas para auditoria
 async function fetchRejectedReadings() {
     try {
-        const response = await fetch(`${API_URL}/rejected/recent?limit=100`);
+        const response = await fetchWithETag(`${API_URL}/rejected/recent?limit=100`);
         if (!response.ok) throw new Error('Erro ao buscar leituras rejeitadas');
         
         const rejected = await response.json();
@@ -345,7 +377,7 @@ async function fetchAuditSessions(filters = {}) {
     try {
         let url = `${API_URL}/sessions?limit=500`;
         
-        const response = await fetch(url);
+        const response = await fetchWithETag(url);
         if (!response.ok) throw new Error('Erro ao buscar sessões');
         
         let sessions = await response.json();
@@ -369,7 +401,7 @@ async function fetchAuditSessions(filters = {}) {
                     <td><strong>${formatDuration(session.duration_seconds)}</strong></td>
                     <td>
                         <span class="status-badge status-${session.status}">
-                            ${session.status === 'em_producao' ? '⚡ Em Produção' : '✅ Finalizado'}
+                            ${formatStatus(session.status)}
                         </span>
                     </td>
                 </tr>
@@ -444,12 +476,12 @@ function updateAuditSummary(sessions) {
 async function fetchAuditEvents() {
     try {
         // Buscar eventos aceitos
-        const eventsResponse = await fetch(`${API_URL}/events/recent?limit=100`);
+        const eventsResponse = await fetchWithETag(`${API_URL}/events/recent?limit=100`);
         if (!eventsResponse.ok) throw new Error('Erro ao buscar eventos');
         const events = await eventsResponse.json();
         
         // Buscar leituras rejeitadas
-        const rejectedResponse = await fetch(`${API_URL}/rejected/recent?limit=100`);
+        const rejectedResponse = await fetchWithETag(`${API_URL}/rejected/recent?limit=100`);
         const rejected = rejectedResponse.ok ? await rejectedResponse.json() : [];
         
         const container = document.getElementById('auditEvents');
@@ -675,14 +707,14 @@ async function loadConfigurationData() {
         await refreshDeviceInfo();
         
         // Carregar estatísticas do banco
-        const statsResponse = await fetch(`${API_URL}/stats`);
+        const statsResponse = await fetchWithETag(`${API_URL}/stats`);
         if (statsResponse.ok) {
             const stats = await statsResponse.json();
             document.getElementById('totalSessions').textContent = stats.total_sessions || 0;
         }
         
         // Carregar total de tags
-        const tagsResponse = await fetch(`${API_URL}/tags`);
+        const tagsResponse = await fetchWithETag(`${API_URL}/tags`);
         if (tagsResponse.ok) {
             const tags = await tagsResponse.json();
             document.getElementById('totalTags').textContent = tags.length || 0;
@@ -690,7 +722,7 @@ async function loadConfigurationData() {
         
         // Carregar configuração do backend (se houver)
         try {
-            const configResponse = await fetch(`${API_URL}/config`);
+            const configResponse = await fetchWithETag(`${API_URL}/config`);
             if (configResponse.ok) {
                 const config = await configResponse.json();
                 applyConfigToForm(config);
@@ -703,15 +735,33 @@ async function loadConfigurationData() {
     }
 }
 
+// Aguarda um job de dispositivo terminar (done, failed ou coalesced)
+async function waitForDeviceJob(jobId, timeoutMs = 35000) {
+    if (!jobId) return null;
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+        const response = await fetch(`${API_URL}/device/jobs/${jobId}`);
+        if (!response.ok) return null;
+        const job = await response.json();
+        if (job.status === 'coalesced') {
+            return waitForDeviceJob(job.merged_into, deadline - Date.now());
+        }
+        if (job.status === 'done' || job.status === 'failed') {
+            return job;
+        }
+        await new Promise(resolve => setTimeout(resolve, 500));
+    }
+    return null;
+}
+
 async function refreshDeviceInfo() {
     try {
-        // Sinalizar para o leitor atualizar
-        await fetch(`${API_URL}/device/refresh`, { method: 'POST' });
+        // Sinalizar para o leitor atualizar e aguardar a conclusão do job
+        const refreshResponse = await fetch(`${API_URL}/device/refresh`, { method: 'POST' });
+        const refresh = await refreshResponse.json();
+        await waitForDeviceJob(refresh.job_id);
         
-        // Aguardar um pouco e buscar as informações
-        await new Promise(resolve => setTimeout(resolve, 1500));
-        
-        const response = await fetch(`${API_URL}/device/info`);
+        const response = await fetchWithETag(`${API_URL}/device/info`);
         if (!response.ok) throw new Error('Erro ao buscar informações do dispositivo');
         
         const info = await response.json();
@@ -799,8 +849,12 @@ async function saveConfiguration() {
                 'success'
             );
             
-            // Aguardar e atualizar info do dispositivo para confirmar mudanças
-            setTimeout(() => refreshDeviceInfo(), 2000);
+            // Aguardar o leitor aplicar e atualizar info do dispositivo para confirmar mudanças
+            const job = await waitForDeviceJob(result.job_id);
+            if (job && job.status === 'failed') {
+                showNotification('⚠️ Configuração não aplicada', job.error || 'O leitor RFID não confirmou a aplicação', 'warning');
+            }
+            refreshDeviceInfo();
         } else {
             const error = await response.json();
             showNotification('❌ Erro ao Salvar', error.detail || 'Não foi possível salvar as configurações', 'error');
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark da janela cega do inventário durante comandos de controle.
+
+Executa get_reader_info() repetidamente com o inventário ativo no dispositivo
+emulado, no modo exclusivo (para/retoma inventário) e no modo multiplex,
+e mede o maior intervalo sem leituras de tag em torno de cada comando.
+
+Uso:
+    python bench_blind_window.py [--rounds 10] [--tag-rate 200]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'biblioteca'))
+
+from ur4_reader import UR4Reader
+from ur4_emulator import EmulatedUR4
+
+
+def run(multiplex: bool, rounds: int, tag_rate: float) -> dict:
+    reader = UR4Reader(port='emu', multiplex=multiplex,
+                       serial_factory=EmulatedUR4.factory(tag_rate=tag_rate))
+    reader.connect()
+
+    reads = []
+    thread = threading.Thread(
+        target=reader.read_continuous,
+        kwargs={'callback': lambda epc, ant, rssi: reads.append(time.perf_counter()),
+                'anti_spam_delay': 0.0, 'print_output': False},
+        daemon=True
+    )
+    thread.start()
+    time.sleep(0.3)
+
+    gaps = []
+    command_times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        info = reader.get_reader_info(refresh=True)
+        end = time.perf_counter()
+        command_times.append(end - start)
+        assert info['serial_number'], "sem resposta do dispositivo emulado"
+        time.sleep(0.2)
+        window = [t for t in reads if start - 0.05 <= t <= end + 0.15]
+        gaps.append(max(b - a for a, b in zip(window, window[1:])) if len(window) > 1 else end - start)
+
+    reader.disconnect()
+    thread.join(timeout=1)
+
+    return {
+        'mode': 'multiplex' if multiplex else 'exclusivo',
+        'max_gap_ms': max(gaps) * 1000,
+        'mean_gap_ms': sum(gaps) / len(gaps) * 1000,
+        'mean_command_ms': sum(command_times) / len(command_times) * 1000,
+        'blind': reader.get_blind_window_stats(),
+        'reads': len(reads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da janela cega do inventário')
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--tag-rate', type=float, default=200.0, help='Frames de tag por segundo')
+    args = parser.parse_args()
+
+    print(f"{'Modo':<12} | {'Maior lacuna (ms)':>18} | {'Lacuna média (ms)':>18} | "
+          f"{'get_reader_info (ms)':>20} | {'Janela cega total (ms)':>22}")
+    print("-" * 102)
+    for multiplex in (False, True):
+        r = run(multiplex, args.rounds, args.tag_rate)
+        print(f"{r['mode']:<12} | {r['max_gap_ms']:>18.1f} | {r['mean_gap_ms']:>18.1f} | "
+              f"{r['mean_command_ms']:>20.1f} | {r['blind']['total_ms']:>22.1f}")
+
+
+if __name__ == '__main__':
+    main()
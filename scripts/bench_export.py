@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark da exportação em massa (GET /api/export/{tipo}).
+
+Popula um banco SQLite temporário com N eventos e mede a vazão de
+exporter.iter_export em CSV e NDJSON, e o pico de memória do processo.
+
+Uso:
+    python bench_export.py [--rows 10000000] [--db /tmp/bench_export.db]
+"""
+
+import argparse
+import os
+import random
+import resource
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, epoch_ms
+import exporter
+
+
+def seed(path: str, rows: int):
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    start = datetime(2025, 1, 1)
+    start_ms = epoch_ms(start)
+    batch = 100_000
+    for offset in range(0, rows, batch):
+        conn.executemany(
+            "INSERT INTO rfid_events (tag_id, antenna_number, event_time, session_id, event_ms) VALUES (?, ?, ?, ?, ?)",
+            ((f"E2801160600002{random.randrange(50000):010X}", 1 + i % 2,
+              (start + timedelta(seconds=i * 3)).strftime('%Y-%m-%d %H:%M:%S.%f'), i // 2, start_ms + i * 3000)
+             for i in range(offset, min(offset + batch, rows)))
+        )
+        conn.commit()
+    conn.close()
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da exportação em massa')
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--db', default='/tmp/bench_export.db')
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    t0 = time.perf_counter()
+    seed(args.db, args.rows)
+    print(f"📦 {args.rows:,} eventos gerados em {time.perf_counter() - t0:.1f}s "
+          f"({os.path.getsize(args.db) / 1e6:.0f} MB)")
+
+    SessionFactory = sessionmaker(bind=create_engine(f'sqlite:///{args.db}'))
+    print(f"{'Formato':<8} | {'Tempo (s)':>9} | {'Linhas/s':>10} | {'MB/s':>6} | {'Saída (MB)':>10} | {'RSS máx (MB)':>12}")
+    print("-" * 72)
+    for fmt in ('csv', 'ndjson'):
+        size = 0
+        t0 = time.perf_counter()
+        for chunk in exporter.iter_export(SessionFactory, 'events', fmt):
+            size += len(chunk)
+        elapsed = time.perf_counter() - t0
+        print(f"{fmt:<8} | {elapsed:>9.1f} | {args.rows / elapsed:>10,.0f} | {size / 1e6 / elapsed:>6.1f} | "
+              f"{size / 1e6:>10.0f} | {max_rss_mb():>12.0f}")
+
+    os.remove(args.db)
+
+
+if __name__ == '__main__':
+    main()
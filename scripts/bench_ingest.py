@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ingestão em POST /api/rfid/event com e sem o buffer de auditoria.
+
+Usa um banco SQLite temporário em disco (commit com fsync real) e um fluxo
+parecido com o do portal: para cada tag, leituras repetidas na antena 1
+(a tag parada no posto), a saída na antena 2, leituras bloqueadas e, a
+cada 10 tags, uma leitura inválida. Compara requisições/s e commits no modo síncrono e com o buffer.
+
+Uso:
+    python bench_ingest.py [--tags 300] [--clients 4] [--flush-ms 50]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+import main
+from audit_writer import AuditWriter
+from models import Base, RFIDEvent, RejectedReading
+
+
+def workload(tags: int) -> list:
+    requests_ = []
+    for i in range(tags):
+        tag = f"E2801160600002{i:010X}"
+        requests_ += [(tag, 1)] * 6 + [(tag, 2), (tag, 1), (tag, 1)]
+        if i % 10 == 0:
+            requests_.append((tag[:20], 1))
+    return requests_
+
+
+def run(buffered: bool, tags: int, clients: int, flush_ms: int, directory: str) -> dict:
+    path = os.path.join(directory, f"ingest_{'buffer' if buffered else 'sync'}.db")
+    engine = create_engine(f'sqlite:///{path}', connect_args={'timeout': 30})
+    Base.metadata.create_all(engine)
+    main.SessionLocal = sessionmaker(bind=engine)
+
+    main.audit_writer = AuditWriter(main.SessionLocal, flush_ms=flush_ms) if buffered else None
+    if buffered:
+        main.audit_writer.start()
+
+    client = TestClient(main.app)
+    items = workload(tags)
+    by_tag = {}
+    for tag, antenna in items:
+        by_tag.setdefault(tag[:20], []).append((tag, antenna))
+    sequences = list(by_tag.values())
+
+    def post_sequence(sequence):
+        for tag, antenna in sequence:  # Ordem por tag preservada, tags em paralelo
+            client.post('/api/rfid/event', json={'tag_id': tag, 'antenna_number': antenna})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(post_sequence, sequences))
+    accepted = time.perf_counter() - start
+    audit_commits = 0
+    if buffered:
+        main.audit_writer.stop()
+        audit_commits = main.audit_writer.stats['commits']
+    elapsed = time.perf_counter() - start
+
+    with main.SessionLocal() as db:
+        events = db.execute(select(func.count()).select_from(RFIDEvent)).scalar_one()
+        rejected = db.execute(select(func.count()).select_from(RejectedReading)).scalar_one()
+    engine.dispose()
+    return {'mode': 'buffer' if buffered else 'síncrono', 'requests': len(items), 'accepted_s': accepted,
+            'elapsed_s': elapsed, 'audit_commits': audit_commits, 'events': events, 'rejected': rejected}
+
+
+def main_():
+    parser = argparse.ArgumentParser(description='Benchmark de ingestão com e sem buffer de auditoria')
+    parser.add_argument('--tags', type=int, default=300)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--flush-ms', type=int, default=50)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bench_ingest_', dir=os.path.join(os.path.dirname(__file__), '..', 'database'))
+    try:
+        print(f"{'Modo':<9} | {'Requisições':>11} | {'req/s':>7} | {'ms/req':>6} | {'Commits do buffer':>17} | "
+              f"{'Eventos':>7} | {'Rejeitadas':>10}")
+        print("-" * 87)
+        for buffered in (False, True):
+            r = run(buffered, args.tags, args.clients, args.flush_ms, directory)
+            print(f"{r['mode']:<9} | {r['requests']:>11} | {r['requests'] / r['accepted_s']:>7.0f} | "
+                  f"{r['accepted_s'] / r['requests'] * 1000 * args.clients:>6.1f} | {r['audit_commits']:>17} | "
+                  f"{r['events']:>7} | {r['rejected']:>10}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main_()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark das listagens JSON (/api/sessions, /api/sessions/active,
+/api/events/recent, /api/rejected/recent).
+
+Compara o caminho anterior (objetos ORM validados pelo modelo Pydantic ou
+dicts pelo jsonable_encoder) com o caminho rápido (tuplas de colunas +
+fastjson, com orjson e com o json da biblioteca padrão) e confere que os
+bytes gerados são idênticos.
+
+Uso:
+    python bench_list_json.py [--sessions 20000] [--repeat 30]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from starlette.responses import Response
+
+import fastjson
+import main
+from main import ProductionSessionResponse
+from models import Base, ProductionSession, RFIDEvent, RejectedReading, epoch_ms
+
+LIMITS = (500, 5000)
+
+
+def seed(engine, sessions: int):
+    start = datetime(2026, 1, 5, 7, 0)
+    session_rows, event_rows, rejected_rows = [], [], []
+    for i in range(sessions):
+        tag = f"E2801160600002{i:010X}"
+        t1 = start + timedelta(seconds=i * 7, microseconds=0 if i % 5 == 0 else random.randrange(1_000_000))
+        active = i % 50 == 0
+        t2 = None if active else t1 + timedelta(milliseconds=random.randrange(5_000, 900_000))
+        session_rows.append({
+            "tag_id": tag, "antenna_1_time": t1, "antenna_2_time": t2,
+            "duration_seconds": None if active else (epoch_ms(t2) - epoch_ms(t1)) / 1000,
+            "status": 'em_producao' if active else 'finalizado', "created_at": t1, "updated_at": t2 or t1,
+            "antenna_1_ms": epoch_ms(t1), "antenna_2_ms": epoch_ms(t2), "created_ms": epoch_ms(t1),
+        })
+        event_rows.append({"tag_id": tag, "antenna_number": 1, "event_time": t1, "session_id": i + 1,
+                           "event_ms": epoch_ms(t1)})
+        if t2:
+            event_rows.append({"tag_id": tag, "antenna_number": 2, "event_time": t2, "session_id": i + 1,
+                               "event_ms": epoch_ms(t2)})
+        if i % 3 == 0:
+            rejected_rows.append({"tag_id": tag, "antenna_number": 1, "event_time": t1,
+                                  "reason": f"Etiqueta já foi produzida em {t1:%d/%m/%Y %H:%M:%S}",
+                                  "reason_type": 'blocked', "event_ms": epoch_ms(t1)})
+    with engine.begin() as conn:
+        conn.execute(insert(ProductionSession.__table__), session_rows)
+        conn.execute(insert(RFIDEvent.__table__), event_rows)
+        conn.execute(insert(RejectedReading.__table__), rejected_rows)
+
+
+# --- Caminho anterior (como o FastAPI serializava antes) ---
+
+_sessions_adapter = TypeAdapter(List[ProductionSessionResponse])
+
+
+def legacy_sessions(db, limit: int) -> bytes:
+    sessions = db.query(ProductionSession).order_by(ProductionSession.created_ms.desc()).limit(limit).all()
+    return _sessions_adapter.dump_json(_sessions_adapter.validate_python(sessions, from_attributes=True))
+
+
+def legacy_active(db, limit: int) -> bytes:
+    sessions = db.query(ProductionSession).filter(ProductionSession.status == 'em_producao') \
+        .order_by(ProductionSession.created_ms.desc()).all()
+    return _sessions_adapter.dump_json(_sessions_adapter.validate_python(sessions, from_attributes=True))
+
+
+def legacy_events(db, limit: int) -> bytes:
+    events = db.query(RFIDEvent).order_by(RFIDEvent.event_ms.desc()).limit(limit).all()
+    return JSONResponse(jsonable_encoder([{
+        "id": e.id, "tag_id": e.tag_id, "antenna_number": e.antenna_number,
+        "event_time": e.event_time, "session_id": e.session_id
+    } for e in events])).body
+
+
+def legacy_rejected(db, limit: int) -> bytes:
+    rejected = db.query(RejectedReading).order_by(RejectedReading.event_ms.desc()).limit(limit).all()
+    return JSONResponse(jsonable_encoder([{
+        "id": r.id, "tag_id": r.tag_id, "antenna_number": r.antenna_number, "event_time": r.event_time,
+        "reason": r.reason, "reason_type": r.reason_type
+    } for r in rejected])).body
+
+
+# --- Caminho rápido (endpoints atuais) ---
+
+_loop = asyncio.new_event_loop()
+
+
+def fast(endpoint, params):
+    def call(db, limit: int) -> bytes:
+        return _loop.run_until_complete(endpoint(db=db, response=Response(), **params(limit))).body
+    return call
+
+
+CASES = [
+    ('/api/sessions', legacy_sessions, fast(main.get_sessions, lambda n: {'status': None, 'limit': n})),
+    ('/api/sessions/active', legacy_active, fast(main.get_active_sessions, lambda n: {})),
+    ('/api/events/recent', legacy_events, fast(main.get_recent_events, lambda n: {'limit': n})),
+    ('/api/rejected/recent', legacy_rejected, fast(main.get_rejected_readings, lambda n: {'limit': n})),
+]
+
+
+def timed(func, db, limit: int, repeat: int):
+    func(db, limit)  # aquecimento
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = func(db, limit)
+        db.expunge_all()
+    return (time.perf_counter() - start) / repeat * 1000, body
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description='Benchmark das listagens JSON')
+    parser.add_argument('--sessions', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bench_list_')
+    try:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'list.db')}")
+        Base.metadata.create_all(engine)
+        seed(engine, args.sessions)
+        db = sessionmaker(bind=engine)()
+
+        orjson_module = fastjson.orjson
+        print(f"{'Endpoint':<22} | {'limit':>5} | {'anterior (ms)':>13} | {'orjson (ms)':>11} | "
+              f"{'json (ms)':>9} | {'bytes':>9} | idêntico")
+        print("-" * 92)
+        for path, legacy, new in CASES:
+            for limit in LIMITS:
+                old_ms, old_body = timed(legacy, db, limit, args.repeat)
+                results = {}
+                for module in ((orjson_module, None) if orjson_module is not None else (None,)):
+                    fastjson.orjson = module
+                    results[module is not None] = timed(new, db, limit, args.repeat)
+                fastjson.orjson = orjson_module
+                same = all(body == old_body for _, body in results.values())
+                orjson_ms = f"{results[True][0]:>11.2f}" if True in results else f"{'-':>11}"
+                print(f"{path:<22} | {limit:>5} | {old_ms:>13.2f} | {orjson_ms} | {results[False][0]:>9.2f} | "
+                      f"{len(old_body):>9,} | {'sim' if same else 'NÃO'}")
+        db.close()
+        engine.dispose()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main_bench()
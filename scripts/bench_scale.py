@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escala: latência de todos os endpoints conforme o banco cresce.
+
+Cresce um banco sintético (seed_scale.py) passo a passo e, em cada passo,
+mede no processo (TestClient, sem rede) a latência de todos os GET de
+backend/main.py, descobertos nas rotas do app, e do POST /api/rfid/event
+nos três caminhos da ingestão (início, fim e etiqueta já produzida). As
+requisições vão sem If-None-Match, ou seja, sempre pelo caminho que
+consulta o banco.
+
+Ao final imprime a curva (mediana por passo) de cada endpoint e aponta
+qual passa primeiro do limite de p95, o primeiro a quebrar quando o banco
+crescer.
+
+Uso:
+    python bench_scale.py [--steps 10000,100000,1000000] [--repeat 20]
+        [--threshold-ms 200] [--db /tmp/bench_scale.db] [--keep]
+
+Cada passo é o total de sessões; eventos e rejeições seguem as médias do
+seed_scale.py (--events-per-session, --rejected-per-session).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+DEFAULT_DB = '/tmp/bench_scale.db'
+
+# Parâmetros usados pelo frontend (ou o caso pesado típico) por rota
+QUERIES = {
+    '/api/sessions': 'limit=500',
+    '/api/events/recent': 'limit=50',
+    '/api/rejected/recent': 'limit=100',
+    '/api/stats/rollup': 'granularity=hour',
+}
+# Rotas com parâmetro no caminho: valores medidos (ausente = rota ignorada)
+PATH_SAMPLES = {
+    '/api/export/{kind}': ['sessions', 'events', 'rejected'],
+}
+# Exportações medidas só no último dia (a completa é o bench_export.py)
+EXPORT_WINDOW_DAYS = 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Latência dos endpoints conforme o banco cresce')
+    parser.add_argument('--steps', default='10000,100000,1000000', help='Totais de sessões, separados por vírgula')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--threshold-ms', type=float, default=200.0, help='p95 considerado quebra')
+    parser.add_argument('--db', default=DEFAULT_DB)
+    parser.add_argument('--keep', action='store_true', help='Mantém o banco ao final')
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--events-per-session', type=float, default=8)
+    parser.add_argument('--rejected-per-session', type=float, default=2)
+    return parser.parse_args()
+
+
+def endpoints(app, export_from: str) -> list:
+    """(rótulo, url) de todos os GET do app"""
+    from fastapi.routing import APIRoute
+
+    seen, result = set(), []
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or 'GET' not in route.methods or route.path in seen:
+            continue
+        seen.add(route.path)
+        if '{' in route.path:
+            for value in PATH_SAMPLES.get(route.path, []):
+                path = route.path.replace(route.path[route.path.index('{'):route.path.index('}') + 1], value)
+                result.append((f"GET {path}", f"{path}?from={export_from}"))
+            continue
+        query = QUERIES.get(route.path)
+        result.append((f"GET {route.path}" + (f"?{query}" if query else ''),
+                       route.path + (f"?{query}" if query else '')))
+    return result
+
+
+class IngestProbe:
+    """Gera leituras novas para medir os três caminhos de register_rfid_event"""
+
+    def __init__(self):
+        self.counter = 0
+        self.started = []   # Etiquetas com sessão aberta (para o fim)
+        self.finished = []  # Etiquetas produzidas (para a rejeição)
+
+    def next_tag(self) -> str:
+        self.counter += 1
+        return f"BE7C4{time.time_ns() % 10 ** 9:09d}{self.counter:010d}"
+
+    def requests(self, kind: str):
+        if kind == 'inicio':
+            tag = self.next_tag()
+            self.started.append(tag)
+            return {'tag_id': tag, 'antenna_number': 1}
+        if kind == 'fim':
+            tag = self.started.pop(0)
+            self.finished.append(tag)
+            return {'tag_id': tag, 'antenna_number': 2}
+        return {'tag_id': self.finished[-1], 'antenna_number': 1}
+
+
+def measure(call, repeat: int) -> list:
+    call()  # Aquecimento (planos de consulta, caches do SQLite)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def summary(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {'p50': statistics.median(ordered), 'p95': ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)],
+            'max': ordered[-1]}
+
+
+def main():
+    args = parse_args()
+    steps = sorted(int(step) for step in args.steps.split(','))
+
+    # O app lê o banco de PORTAL_DATABASE na importação; sem threads de fundo durante a medição
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    open(args.db, 'wb').close()
+    os.environ['PORTAL_DATABASE'] = args.db
+    os.environ['PORTAL_SESSION_EXPIRY_MIN'] = '0'
+    os.environ['PORTAL_LOOP_MONITOR'] = '0'
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+    sys.path.insert(0, os.path.dirname(__file__))
+
+    from fastapi.testclient import TestClient
+
+    import main as api
+    from models import brasilia_now
+    from seed_scale import Seeder
+
+    seeder = Seeder(args.db, args.years, args.events_per_session, args.rejected_per_session)
+    export_from = (brasilia_now().replace(tzinfo=None) - timedelta(days=EXPORT_WINDOW_DAYS)).isoformat()
+    targets = endpoints(api.app, export_from)
+    probe = IngestProbe()
+    curves = {}  # rótulo -> [resumo por passo]
+    sizes = []
+
+    try:
+        with TestClient(api.app) as client:
+            for step in steps:
+                total = seeder.counts()['production_sessions']
+                if step > total:
+                    print(f"📦 Gerando até {step:,} sessões...")
+                    seeder.add(step - total)
+                    seeder.rebuild_aggregates()
+                counts = seeder.counts()
+                sizes.append((step, counts, os.path.getsize(args.db)))
+                print(f"\n=== {counts['production_sessions']:,} sessões, {counts['rfid_events']:,} eventos, "
+                      f"{counts['rejected_readings']:,} rejeições ({os.path.getsize(args.db) / 1e6:,.0f} MB) ===")
+                print(f"{'Endpoint':<52} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'máx (ms)':>9}")
+                print("-" * 88)
+
+                rows = []
+                for label, url in targets:
+                    def call(url=url):
+                        response = client.get(url)
+                        response.read()
+                        if response.status_code >= 500:
+                            raise RuntimeError(f"{url}: HTTP {response.status_code}")
+                    rows.append((label, summary(measure(call, args.repeat))))
+                for kind in ('inicio', 'fim', 'bloqueada'):
+                    def call(kind=kind):
+                        client.post('/api/rfid/event', json=probe.requests(kind)).raise_for_status()
+                    rows.append((f"POST /api/rfid/event ({kind})", summary(measure(call, args.repeat))))
+
+                for label, result in rows:
+                    curves.setdefault(label, []).append(result)
+                    flag = ' ⚠️' if result['p95'] > args.threshold_ms else ''
+                    print(f"{label:<52} | {result['p50']:>9.1f} | {result['p95']:>9.1f} | {result['max']:>9.1f}{flag}")
+    finally:
+        if not args.keep:
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(args.db + suffix):
+                    os.remove(args.db + suffix)
+
+    print("\n=== Curva de latência (p50 em ms por total de sessões) ===")
+    header = ''.join(f" | {step:>11,}" for step, _, _ in sizes)
+    print(f"{'Endpoint':<52}{header} | {'crescimento':>11}")
+    print("-" * (52 + 14 * len(sizes) + 14))
+    broken = []
+    for label, results in sorted(curves.items(), key=lambda item: -item[1][-1]['p50']):
+        growth = results[-1]['p50'] / results[0]['p50'] if results[0]['p50'] else 0
+        print(f"{label:<52}" + ''.join(f" | {r['p50']:>11.1f}" for r in results) + f" | {growth:>10.1f}x")
+        for (step, _, _), result in zip(sizes, results):
+            if result['p95'] > args.threshold_ms:
+                broken.append((step, -result['p95'], label))
+                break
+
+    print()
+    if broken:
+        broken.sort()
+        step, p95, label = broken[0]
+        print(f"🔥 Primeiro a quebrar: {label} (p95 {-p95:.0f} ms com {step:,} sessões, limite {args.threshold_ms:g} ms)")
+        for step, p95, label in broken[1:]:
+            print(f"   depois: {label} (p95 {-p95:.0f} ms com {step:,} sessões)")
+    else:
+        print(f"✅ Nenhum endpoint passou de {args.threshold_ms:g} ms de p95")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização: API + leitor subindo juntos (como no boot).
+
+Inicia o uvicorn (banco temporário, porta livre) e o rfid_reader.py com o
+UR4 emulado ao mesmo tempo e mede, a partir do disparo dos processos:
+
+  - API pronta: primeiro /health respondendo "healthy"
+  - Inventário: leitor imprimiu "Portal ATIVO" (conectado e API pronta)
+  - Primeiro evento: primeira leitura aceita pela API (tempo até o primeiro
+    evento aceito, o que importa para não perder peças no início do turno)
+
+Uso:
+    python bench_startup.py [--runs 5]
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, 'backend')
+SCRIPTS_DIR = os.path.join(ROOT, 'scripts')
+TIMEOUT = 60
+
+READER_MARKERS = {
+    'inventory': 'Portal ATIVO',
+    'first_event': 'Enviado com sucesso',
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def watch_output(proc, start: float, marks: dict):
+    """Registra quando cada marcador aparece na saída do leitor"""
+    for raw in proc.stdout:
+        line = raw.decode('utf-8', 'replace')
+        for name, marker in READER_MARKERS.items():
+            if name not in marks and marker in line:
+                marks[name] = time.perf_counter() - start
+
+
+def run_once(directory: str) -> dict:
+    port = free_port()
+    database = os.path.join(directory, f'startup_{port}.db')
+    open(database, 'wb').close()
+    env = dict(os.environ, PORTAL_DATABASE=database, PORTAL_API_HOST='127.0.0.1',
+               PORTAL_API_PORT=str(port), PYTHONUNBUFFERED='1')
+
+    start = time.perf_counter()
+    api = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1',
+                            '--port', str(port), '--log-level', 'warning'],
+                           cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    reader = subprocess.Popen([sys.executable, 'rfid_reader.py', '--emulate'],
+                              cwd=SCRIPTS_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    marks = {}
+    threading.Thread(target=watch_output, args=(reader, start, marks), daemon=True).start()
+
+    try:
+        health = f'http://127.0.0.1:{port}/health'
+        while 'api' not in marks and time.perf_counter() - start < TIMEOUT:
+            try:
+                if requests.get(health, timeout=1).json().get('status') == 'healthy':
+                    marks['api'] = time.perf_counter() - start
+                    break
+            except (requests.exceptions.RequestException, ValueError):
+                pass
+            time.sleep(0.01)
+        while 'first_event' not in marks and time.perf_counter() - start < TIMEOUT:
+            time.sleep(0.01)
+    finally:
+        for proc in (reader, api):
+            proc.terminate()
+        for proc in (reader, api):
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de inicialização da API e do leitor')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bench_startup_')
+    results = []
+    try:
+        for i in range(args.runs):
+            marks = run_once(directory)
+            results.append(marks)
+            print(f"Execução {i + 1}: " + ", ".join(
+                f"{name} {marks[name] * 1000:.0f} ms" if name in marks else f"{name} -"
+                for name in ('api', 'inventory', 'first_event')))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print()
+    print(f"{'Etapa':<34} | {'mediana (ms)':>12} | {'máx (ms)':>9}")
+    print("-" * 62)
+    labels = {'api': 'API pronta (/health)', 'inventory': 'Inventário iniciado',
+              'first_event': 'Primeiro evento aceito'}
+    for name, label in labels.items():
+        values = [marks[name] * 1000 for marks in results if name in marks]
+        if values:
+            print(f"{label:<34} | {statistics.median(values):>12.0f} | {max(values):>9.0f}")
+        else:
+            print(f"{label:<34} | {'-':>12} | {'-':>9}")
+
+
+if __name__ == '__main__':
+    main()
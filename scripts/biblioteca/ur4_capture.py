@@ -0,0 +1,303 @@
+"""
+UR4 Capture
+===========
+
+Captura binária do tráfego serial do UR4 e transporte de replay.
+
+`SerialCapture` envolve a porta serial e grava cada bloco recebido (e cada
+comando enviado) com timestamp monotônico. `ReplaySerial` reproduz uma
+captura com a mesma interface de `serial.Serial`, em tempo real (1×),
+acelerada (N×) ou na velocidade máxima, sem o hardware conectado.
+
+Formato do arquivo (big-endian):
+    Cabeçalho:  'UR4CAP' + versão(2) + início em epoch(8, double)
+    Registro R: tipo(1) + t_us(8) + tamanho(2) + bytes recebidos
+    Registro W: tipo(1) + t_us(8) + tamanho(2) + bytes enviados
+    Registro I: tipo(1) + 'IDX\\0' + t_us(8) + total de bytes recebidos(8)
+Registros de índice são marcadores gravados em linha, a cada intervalo,
+entre os registros de dados: resumem duração e volume sem decodificar os
+dados, mas não formam um índice navegável (a leitura é sempre sequencial).
+
+Sem `loop`, `ReplaySerial` levanta `EndOfCapture` quando a captura acaba e
+todos os bytes foram lidos; `UR4Reader.read_continuous` trata isso como o
+fim da leitura, então execuções guiadas por replay terminam sozinhas.
+
+Uso:
+    reader = UR4Reader(port='/dev/ttyUSB0', capture_path='turno.ur4cap')
+    reader = UR4Reader(port='turno.ur4cap', serial_factory=ReplaySerial.factory(speed=10))
+
+CLI:
+    python ur4_capture.py info turno.ur4cap
+"""
+
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+MAGIC = b'UR4CAP'
+VERSION = 1
+FILE_HEADER = struct.Struct('>6sHd')
+CHUNK = struct.Struct('>cQH')          # tipo, t_us, tamanho
+INDEX = struct.Struct('>c4sQQ')        # tipo, marcador, t_us, total recebido
+INDEX_MARKER = b'IDX\x00'
+
+RECORD_RX = b'R'
+RECORD_TX = b'W'
+RECORD_INDEX = b'I'
+
+MAX_CHUNK = 0xFFFF
+
+
+class EndOfCapture(EOFError):
+    """Replay sem loop chegou ao fim da captura"""
+
+
+class CaptureRecord(NamedTuple):
+    kind: bytes
+    t_us: int
+    data: bytes
+
+
+class CaptureWriter:
+    """
+    Grava registros de captura em arquivo
+
+    Args:
+        path: Arquivo de saída
+        index_interval: Intervalo (segundos) entre registros de índice
+    """
+
+    def __init__(self, path: str, index_interval: float = 1.0):
+        self.path = path
+        self.index_interval = index_interval
+        self._file = open(path, 'wb', buffering=64 * 1024)
+        self._file.write(FILE_HEADER.pack(MAGIC, VERSION, time.time()))
+        self._t0 = time.monotonic()
+        self._next_index_us = 0
+        self._rx_total = 0
+        self._lock = threading.Lock()
+
+    def _now_us(self) -> int:
+        return int((time.monotonic() - self._t0) * 1_000_000)
+
+    def _write(self, kind: bytes, data: bytes):
+        with self._lock:
+            if self._file.closed:
+                return
+            t_us = self._now_us()
+            if t_us >= self._next_index_us:
+                self._file.write(INDEX.pack(RECORD_INDEX, INDEX_MARKER, t_us, self._rx_total))
+                self._next_index_us = t_us + int(self.index_interval * 1_000_000)
+            for start in range(0, len(data), MAX_CHUNK):
+                part = data[start:start + MAX_CHUNK]
+                self._file.write(CHUNK.pack(kind, t_us, len(part)))
+                self._file.write(part)
+            if kind == RECORD_RX:
+                self._rx_total += len(data)
+
+    def record_rx(self, data: bytes):
+        if data:
+            self._write(RECORD_RX, data)
+
+    def record_tx(self, data: bytes):
+        if data:
+            self._write(RECORD_TX, data)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(INDEX.pack(RECORD_INDEX, INDEX_MARKER, self._now_us(), self._rx_total))
+                self._file.close()
+
+
+def read_capture(path: str) -> Tuple[float, Iterator[CaptureRecord]]:
+    """
+    Abre uma captura
+
+    Returns:
+        (início em epoch, iterador de registros)
+
+    Raises:
+        ValueError: arquivo não é uma captura UR4
+    """
+    f = open(path, 'rb')
+    header = f.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size:
+        f.close()
+        raise ValueError(f"Captura inválida: {path}")
+    magic, version, started = FILE_HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        f.close()
+        raise ValueError(f"Captura inválida: {path}")
+
+    def records():
+        with f:
+            while True:
+                kind = f.read(1)
+                if not kind:
+                    return
+                if kind == RECORD_INDEX:
+                    rest = f.read(INDEX.size - 1)
+                    if len(rest) < INDEX.size - 1:
+                        return
+                    _, marker, t_us, rx_total = INDEX.unpack(kind + rest)
+                    if marker != INDEX_MARKER:
+                        return
+                    yield CaptureRecord(kind, t_us, rx_total.to_bytes(8, 'big'))
+                    continue
+                rest = f.read(CHUNK.size - 1)
+                if len(rest) < CHUNK.size - 1:
+                    return  # Captura truncada (ex: queda de energia)
+                _, t_us, size = CHUNK.unpack(kind + rest)
+                data = f.read(size)
+                if len(data) < size:
+                    return
+                yield CaptureRecord(kind, t_us, data)
+
+    return started, records()
+
+
+class SerialCapture:
+    """Proxy da porta serial que grava tudo que é lido e escrito"""
+
+    def __init__(self, ser, writer: CaptureWriter):
+        self._ser = ser
+        self.writer = writer
+
+    def read(self, size: int = 1) -> bytes:
+        data = self._ser.read(size)
+        self.writer.record_rx(data)
+        return data
+
+    def write(self, data: bytes) -> int:
+        self.writer.record_tx(bytes(data))
+        return self._ser.write(data)
+
+    def close(self):
+        try:
+            self._ser.close()
+        finally:
+            self.writer.close()
+
+    def __getattr__(self, name):
+        return getattr(self._ser, name)
+
+
+class ReplaySerial:
+    """
+    Porta serial que reproduz uma captura
+
+    Args:
+        port: Caminho do arquivo de captura
+        speed: 1.0 = tempo real, N = N vezes mais rápido, 0 = velocidade máxima
+        loop: Recomeça a captura ao chegar no fim
+
+    O relógio do replay começa na primeira leitura. `reset_input_buffer` não
+    descarta nada, pois a captura contém apenas o que o leitor efetivamente leu.
+    Sem `loop`, `in_waiting` e `read` levantam `EndOfCapture` depois que o
+    último byte da captura foi entregue.
+    """
+
+    def __init__(self, port: str, speed: float = 1.0, loop: bool = False, **kwargs):
+        self.port = port
+        self.speed = speed
+        self.loop = loop
+        self.is_open = True
+        self.bytes_written = 0
+        self._chunks: List[Tuple[int, bytes]] = []
+        self._load()
+        self._pos = 0
+        self._rx = bytearray()
+        self._t0: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, **options):
+        """Retorna uma fábrica compatível com UR4Reader(serial_factory=...)"""
+        def _factory(port: str, **serial_kwargs):
+            return cls(port, **options)
+        return _factory
+
+    def _load(self):
+        _, records = read_capture(self.port)
+        self._chunks = [(r.t_us, r.data) for r in records if r.kind == RECORD_RX]
+
+    @property
+    def exhausted(self) -> bool:
+        return self._pos >= len(self._chunks) and not self._rx
+
+    def _pump(self):
+        if self._t0 is None:
+            self._t0 = time.monotonic()
+        if self.speed and self.speed > 0:
+            limit_us = (time.monotonic() - self._t0) * 1_000_000 * self.speed
+        else:
+            limit_us = float('inf')
+
+        if self._pos < len(self._chunks):
+            base_us = self._chunks[0][0]
+            while self._pos < len(self._chunks) and self._chunks[self._pos][0] - base_us <= limit_us:
+                self._rx.extend(self._chunks[self._pos][1])
+                self._pos += 1
+                if limit_us == float('inf') and len(self._rx) >= 64 * 1024:
+                    break
+        elif self.loop and self._chunks:
+            self._pos = 0
+            self._t0 = time.monotonic()
+        elif not self._rx:
+            raise EndOfCapture(f"Fim da captura: {self.port}")
+
+    @property
+    def in_waiting(self) -> int:
+        with self._lock:
+            self._pump()
+            return len(self._rx)
+
+    def read(self, size: int = 1) -> bytes:
+        with self._lock:
+            self._pump()
+            data = bytes(self._rx[:size])
+            del self._rx[:size]
+            return data
+
+    def write(self, data: bytes) -> int:
+        self.bytes_written += len(data)
+        return len(data)
+
+    def reset_input_buffer(self):
+        pass
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+def capture_info(path: str) -> dict:
+    """Resumo de uma captura: duração, volume e quantidade de registros"""
+    started, records = read_capture(path)
+    info = {'path': path, 'started': started, 'size': os.path.getsize(path),
+            'rx_chunks': 0, 'rx_bytes': 0, 'tx_chunks': 0, 'index_records': 0, 'duration_s': 0.0}
+    for record in records:
+        info['duration_s'] = record.t_us / 1_000_000
+        if record.kind == RECORD_RX:
+            info['rx_chunks'] += 1
+            info['rx_bytes'] += len(record.data)
+        elif record.kind == RECORD_TX:
+            info['tx_chunks'] += 1
+        else:
+            info['index_records'] += 1
+    return info
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] != 'info':
+        print("Uso: python ur4_capture.py info <arquivo.ur4cap>")
+        sys.exit(1)
+    summary = capture_info(sys.argv[2])
+    for key, value in summary.items():
+        print(f"{key:<14} {value}")
@@ -0,0 +1,165 @@
+"""
+UR4 Emulator
+============
+
+Dispositivo UR4 emulado com a mesma interface usada de `serial.Serial`
+(write, read, in_waiting, reset_input_buffer...). Gera frames de inventário
+em tempo real enquanto o inventário está ativo e responde aos comandos de
+controle, permitindo exercitar o UR4Reader sem o hardware conectado.
+
+Uso:
+    from ur4_reader import UR4Reader
+    from ur4_emulator import EmulatedUR4
+
+    reader = UR4Reader(port='emu', serial_factory=EmulatedUR4.factory(tag_rate=200))
+"""
+
+import threading
+import time
+from typing import List, Optional
+
+import ur4_protocol as protocol
+
+
+class EmulatedUR4:
+    """
+    Porta serial emulada de um leitor UR4
+
+    Args:
+        tag_rate: Frames de inventário por segundo enquanto o inventário está ativo
+        epcs: Lista de EPCs (bytes) a circular nas leituras
+        antennas: Antenas alternadas nas leituras
+        concurrent_commands: Se False, comandos de controle são ignorados
+            com inventário ativo (como em firmwares mais antigos)
+        response_delay: Atraso simulado das respostas de controle (segundos)
+    """
+
+    def __init__(self, port: str = 'emu', baudrate: int = 115200, tag_rate: float = 200.0,
+                 epcs: Optional[List[bytes]] = None, antennas: Optional[List[int]] = None,
+                 concurrent_commands: bool = True, response_delay: float = 0.005,
+                 module_id: bytes = b'\x1E\x00\x4D\x00', **kwargs):
+        self.port = port
+        self.baudrate = baudrate
+        self.tag_rate = tag_rate
+        self.epcs = epcs or [bytes.fromhex(f"E2801160600002{i:010X}") for i in range(20)]
+        self.antennas = antennas or [1, 2]
+        self.concurrent_commands = concurrent_commands
+        self.response_delay = response_delay
+        self.module_id = module_id
+        self.is_open = True
+
+        self.powers = {1: 500, 2: 1400}  # dBm * 100
+        self.antenna_bits = 0x0003
+        self.inventory = False
+
+        self._lock = threading.Lock()
+        self._rx = bytearray()
+        self._delayed = []  # (instante, bytes) de respostas agendadas
+        self._next_tag_time = 0.0
+        self._tag_index = 0
+        self.frames_sent = 0
+
+    @classmethod
+    def factory(cls, **options):
+        """Retorna uma fábrica compatível com UR4Reader(serial_factory=...)"""
+        def _factory(**serial_kwargs):
+            return cls(**{**serial_kwargs, **options})
+        return _factory
+
+    # ---------------------------
+    # Interface serial
+    # ---------------------------
+    @property
+    def in_waiting(self) -> int:
+        with self._lock:
+            self._pump()
+            return len(self._rx)
+
+    def read(self, size: int = 1) -> bytes:
+        with self._lock:
+            self._pump()
+            data = bytes(self._rx[:size])
+            del self._rx[:size]
+            return data
+
+    def write(self, data: bytes) -> int:
+        with self._lock:
+            self._pump()
+            self._handle_command(bytes(data))
+        return len(data)
+
+    def reset_input_buffer(self):
+        with self._lock:
+            self._pump()
+            self._rx.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+    # ---------------------------
+    # Simulação (interno, com lock)
+    # ---------------------------
+    def _pump(self):
+        now = time.perf_counter()
+        if self.inventory and self.tag_rate > 0:
+            interval = 1.0 / self.tag_rate
+            while self._next_tag_time <= now:
+                self._rx.extend(self._tag_frame())
+                self._next_tag_time += interval
+        if self._delayed:
+            due = [item for item in self._delayed if item[0] <= now]
+            self._delayed = [item for item in self._delayed if item[0] > now]
+            for _, payload in sorted(due):
+                self._rx.extend(payload)
+
+    def _tag_frame(self) -> bytes:
+        epc = self.epcs[self._tag_index % len(self.epcs)]
+        antenna = self.antennas[self._tag_index % len(self.antennas)]
+        self._tag_index += 1
+        self.frames_sent += 1
+        rssi = -650 - (self._tag_index % 50)
+        data = protocol.TAG_PC.pack((len(epc) // 2) << 11) + epc + protocol.TAG_TAIL.pack(rssi, antenna)
+        return protocol.build_frame(protocol.RESP_INVENTORY, data)
+
+    def _reply(self, cmd: int, data: bytes = b''):
+        self._delayed.append((time.perf_counter() + self.response_delay, protocol.build_frame(cmd, data)))
+
+    def _handle_command(self, frame: bytes):
+        frames = protocol.extract_frames(bytearray(frame))
+        if not frames:
+            return
+        cmd = frames[0][4]
+        data = frames[0][5:-3]
+
+        if cmd == protocol.CMD_START_INVENTORY:
+            if not self.inventory:
+                self._next_tag_time = time.perf_counter()
+            self.inventory = True
+            return
+        if cmd == protocol.CMD_STOP_INVENTORY:
+            self.inventory = False
+            return
+
+        if self.inventory and not self.concurrent_commands:
+            return
+
+        if cmd == protocol.CMD_GET_POWER:
+            payload = protocol.STATUS.pack(0x00) + b''.join(
+                protocol.POWER_ENTRY.pack(antenna, power, power)
+                for antenna, power in sorted(self.powers.items())
+            )
+            self._reply(protocol.RESP_POWER, payload)
+        elif cmd == protocol.CMD_GET_ANTENNA_CONFIG:
+            self._reply(protocol.RESP_ANTENNA_CONFIG, protocol.ANTENNA_BITS.pack(self.antenna_bits))
+        elif cmd == protocol.CMD_GET_MODULE_ID:
+            self._reply(protocol.RESP_MODULE_ID, protocol.MODULE_ID.pack(self.module_id))
+        elif cmd == protocol.CMD_SET_POWER and len(data) == protocol.SET_POWER.size:
+            _, antenna, read_raw, _ = protocol.SET_POWER.unpack(data)
+            self.powers[antenna] = read_raw
+            self._reply(protocol.RESP_SET_POWER, protocol.STATUS.pack(0x01))
+        elif cmd == protocol.CMD_SET_ANTENNA and len(data) == protocol.SET_ANTENNA.size:
+            _, self.antenna_bits = protocol.SET_ANTENNA.unpack(data)
+            self._reply(protocol.RESP_SET_ANTENNA, protocol.STATUS.pack(0x01))
@@ -0,0 +1,324 @@
+"""
+UR4 Protocol Codec
+==================
+
+Codificação e decodificação dos frames do protocolo serial do UR4,
+compartilhada pela biblioteca ur4_reader, pelo dispositivo emulado e pela API.
+
+Frame: Header C8 8C + Length(2) + CMD(1) + Data(N) + BCC(1) + Frame End 0D 0A
+    Length = tamanho total do frame (header..end)
+    BCC    = XOR de length + cmd + data
+
+Os campos de cada comando e resposta são descritos por `struct.Struct`
+pré-compilados e os frames montados ficam em um LRU, já que a aplicação
+repete sempre os mesmos poucos comandos.
+"""
+
+import struct
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+FRAME_HEADER = b'\xC8\x8C'
+FRAME_END = b'\x0D\x0A'
+FRAME_OVERHEAD = 8  # header(2) + length(2) + cmd(1) + bcc(1) + end(2)
+MIN_FRAME_LENGTH = FRAME_OVERHEAD
+MAX_FRAME_LENGTH = 4096
+
+# Comandos
+CMD_GET_MODULE_ID = 0x04
+CMD_SET_POWER = 0x10
+CMD_GET_POWER = 0x12
+CMD_SET_ANTENNA = 0x28
+CMD_GET_ANTENNA_CONFIG = 0x2A
+CMD_START_INVENTORY = 0x82
+CMD_STOP_INVENTORY = 0x8C
+
+# Respostas
+RESP_MODULE_ID = 0x05
+RESP_SET_POWER = 0x11
+RESP_POWER = 0x13
+RESP_SET_ANTENNA = 0x29
+RESP_ANTENNA_CONFIG = 0x2B
+RESP_INVENTORY = 0x83
+
+# Código de resposta esperado para cada comando de controle
+RESPONSE_FOR_COMMAND = {
+    CMD_GET_POWER: RESP_POWER,
+    CMD_GET_ANTENNA_CONFIG: RESP_ANTENNA_CONFIG,
+    CMD_GET_MODULE_ID: RESP_MODULE_ID,
+    CMD_SET_POWER: RESP_SET_POWER,
+    CMD_SET_ANTENNA: RESP_SET_ANTENNA,
+}
+
+MAX_ANTENNAS = 16
+MAX_POWER_DBM = 33.0
+
+# Estruturas pré-compiladas
+FRAME_PREFIX = struct.Struct('>2sHB')    # header, length, cmd
+FRAME_SUFFIX = struct.Struct('>B2s')     # bcc, end
+SET_POWER = struct.Struct('>BBHH')       # status, antena, leitura*100, escrita*100
+SET_ANTENNA = struct.Struct('>BH')       # salvar, bitmask (DByte1 MSB, DByte0 LSB)
+POWER_ENTRY = struct.Struct('>BHH')      # antena, leitura*100, escrita*100
+ANTENNA_BITS = struct.Struct('>H')
+MODULE_ID = struct.Struct('>4s')
+STATUS = struct.Struct('>B')
+TAG_PC = struct.Struct('>H')             # Protocol Control
+TAG_TAIL = struct.Struct('>hB')          # RSSI (dBm*10, complemento de 2), antena
+
+
+# ---------------------------
+# Resultados tipados
+# ---------------------------
+class TagRead(NamedTuple):
+    """
+    Leitura de tag de um frame de inventário (0x83)
+
+    O EPC fica nos bytes brutos (internados, ver `intern_epc`) e o RSSI no
+    valor bruto do frame; o hex e o dBm só são calculados quando pedidos.
+    """
+    epc_raw: bytes
+    antenna: int
+    rssi_raw: int
+
+    @property
+    def epc(self) -> str:
+        return epc_hex(self.epc_raw)
+
+    @property
+    def rssi(self) -> float:
+        return self.rssi_raw / 10.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {'epc': self.epc, 'antenna': self.antenna, 'rssi': self.rssi}
+
+
+class AntennaPower(NamedTuple):
+    read_power: float
+    write_power: float
+
+
+class PowerReport(NamedTuple):
+    """Resposta de leitura de potência (0x13)"""
+    status: int
+    powers: Dict[int, AntennaPower]
+
+
+class AntennaConfig(NamedTuple):
+    """Resposta de configuração de antenas (0x2B)"""
+    bitmask: int
+    antennas: List[int]
+
+
+class ModuleId(NamedTuple):
+    """Resposta de identificação do módulo (0x05)"""
+    module_id: str
+
+
+class SetResult(NamedTuple):
+    """Resposta de comandos de escrita (0x11, 0x29)"""
+    status: int
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 0x01
+
+
+# ---------------------------
+# Codificação
+# ---------------------------
+def bcc(data: Iterable[int]) -> int:
+    """XOR de todos os bytes"""
+    value = 0
+    for b in data:
+        value ^= b
+    return value
+
+
+def frame_bcc(frame: bytes) -> int:
+    """BCC de um frame completo: XOR de length + cmd + data"""
+    return bcc(frame[2:-3])
+
+
+@lru_cache(maxsize=256)
+def build_frame(cmd: int, data: bytes = b'') -> bytes:
+    """Monta um frame completo (resultado em cache para comandos repetidos)"""
+    prefix = FRAME_PREFIX.pack(FRAME_HEADER, FRAME_OVERHEAD + len(data), cmd)
+    return prefix + data + FRAME_SUFFIX.pack(bcc(prefix[2:]) ^ bcc(data), FRAME_END)
+
+
+def antenna_bitmask(antennas: Iterable[int]) -> int:
+    """Bitmask de antenas (bit0 = antena 1, bit1 = antena 2, ...)"""
+    mask = 0
+    for ant in antennas:
+        mask |= 1 << (ant - 1)
+    return mask
+
+
+def antennas_from_bitmask(mask: int) -> List[int]:
+    return [i + 1 for i in range(MAX_ANTENNAS) if mask & (1 << i)]
+
+
+def encode_set_power(antenna: int, read_power: float, write_power: float, save: bool = False) -> bytes:
+    """
+    Frame de configuração de potência (0x10)
+
+    Raises:
+        ValueError: antena fora de 1-16 ou potência fora de 0-33 dBm
+    """
+    if not (1 <= antenna <= MAX_ANTENNAS):
+        raise ValueError("Número de antena inválido (1-16)")
+    if not (0.0 <= read_power <= MAX_POWER_DBM) or not (0.0 <= write_power <= MAX_POWER_DBM):
+        raise ValueError("Potência deve estar entre 0.0 e 33.0 dBm")
+    # Status byte: bit1=1 para salvar, bit1=0 para não salvar
+    status = 0x02 if save else 0x00
+    data = SET_POWER.pack(status, antenna, int(round(read_power * 100)), int(round(write_power * 100)))
+    return build_frame(CMD_SET_POWER, data)
+
+
+def encode_set_antennas(antennas: Iterable[int], save: bool = False) -> bytes:
+    """
+    Frame de configuração de antenas ativas (0x28)
+
+    Raises:
+        ValueError: lista vazia ou antena fora de 1-16
+    """
+    antennas = list(antennas)
+    if not antennas or not all(1 <= ant <= MAX_ANTENNAS for ant in antennas):
+        raise ValueError("Números de antena inválidos (1-16)")
+    # DByte2: 0x01 para salvar, 0x00 para não salvar
+    return build_frame(CMD_SET_ANTENNA, SET_ANTENNA.pack(0x01 if save else 0x00, antenna_bitmask(antennas)))
+
+
+# Comandos fixos pré-montados
+START_INVENTORY_FRAME = build_frame(CMD_START_INVENTORY, b'\x00\x00')
+STOP_INVENTORY_FRAME = build_frame(CMD_STOP_INVENTORY)
+GET_POWER_FRAME = build_frame(CMD_GET_POWER)
+GET_ANTENNA_CONFIG_FRAME = build_frame(CMD_GET_ANTENNA_CONFIG)
+GET_MODULE_ID_FRAME = build_frame(CMD_GET_MODULE_ID)
+
+
+# ---------------------------
+# Decodificação
+# ---------------------------
+def extract_frames(buffer: bytearray) -> List[bytes]:
+    """
+    Extrai do buffer (in-place) todos os frames completos e válidos.
+
+    Bytes antes do header são descartados; frames com length, trailer ou BCC
+    inválidos descartam um byte e a busca pelo header recomeça. Frames
+    incompletos permanecem no buffer aguardando mais dados.
+    """
+    frames = []
+    while True:
+        start = buffer.find(FRAME_HEADER)
+        if start < 0:
+            # Preserva um possível primeiro byte de header no final
+            keep = 1 if buffer[-1:] == FRAME_HEADER[:1] else 0
+            del buffer[:len(buffer) - keep]
+            return frames
+        if start:
+            del buffer[:start]
+        if len(buffer) < 4:
+            return frames
+
+        length = (buffer[2] << 8) | buffer[3]
+        if length < MIN_FRAME_LENGTH or length > MAX_FRAME_LENGTH:
+            del buffer[:1]
+            continue
+        if len(buffer) < length:
+            return frames
+
+        frame = bytes(buffer[:length])
+        if frame[-2:] != FRAME_END or frame[-3] != frame_bcc(frame):
+            del buffer[:1]
+            continue
+
+        del buffer[:length]
+        frames.append(frame)
+
+
+# EPCs vistos: bytes brutos -> mesma instância, para tags repetidas no campo
+# não alocarem uma cópia nova a cada frame
+_EPC_INTERN: Dict[bytes, bytes] = {}
+EPC_INTERN_LIMIT = 65536
+
+
+def intern_epc(raw: bytes) -> bytes:
+    """Retorna a instância canônica dos bytes do EPC"""
+    cached = _EPC_INTERN.get(raw)
+    if cached is None:
+        if len(_EPC_INTERN) >= EPC_INTERN_LIMIT:
+            _EPC_INTERN.clear()
+        cached = _EPC_INTERN[raw] = raw
+    return cached
+
+
+@lru_cache(maxsize=4096)
+def epc_hex(raw: bytes) -> str:
+    """EPC em hexadecimal maiúsculo (formato usado pela API e pelo banco)"""
+    return raw.hex().upper()
+
+
+def decode_inventory(frame: bytes) -> Optional[TagRead]:
+    """Decodifica um frame de inventário (0x83) ou retorna None se inválido"""
+    if len(frame) < 13 or frame[4] != RESP_INVENTORY:
+        return None
+    pc, = TAG_PC.unpack_from(frame, 5)
+    epc_len = ((pc >> 11) & 0x1F) * 2  # Tamanho EPC em bytes
+    if len(frame) < 7 + epc_len + 3:
+        return None
+    rssi_raw, antenna = TAG_TAIL.unpack_from(frame, 7 + epc_len)
+    return TagRead(intern_epc(frame[7:7 + epc_len]), antenna, rssi_raw)
+
+
+def decode_power(frame: bytes) -> Optional[PowerReport]:
+    """Decodifica a resposta de potência (0x13): status + N x (antena, leitura, escrita)"""
+    if len(frame) < 10 or frame[4] != RESP_POWER:
+        return None
+    status, = STATUS.unpack_from(frame, 5)
+    data = frame[6:-3]
+    usable = len(data) - len(data) % POWER_ENTRY.size
+    powers = {
+        antenna: AntennaPower(read_raw / 100.0, write_raw / 100.0)
+        for antenna, read_raw, write_raw in POWER_ENTRY.iter_unpack(data[:usable])
+    }
+    return PowerReport(status, powers)
+
+
+def decode_antenna_config(frame: bytes) -> Optional[AntennaConfig]:
+    """Decodifica a resposta de antenas configuradas (0x2B)"""
+    if len(frame) < 10 or frame[4] != RESP_ANTENNA_CONFIG:
+        return None
+    mask, = ANTENNA_BITS.unpack_from(frame, 5)
+    return AntennaConfig(mask, antennas_from_bitmask(mask))
+
+
+def decode_module_id(frame: bytes) -> Optional[ModuleId]:
+    """Decodifica a resposta de identificação do módulo (0x05)"""
+    if len(frame) < 12 or frame[4] != RESP_MODULE_ID:
+        return None
+    raw, = MODULE_ID.unpack_from(frame, 5)
+    return ModuleId(raw.hex().upper())
+
+
+def decode_set_result(frame: bytes, expected: int) -> Optional[SetResult]:
+    """Decodifica a resposta de comandos de escrita (0x11 ou 0x29)"""
+    if len(frame) < 9 or frame[4] != expected:
+        return None
+    return SetResult(STATUS.unpack_from(frame, 5)[0])
+
+
+_DECODERS = {
+    RESP_INVENTORY: decode_inventory,
+    RESP_POWER: decode_power,
+    RESP_ANTENNA_CONFIG: decode_antenna_config,
+    RESP_MODULE_ID: decode_module_id,
+    RESP_SET_POWER: lambda frame: decode_set_result(frame, RESP_SET_POWER),
+    RESP_SET_ANTENNA: lambda frame: decode_set_result(frame, RESP_SET_ANTENNA),
+}
+
+
+def decode_frame(frame: bytes):
+    """Decodifica qualquer frame conhecido no resultado tipado correspondente (ou None)"""
+    decoder = _DECODERS.get(frame[4]) if len(frame) > 4 else None
+    return decoder(frame) if decoder else None
@@ -27,29 +27,50 @@ import time
 import platform
 import os
 import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from datetime import datetime
 from typing import Optional, Callable, Dict, List
 
+import ur4_protocol as protocol
+from ur4_capture import CaptureWriter, EndOfCapture, SerialCapture
+
 __version__ = '1.0.1'
 __all__ = ['UR4Reader', 'detect_serial_port', 'list_serial_ports']
 
-# Comandos UR4 (fixos)
-CMD_START_INVENTORY = bytes([0xC8, 0x8C, 0x00, 0x0A, 0x82, 0x00, 0x00, 0x88, 0x0D, 0x0A])
-CMD_STOP_INVENTORY = bytes([0xC8, 0x8C, 0x00, 0x08, 0x8C, 0x84, 0x0D, 0x0A])
-CMD_GET_POWER = bytes([0xC8, 0x8C, 0x00, 0x08, 0x12, 0x1A, 0x0D, 0x0A])
-CMD_GET_ANTENNA_CONFIG = bytes([0xC8, 0x8C, 0x00, 0x08, 0x2A, 0x22, 0x0D, 0x0A])
-CMD_GET_MODULE_ID = bytes([0xC8, 0x8C, 0x00, 0x08, 0x04, 0x0C, 0x0D, 0x0A])
+# Comandos UR4 (fixos, montados pelo codec)
+CMD_START_INVENTORY = protocol.START_INVENTORY_FRAME
+CMD_STOP_INVENTORY = protocol.STOP_INVENTORY_FRAME
+CMD_GET_POWER = protocol.GET_POWER_FRAME
+CMD_GET_ANTENNA_CONFIG = protocol.GET_ANTENNA_CONFIG_FRAME
+CMD_GET_MODULE_ID = protocol.GET_MODULE_ID_FRAME
 
 # Frame headers
-FRAME_HEADER = (0xC8, 0x8C)
+FRAME_HEADER = tuple(protocol.FRAME_HEADER)
 
 # Respostas
-CMD_INVENTORY_RESPONSE = 0x83
-CMD_POWER_RESPONSE = 0x13
-CMD_ANTENNA_CONFIG_RESPONSE = 0x2B
-CMD_MODULE_ID_RESPONSE = 0x05
-CMD_SET_POWER_RESPONSE = 0x11
-CMD_SET_ANTENNA_RESPONSE = 0x29
+CMD_INVENTORY_RESPONSE = protocol.RESP_INVENTORY
+CMD_POWER_RESPONSE = protocol.RESP_POWER
+CMD_ANTENNA_CONFIG_RESPONSE = protocol.RESP_ANTENNA_CONFIG
+CMD_MODULE_ID_RESPONSE = protocol.RESP_MODULE_ID
+CMD_SET_POWER_RESPONSE = protocol.RESP_SET_POWER
+CMD_SET_ANTENNA_RESPONSE = protocol.RESP_SET_ANTENNA
+
+# Código de resposta esperado para cada comando de controle
+RESPONSE_FOR_COMMAND = protocol.RESPONSE_FOR_COMMAND
+
+# Validade padrão (segundos) das propriedades do dispositivo em cache
+DEFAULT_PROPERTY_TTLS = {
+    'module_id': 24 * 3600,      # Gravado no módulo, praticamente nunca muda
+    'active_antennas': 3600,     # Só muda via set_active_antennas
+    'antenna_powers': 600,       # Só muda via set_antenna_power
+}
+
+# Espera entre tentativas de reconexão (segundos): começa no mínimo e dobra até o máximo
+RECONNECT_BACKOFF = (0.5, 10.0)
+
+# Erros de I/O que indicam perda do dispositivo (USB desconectado, porta fechada...)
+SERIAL_ERRORS = (serial.SerialException, OSError)
 
 
 def detect_serial_port() -> Optional[str]:
@@ -109,16 +130,73 @@ class UR4Reader:
         port (str): Porta serial (ex: 'COM4' ou '/dev/ttyUSB0')
         baudrate (int): Taxa de transmissão (padrão: 115200)
         debug (bool): Ativa logs de debug
+        multiplex (bool): Envia comandos de controle sem parar o inventário
+            (respostas são casadas pelo código de resposta)
+        serial_factory (callable): Fábrica da porta serial (padrão: serial.Serial),
+            permite usar o dispositivo emulado
+        property_ttls (dict): Validade em segundos das propriedades em cache
+            (sobrescreve DEFAULT_PROPERTY_TTLS)
+        capture_path (str): Grava todo o tráfego serial neste arquivo (ver ur4_capture)
+        auto_reconnect (bool): Em erro de I/O ou inventário travado, read_continuous
+            reabre a porta (com backoff) e retoma o inventário em vez de encerrar
+        watchdog_timeout (float): Segundos sem nenhum frame durante o inventário até
+            conferir se o dispositivo ainda responde (None desativa). Só consulta
+            quando havia frames chegando: cada consulta para o inventário (janela
+            cega), então um portal vazio é conferido uma vez, não a cada intervalo
+        idle_probe_interval (float): Também consulta o dispositivo a cada N segundos
+            de silêncio sem tags esperadas (opcional; None = só após tráfego)
+        on_reconnect (callable): Chamada com o reader após cada reconexão, antes de
+            retomar o inventário (ex: reaplicar a configuração)
+        series (ReadSeries): Recebe toda leitura de inventário, antes do anti-spam
+            (séries de taxa de leitura e RSSI por antena, ver ur4_series)
     """
 
-    def __init__(self, port: str = 'COM4', baudrate: int = 115200, debug: bool = False):
+    def __init__(self, port: str = 'COM4', baudrate: int = 115200, debug: bool = False,
+                 multiplex: bool = False, serial_factory: Optional[Callable[..., serial.Serial]] = None,
+                 property_ttls: Optional[Dict[str, float]] = None, capture_path: Optional[str] = None,
+                 auto_reconnect: bool = False, watchdog_timeout: Optional[float] = None,
+                 idle_probe_interval: Optional[float] = None,
+                 on_reconnect: Optional[Callable[['UR4Reader'], None]] = None,
+                 reconnect_backoff: tuple = RECONNECT_BACKOFF, series=None):
         """Inicializa conexão com o leitor UR4"""
         self.port = port
         self.baudrate = baudrate
         self.ser: Optional[serial.Serial] = None
         self.debug = debug
         self.is_reading = False
+        self.multiplex = multiplex
+        self.serial_factory = serial_factory or serial.Serial
+        self.capture_path = capture_path
+        self._capture_writer: Optional[CaptureWriter] = None  # Mantido entre reconexões
         self._io_lock = threading.RLock()  # Lock para coordenar I/O entre inventário e comandos
+        self._write_lock = threading.Lock()  # Escritas concorrentes no modo multiplexado
+
+        # Multiplexação: respostas pendentes por código de resposta
+        self._pending: Dict[int, deque] = {}
+        self._pending_lock = threading.Lock()
+        self._dispatching = False  # True enquanto read_continuous despacha os frames
+        self._multiplex_supported = True  # Desativado se o dispositivo não responder durante inventário
+        self._inventory_paused = False  # Inventário pausado temporariamente por comando de controle
+
+        # Janela cega: tempo em que o inventário ficou parado por comandos de controle
+        self.blind_window = {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0}
+
+        # Supervisão da conexão: reconexão automática e watchdog do inventário
+        self.auto_reconnect = auto_reconnect
+        self.watchdog_timeout = watchdog_timeout
+        self.idle_probe_interval = idle_probe_interval
+        self.on_reconnect = on_reconnect
+        self.reconnect_backoff = reconnect_backoff
+        self.series = series
+        self._stop_event = threading.Event()  # disconnect() interrompe uma reconexão em andamento
+
+        # Quedas do dispositivo: tempo sem leitura entre a falha e o inventário retomado
+        self.outages = {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0, 'last_reason': None}
+
+        # Cache de propriedades do dispositivo: nome -> (valor, instante da leitura)
+        self.property_ttls = {**DEFAULT_PROPERTY_TTLS, **(property_ttls or {})}
+        self._properties: Dict[str, tuple] = {}
+        self._properties_lock = threading.Lock()
 
     def connect(self) -> bool:
         """
@@ -128,7 +206,7 @@ class UR4Reader:
             bool: True se conectado com sucesso, False caso contrário
         """
         try:
-            self.ser = serial.Serial(
+            self.ser = self.serial_factory(
                 port=self.port,
                 baudrate=self.baudrate,
                 bytesize=serial.EIGHTBITS,
@@ -136,11 +214,15 @@ class UR4Reader:
                 stopbits=serial.STOPBITS_ONE,
                 timeout=0.1
             )
+            if self.capture_path:
+                if self._capture_writer is None:
+                    self._capture_writer = CaptureWriter(self.capture_path)
+                self.ser = SerialCapture(self.ser, self._capture_writer)
             if self.debug:
                 print(f"[OK] Conectado: {self.port} @ {self.baudrate} baud")
 
-            # Aguardar estabilização da conexão
-            time.sleep(0.5)
+            # Aguardar a linha estabilizar (sem bytes chegando) em vez de um tempo fixo
+            settle = self._wait_line_idle()
 
             # Limpar buffers de entrada/saída
             if self.ser.in_waiting > 0:
@@ -148,18 +230,37 @@ class UR4Reader:
             self.ser.reset_output_buffer()
 
             if self.debug:
-                print(f"[DEBUG] Buffers limpos, conexão estável")
-
-            time.sleep(0.2)
+                print(f"[DEBUG] Buffers limpos, conexão estável em {settle * 1000:.0f} ms")
             return True
-        except serial.SerialException as e:
+        except SERIAL_ERRORS as e:
             if self.debug:
                 print(f"[ERRO] Falha na conexão: {e}")
             return False
 
+    def _wait_line_idle(self, quiet: float = 0.03, timeout: float = 0.5) -> float:
+        """
+        Espera a serial ficar sem receber bytes por `quiet` segundos (no máximo `timeout`)
+
+        Cobre o lixo de abertura da porta e frames de um inventário deixado
+        ativo, retornando assim que a linha fica quieta. Retorna o tempo gasto.
+        """
+        start = time.monotonic()
+        last_size = self.ser.in_waiting
+        last_change = start
+        while True:
+            time.sleep(0.005)
+            now = time.monotonic()
+            size = self.ser.in_waiting
+            if size != last_size:
+                last_size, last_change = size, now
+            if now - last_change >= quiet or now - start >= timeout:
+                return now - start
+
     def disconnect(self):
         """Fecha conexão serial"""
         self.is_reading = False
+        self._stop_event.set()
+        self._capture_writer = None
         if self.ser and self.ser.is_open:
             self.ser.close()
             if self.debug:
@@ -173,6 +274,8 @@ class UR4Reader:
         """
         Executa um comando de controle com exclusividade de I/O.
         Se estiver inventariando, pausa inventário, executa comando e retoma inventário.
+        No modo multiplex, com o inventário ativo, o comando é enviado sem pausar
+        a leitura e a resposta é entregue pelo loop de leitura.
         
         Args:
             command: Comando a enviar
@@ -183,15 +286,29 @@ class UR4Reader:
         """
         if not self.is_connected():
             return None
+
+        if self.multiplex and self._multiplex_supported and self._dispatching \
+                and command[4] in RESPONSE_FOR_COMMAND:
+            resp = self._run_multiplexed(command, timeout)
+            if resp is not None:
+                return resp
+            # Dispositivo não respondeu com inventário ativo: volta ao modo exclusivo
+            self._multiplex_supported = False
+            if self.debug:
+                print("[DEBUG] Sem resposta durante inventário, multiplexação desativada")
         
         with self._io_lock:
             was_reading = self.is_reading
+            blind_start = time.perf_counter()
             if was_reading:
                 # Para inventário para não "roubar" o RX
+                # (_inventory_paused mantém o loop de leitura vivo durante a pausa)
+                self._inventory_paused = True
                 self.send_command(CMD_STOP_INVENTORY)
                 self.is_reading = False
-                time.sleep(0.08)
+                # Descarta os frames de inventário ainda em trânsito assim que a linha silencia
                 try:
+                    self._wait_line_idle()
                     if self.ser.in_waiting > 0:
                         self.ser.reset_input_buffer()
                 except Exception:
@@ -204,10 +321,161 @@ class UR4Reader:
                     # Retoma inventário
                     self.send_command(CMD_START_INVENTORY)
                     self.is_reading = True
-                    time.sleep(0.05)
+                    self._inventory_paused = False
+                    self._record_blind_window(time.perf_counter() - blind_start)
             
             return resp
 
+    def _run_multiplexed(self, command: bytes, timeout: float) -> Optional[bytes]:
+        """Envia comando com inventário ativo e aguarda a resposta despachada pelo loop de leitura"""
+        expected = RESPONSE_FOR_COMMAND[command[4]]
+        future = Future()
+        with self._pending_lock:
+            self._pending.setdefault(expected, deque()).append(future)
+
+        if self.debug:
+            print(f"[DEBUG] TX (mux): {' '.join([f'{b:02X}' for b in command])}")
+        with self._write_lock:
+            self.ser.write(command)
+
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            with self._pending_lock:
+                waiters = self._pending.get(expected)
+                if waiters and future in waiters:
+                    waiters.remove(future)
+            return None
+
+    def _dispatch_response(self, frame: bytes) -> bool:
+        """Entrega um frame de resposta ao comando pendente mais antigo com o mesmo código"""
+        with self._pending_lock:
+            waiters = self._pending.get(frame[4])
+            future = waiters.popleft() if waiters else None
+        if future is None:
+            return False
+        if self.debug:
+            print(f"[DEBUG] RX (mux): {' '.join([f'{b:02X}' for b in frame])}")
+        future.set_result(frame)
+        return True
+
+    def _record_blind_window(self, duration: float):
+        self.blind_window['count'] += 1
+        self.blind_window['total'] += duration
+        self.blind_window['last'] = duration
+        self.blind_window['max'] = max(self.blind_window['max'], duration)
+
+    def get_blind_window_stats(self) -> Dict[str, float]:
+        """
+        Retorna estatísticas do tempo em que o inventário ficou parado por comandos
+
+        Returns:
+            Dict com 'count', 'total_ms', 'mean_ms', 'max_ms' e 'last_ms'
+        """
+        count = self.blind_window['count']
+        return {
+            'count': count,
+            'total_ms': self.blind_window['total'] * 1000,
+            'mean_ms': (self.blind_window['total'] / count * 1000) if count else 0.0,
+            'max_ms': self.blind_window['max'] * 1000,
+            'last_ms': self.blind_window['last'] * 1000,
+        }
+
+    def get_outage_stats(self) -> Dict[str, any]:
+        """
+        Retorna estatísticas das quedas do dispositivo recuperadas pelo read_continuous
+
+        Returns:
+            Dict com 'count', 'total_s', 'max_s', 'last_s' e 'last_reason'
+        """
+        return {
+            'count': self.outages['count'],
+            'total_s': round(self.outages['total'], 3),
+            'max_s': round(self.outages['max'], 3),
+            'last_s': round(self.outages['last'], 3),
+            'last_reason': self.outages['last_reason'],
+        }
+
+    # ---------------------------
+    # Supervisão da conexão (interno)
+    # ---------------------------
+    def _probe_device(self, timeout: float = 1.0) -> bool:
+        """
+        Confere se o dispositivo ainda responde, com o inventário parado durante
+        a consulta (o próprio loop de leitura chama, então não usa a multiplexação)
+        """
+        with self._io_lock:
+            blind_start = time.perf_counter()
+            self.send_command(CMD_STOP_INVENTORY)
+            self._wait_line_idle()
+            if self.ser.in_waiting > 0:
+                self.ser.reset_input_buffer()
+            alive = self.send_command_and_wait(CMD_GET_MODULE_ID, timeout=timeout) is not None
+            if alive:
+                self.send_command(CMD_START_INVENTORY)
+                self._record_blind_window(time.perf_counter() - blind_start)
+            return alive
+
+    def _close_quietly(self):
+        """Fecha só a porta (a captura, se houver, continua no mesmo arquivo)"""
+        port = self.ser._ser if isinstance(self.ser, SerialCapture) else self.ser
+        try:
+            if port is not None:
+                port.close()
+        except SERIAL_ERRORS:
+            pass
+
+    def _recover(self, reason: str, lost_at: float) -> bool:
+        """
+        Reabre a porta com backoff, chama on_reconnect e retoma o inventário
+
+        Args:
+            reason: Motivo da queda (para log e estatísticas)
+            lost_at: Instante (time.monotonic) da última leitura antes da queda
+
+        Returns:
+            bool: True se o inventário foi retomado, False se disconnect() foi chamado
+        """
+        print(f"⚠️ [UR4] Conexão perdida ({reason}), reconectando...")
+        self._dispatching = False  # on_reconnect usa comandos no modo exclusivo
+        self.is_reading = False
+        self._close_quietly()
+        self.invalidate_properties()  # Pode ser outro dispositivo na mesma porta
+
+        delay, max_delay = self.reconnect_backoff
+        attempts = 0
+        while not self._stop_event.is_set():
+            attempts += 1
+            with self._io_lock:
+                if self.connect():
+                    try:
+                        if self.on_reconnect is not None:
+                            self.on_reconnect(self)
+                        self.start_inventory()
+                    except SERIAL_ERRORS as e:
+                        if self.debug:
+                            print(f"[DEBUG] Falha ao retomar inventário: {e}")
+                        self.is_reading = False
+                        self._close_quietly()
+                    else:
+                        if self._stop_event.is_set():  # disconnect() durante a reconexão
+                            self.is_reading = False
+                            self._close_quietly()
+                            return False
+                        self._dispatching = True
+                        outage = time.monotonic() - lost_at
+                        self.outages['count'] += 1
+                        self.outages['total'] += outage
+                        self.outages['max'] = max(self.outages['max'], outage)
+                        self.outages['last'] = outage
+                        self.outages['last_reason'] = reason
+                        print(f"✅ [UR4] Reconectado após {outage:.1f}s sem leitura "
+                              f"({attempts} tentativa(s))")
+                        return True
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, max_delay)
+        return False
+
     # ---------------------------
     # Frame utilities (interno)
     # ---------------------------
@@ -218,11 +486,7 @@ class UR4Reader:
         XOR de length(2) + cmd(1) + data(n), excluindo header(2), bcc(1) e end(2)
         frame = [H0 H1 L0 L1 CMD ... DATA ... BCC 0D 0A]
         """
-        bcc = 0
-        # do length até o último byte de data (antes do BCC)
-        for b in frame[2:-3]:
-            bcc ^= b
-        return bcc
+        return protocol.frame_bcc(frame)
 
     def send_command_and_wait(self, command: bytes, timeout: float = 1.0) -> Optional[bytes]:
         """
@@ -238,8 +502,8 @@ class UR4Reader:
             print(f"[DEBUG] TX: {' '.join([f'{b:02X}' for b in command])}")
 
         self.ser.write(command)
-        time.sleep(0.05)
 
+        # Confere a serial logo após a escrita e depois a cada 10 ms, até o frame completo
         start_time = time.time()
         buffer = bytearray()
 
@@ -247,41 +511,12 @@ class UR4Reader:
             if self.ser.in_waiting > 0:
                 buffer.extend(self.ser.read(self.ser.in_waiting))
 
-                # Alinha no header
-                while len(buffer) >= 2 and not (buffer[0] == FRAME_HEADER[0] and buffer[1] == FRAME_HEADER[1]):
-                    buffer.pop(0)
-
-                # Precisa ter header + length
-                if len(buffer) >= 4:
-                    frame_length = (buffer[2] << 8) | buffer[3]
-
-                    # Sanity check
-                    if frame_length < 8 or frame_length > 4096:
-                        buffer.pop(0)
-                        continue
-
-                    if len(buffer) >= frame_length:
-                        frame = bytes(buffer[:frame_length])
-
-                        # Valida trailer
-                        if frame[-2:] != b"\x0D\x0A":
-                            buffer.pop(0)
-                            continue
-
-                        # Valida BCC
-                        bcc_recv = frame[-3]
-                        bcc_calc = self._calc_bcc_for_frame(frame)
-                        if bcc_calc != bcc_recv:
-                            if self.debug:
-                                print(f"[DEBUG] BCC inválido: calc=0x{bcc_calc:02X} recv=0x{bcc_recv:02X}")
-                            buffer.pop(0)
-                            continue
-
-                        # OK
-                        del buffer[:frame_length]
-                        if self.debug:
-                            print(f"[DEBUG] RX: {' '.join([f'{b:02X}' for b in frame])}")
-                        return frame
+                frames = protocol.extract_frames(buffer)
+                if frames:
+                    frame = frames[0]
+                    if self.debug:
+                        print(f"[DEBUG] RX: {' '.join([f'{b:02X}' for b in frame])}")
+                    return frame
 
             time.sleep(0.01)
 
@@ -293,7 +528,6 @@ class UR4Reader:
             if self.debug:
                 print(f"[DEBUG] TX: {' '.join([f'{b:02X}' for b in command])}")
             self.ser.write(command)
-            time.sleep(0.05)
 
     def start_inventory(self):
         """Inicia leitura contínua"""
@@ -323,35 +557,11 @@ class UR4Reader:
             if self.debug:
                 print(f"[DEBUG] RX: {' '.join([f'{b:02X}' for b in data])}")
 
-            if len(data) < 13 or data[0] != FRAME_HEADER[0] or data[1] != FRAME_HEADER[1]:
-                return None
-
-            cmd_type = data[4]
-            if cmd_type != CMD_INVENTORY_RESPONSE:
-                return None
-
-            # PC (Protocol Control) - 2 bytes
-            pc = (data[5] << 8) | data[6]
-            epc_len = ((pc >> 11) & 0x1F) * 2  # Tamanho EPC em bytes
-
-            if len(data) < 7 + epc_len + 3:
+            if data[:2] != protocol.FRAME_HEADER:
                 return None
 
-            # EPC
-            epc_bytes = data[7:7 + epc_len]
-            epc = ''.join([f'{b:02X}' for b in epc_bytes])
-
-            # RSSI (complemento de 2, dividido por 10)
-            rssi_pos = 7 + epc_len
-            rssi_raw = (data[rssi_pos] << 8) | data[rssi_pos + 1]
-            if rssi_raw & 0x8000:
-                rssi_raw -= 0x10000
-            rssi_dbm = rssi_raw / 10.0
-
-            # Antena
-            antenna = data[rssi_pos + 2]
-
-            return {'epc': epc, 'antenna': antenna, 'rssi': rssi_dbm}
+            tag = protocol.decode_inventory(data)
+            return tag.to_dict() if tag else None
 
         except Exception as e:
             if self.debug:
@@ -378,68 +588,103 @@ class UR4Reader:
 
         buffer = bytearray()
         tags_seen = {}
+        self._dispatching = True
+        self._stop_event.clear()
+        last_frame_time = time.monotonic()
+        expecting_frames = False  # Chegaram frames desde a última consulta do watchdog
 
         try:
-            while self.is_reading:
+            while self.is_reading or self._inventory_paused:
+                failure = None
                 with self._io_lock:
-                    if self.ser.in_waiting > 0:
-                        buffer.extend(self.ser.read(self.ser.in_waiting))
-
-                    # Processa frames completos
-                    while len(buffer) >= 10:
-                        # Alinha no header
-                        while len(buffer) >= 2 and not (buffer[0] == FRAME_HEADER[0] and buffer[1] == FRAME_HEADER[1]):
-                            buffer.pop(0)
-
-                        if len(buffer) < 4:
-                            break
-
-                        frame_length = (buffer[2] << 8) | buffer[3]
-                        if frame_length < 8 or frame_length > 4096:
-                            buffer.pop(0)
+                    try:
+                        waiting = self.ser.in_waiting
+                        if waiting > 0:
+                            buffer.extend(self.ser.read(waiting))
+                    except SERIAL_ERRORS as e:
+                        failure = f"erro de I/O: {e}"
+                        if not self.auto_reconnect:
+                            raise
+
+                    # Processa frames completos (header, length, trailer e BCC validados)
+                    frames = protocol.extract_frames(buffer)
+                    if frames:
+                        last_frame_time = time.monotonic()
+                        expecting_frames = True
+                    for frame in frames:
+                        # Respostas de comandos de controle (modo multiplex)
+                        if frame[4] != CMD_INVENTORY_RESPONSE:
+                            self._dispatch_response(frame)
                             continue
 
-                        if len(buffer) < frame_length:
-                            break
-
-                        frame = bytes(buffer[:frame_length])
-                        del buffer[:frame_length]
+                        if self.debug:
+                            print(f"[DEBUG] RX: {' '.join([f'{b:02X}' for b in frame])}")
 
-                        # Validação mínima do frame
-                        if frame[-2:] != b"\x0D\x0A":
-                            continue
-                        bcc_recv = frame[-3]
-                        bcc_calc = self._calc_bcc_for_frame(frame)
-                        if bcc_calc != bcc_recv:
-                            if self.debug:
-                                print(f"[DEBUG] Frame descartado (BCC inválido): calc=0x{bcc_calc:02X} recv=0x{bcc_recv:02X}")
+                        tag = protocol.decode_inventory(frame)
+                        if tag is None:
                             continue
-
-                        tag_info = self.parse_tag_data(frame)
-                        if tag_info:
-                            epc = tag_info['epc']
-                            antenna = tag_info['antenna']
-                            rssi = tag_info['rssi']
-                            current_time = time.time()
-
-                            # Anti-spam
-                            if epc not in tags_seen or (current_time - tags_seen[epc]) > anti_spam_delay:
+                        current_time = time.time()
+                        if self.series is not None:
+                            self.series.record(tag.antenna, tag.epc_raw, tag.rssi_raw, current_time)
+
+                        # Anti-spam sobre os bytes brutos do EPC; o hex só é
+                        # formatado para leituras que passam pelo filtro
+                        last_seen = tags_seen.get(tag.epc_raw)
+                        if last_seen is None or (current_time - last_seen) > anti_spam_delay:
+                            if callback or print_output:
+                                epc, rssi = tag.epc, tag.rssi
                                 if callback:
-                                    callback(epc, antenna, rssi)
+                                    callback(epc, tag.antenna, rssi)
 
                                 if print_output:
                                     timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                                    print(f"{timestamp:<12} | {epc:<40} | {antenna:<3} | {rssi:<10.1f}")
-
-                                tags_seen[epc] = current_time
+                                    print(f"{timestamp:<12} | {epc:<40} | {tag.antenna:<3} | {rssi:<10.1f}")
+
+                            tags_seen[tag.epc_raw] = current_time
+
+                # Watchdog: sem frames há muito tempo pode ser só ausência de tags,
+                # então o dispositivo é consultado antes de considerar a conexão perdida.
+                # Depois de uma consulta bem-sucedida só volta a consultar quando o
+                # tráfego recomeçar (ou a cada idle_probe_interval, se configurado)
+                silence = time.monotonic() - last_frame_time
+                if failure is None and self.watchdog_timeout and self.is_reading \
+                        and silence > self.watchdog_timeout \
+                        and (expecting_frames or (self.idle_probe_interval
+                                                  and silence > self.idle_probe_interval)):
+                    try:
+                        if self._probe_device():
+                            last_frame_time = time.monotonic()
+                            expecting_frames = False
+                        else:
+                            failure = f"inventário sem resposta há {self.watchdog_timeout:g}s"
+                    except SERIAL_ERRORS as e:
+                        failure = f"erro de I/O: {e}"
+
+                if failure is not None:
+                    if self._stop_event.is_set():  # Porta fechada por disconnect()
+                        break
+                    if not self.auto_reconnect:
+                        print(f"⚠️ [UR4] {failure} (reconexão automática desativada)")
+                    elif not self._recover(failure, last_frame_time):
+                        break
+                    buffer.clear()
+                    last_frame_time = time.monotonic()
+                    expecting_frames = False
 
                 time.sleep(0.01)
 
         except KeyboardInterrupt:
             if print_output:
                 print("\n[INFO] Interrompido pelo usuário")
+        except EndOfCapture as e:
+            # Replay sem loop: a captura acabou, a leitura termina normalmente
+            print(f"⏹️ [UR4] {e}")
         finally:
-            self.stop_inventory()
+            self._dispatching = False
+            try:
+                self.stop_inventory()
+            except SERIAL_ERRORS:
+                pass
 
     def read_single(self, timeout: float = 5.0) -> Optional[Dict[str, any]]:
         """
@@ -458,33 +703,7 @@ class UR4Reader:
                     if self.ser.in_waiting > 0:
                         buffer.extend(self.ser.read(self.ser.in_waiting))
 
-                    while len(buffer) >= 10:
-                        # Alinha no header
-                        while len(buffer) >= 2 and not (buffer[0] == FRAME_HEADER[0] and buffer[1] == FRAME_HEADER[1]):
-                            buffer.pop(0)
-
-                        if len(buffer) < 4:
-                            break
-
-                        frame_length = (buffer[2] << 8) | buffer[3]
-                        if frame_length < 8 or frame_length > 4096:
-                            buffer.pop(0)
-                            continue
-
-                        if len(buffer) < frame_length:
-                            break
-
-                        frame = bytes(buffer[:frame_length])
-                        del buffer[:frame_length]
-
-                        # Validação mínima
-                        if frame[-2:] != b"\x0D\x0A":
-                            continue
-                        bcc_recv = frame[-3]
-                        bcc_calc = self._calc_bcc_for_frame(frame)
-                        if bcc_calc != bcc_recv:
-                            continue
-
+                    for frame in protocol.extract_frames(buffer):
                         tag_info = self.parse_tag_data(frame)
                         if tag_info:
                             self.stop_inventory()
@@ -508,116 +727,44 @@ class UR4Reader:
         if self.debug:
             print(f"[DEBUG] Resposta recebida: {response}")
             if response:
-                print(f"[DEBUG] Tamanho resposta: {len(response)}")
                 print(f"[DEBUG] Resposta hex: {' '.join(f'{b:02X}' for b in response)}")
 
-        if not response or len(response) < 10:
-            if self.debug:
-                print(f"[DEBUG] Resposta inválida (None ou muito curta)")
-            return None
-
-        if response[4] != CMD_POWER_RESPONSE:
+        report = protocol.decode_power(response) if response else None
+        if report is None:
             if self.debug:
-                print(f"[DEBUG] Comando de resposta incorreto: esperado 0x{CMD_POWER_RESPONSE:02X}, recebido 0x{response[4]:02X}")
+                print(f"[DEBUG] Resposta inválida (ausente, curta ou código diferente de 0x{CMD_POWER_RESPONSE:02X})")
             return None
 
-        try:
-            antenna_powers = {}
-            status = response[5]
-            idx = 6
-
-            if self.debug:
-                print(f"[DEBUG] Status da resposta: 0x{status:02X}")
-                print(f"[DEBUG] Iniciando parse das potências a partir do índice {idx}")
-                print(f"[DEBUG] Bytes disponíveis para parse: {len(response) - idx - 3} (total: {len(response)}, inicio: {idx}, reserva fim: 3)")
-
-            # Cada antena: 1 byte número + 2 bytes read + 2 bytes write
-            while idx + 5 <= len(response) - 3:  # -3 para BCC e end
-                antenna_num = response[idx]
-                read_power_raw = (response[idx + 1] << 8) | response[idx + 2]
-                write_power_raw = (response[idx + 3] << 8) | response[idx + 4]
-
-                antenna_powers[antenna_num] = {
-                    'read_power': read_power_raw / 100.0,
-                    'write_power': write_power_raw / 100.0
-                }
-
-                if self.debug:
-                    print(f"[DEBUG] Antena {antenna_num}: read={read_power_raw/100.0} dBm, write={write_power_raw/100.0} dBm")
-
-                idx += 5
-
-            if self.debug:
-                print(f"[DEBUG] Total de antenas encontradas: {len(antenna_powers)}")
-                if len(antenna_powers) == 0 and status == 0x00:
-                    print(f"[DEBUG] ⚠️ Resposta válida mas sem dados de potência - dispositivo pode não ter potências configuradas")
-
-            return antenna_powers if antenna_powers else None
+        if self.debug:
+            print(f"[DEBUG] Status da resposta: 0x{report.status:02X}")
+            for antenna_num, power in report.powers.items():
+                print(f"[DEBUG] Antena {antenna_num}: read={power.read_power} dBm, write={power.write_power} dBm")
+            if not report.powers and report.status == 0x00:
+                print(f"[DEBUG] ⚠️ Resposta válida mas sem dados de potência - dispositivo pode não ter potências configuradas")
 
-        except Exception as e:
-            if self.debug:
-                print(f"[DEBUG] Erro ao processar potências: {e}")
-                import traceback
-                traceback.print_exc()
-            return None
+        antenna_powers = {antenna: power._asdict() for antenna, power in report.powers.items()}
+        return antenna_powers if antenna_powers else None
 
     def get_active_antennas(self) -> Optional[List[int]]:
         """
         Obtém lista de antenas ativas/configuradas
         """
         response = self.run_control_command(CMD_GET_ANTENNA_CONFIG, timeout=1.0)
-
-        if not response or len(response) < 10:
-            return None
-
-        if response[4] != CMD_ANTENNA_CONFIG_RESPONSE:
-            return None
-
-        try:
-            dbyte1 = response[5]
-            dbyte0 = response[6]
-            antenna_bits = (dbyte1 << 8) | dbyte0
-
-            active_antennas = []
-            for i in range(16):
-                if antenna_bits & (1 << i):
-                    active_antennas.append(i + 1)
-
-            return active_antennas
-
-        except Exception as e:
-            if self.debug:
-                print(f"[DEBUG] Erro ao processar antenas: {e}")
-            return None
+        config = protocol.decode_antenna_config(response) if response else None
+        return config.antennas if config else None
 
     def get_serial_number(self) -> Optional[str]:
         """
         Obtém o número de série do módulo UR4
         """
         response = self.run_control_command(CMD_GET_MODULE_ID, timeout=1.0)
+        result = protocol.decode_module_id(response) if response else None
 
-        if not response or len(response) < 12:
-            return None
-
-        if response[4] != CMD_MODULE_ID_RESPONSE:
-            return None
+        if self.debug and result:
+            print(f"[DEBUG] Resposta get_serial_number (hex): {response.hex()}")
+            print(f"[DEBUG] Serial Number extraído: {result.module_id}")
 
-        try:
-            if self.debug:
-                print(f"[DEBUG] Resposta get_serial_number (hex): {response.hex()}")
-                print(f"[DEBUG] Bytes 5-8: {[f'{response[i]:02X}' for i in range(5, 9)]}")
-
-            module_id = ''.join([f'{response[i]:02X}' for i in range(5, 9)])
-
-            if self.debug:
-                print(f"[DEBUG] Serial Number extraído: {module_id}")
-
-            return module_id
-
-        except Exception as e:
-            if self.debug:
-                print(f"[DEBUG] Erro ao obter número de série: {e}")
-            return None
+        return result.module_id if result else None
 
     def set_antenna_power(self, antenna: int, read_power: float, write_power: float,
                          save: bool = False) -> bool:
@@ -627,58 +774,18 @@ class UR4Reader:
         if not self.is_connected():
             return False
 
-        if not (1 <= antenna <= 16):
-            if self.debug:
-                print("[ERRO] Número de antena inválido (1-16)")
-            return False
-
-        if not (0.0 <= read_power <= 33.0) or not (0.0 <= write_power <= 33.0):
+        try:
+            command = protocol.encode_set_power(antenna, read_power, write_power, save)
+        except ValueError as e:
             if self.debug:
-                print("[ERRO] Potência deve estar entre 0.0 e 33.0 dBm")
+                print(f"[ERRO] {e}")
             return False
 
-        # Status byte: bit1=1 para salvar, bit1=0 para não salvar
-        status = 0x02 if save else 0x00
-
-        # Converte potências (dBm * 100) com arredondamento
-        read_power_raw = int(round(read_power * 100))
-        write_power_raw = int(round(write_power * 100))
-
-        # Data: Status, Antenna, Read_MSB, Read_LSB, Write_MSB, Write_LSB
-        data = bytearray([
-            status,
-            antenna,
-            (read_power_raw >> 8) & 0xFF,
-            read_power_raw & 0xFF,
-            (write_power_raw >> 8) & 0xFF,
-            write_power_raw & 0xFF
-        ])
-
-        # Frame length = header(2) + len(2) + cmd(1) + data + bcc(1) + end(2)
-        frame_len = 2 + 2 + 1 + len(data) + 1 + 2
-
-        command = bytearray([
-            0xC8, 0x8C,
-            (frame_len >> 8) & 0xFF, frame_len & 0xFF,  # MSB, LSB corretos
-            0x10
-        ])
-        command.extend(data)
-
-        # BCC: XOR de tudo após header (length + cmd + data)
-        bcc = 0
-        for b in command[2:]:
-            bcc ^= b
-        command.append(bcc)
-
-        command.extend([0x0D, 0x0A])
-
         if self.debug:
             print(f"[DEBUG] Configurando potência da antena {antenna}: R={read_power}dBm W={write_power}dBm")
-            print(f"[DEBUG] Frame length calculado: {frame_len} bytes")
             print(f"[DEBUG] Comando: {' '.join(f'{b:02X}' for b in command)}")
-            print(f"[DEBUG] BCC calculado: 0x{bcc:02X}")
 
-        response = self.run_control_command(bytes(command), timeout=1.0)
+        response = self.run_control_command(command, timeout=1.0)
 
         if self.debug:
             if response:
@@ -686,11 +793,10 @@ class UR4Reader:
             else:
                 print(f"[DEBUG] Sem resposta do set_power")
 
-        if not response or len(response) < 9:
-            return False
-
         # Verifica resposta de sucesso (0x01 = sucesso)
-        if response[4] == CMD_SET_POWER_RESPONSE and response[5] == 0x01:
+        result = protocol.decode_set_result(response, CMD_SET_POWER_RESPONSE) if response else None
+        if result and result.ok:
+            self.invalidate_properties('antenna_powers')
             if self.debug:
                 print(f"[OK] Potência da antena {antenna} configurada com sucesso!")
             return True
@@ -704,55 +810,78 @@ class UR4Reader:
         if not self.is_connected():
             return False
 
-        if not antennas or not all(1 <= ant <= 16 for ant in antennas):
+        try:
+            command = protocol.encode_set_antennas(antennas, save)
+        except ValueError as e:
             if self.debug:
-                print("[ERRO] Números de antena inválidos (1-16)")
+                print(f"[ERRO] {e}")
             return False
 
-        # DByte2: 0x01 para salvar, 0x00 para não salvar
-        dbyte2 = 0x01 if save else 0x00
-
-        # Bits representando antenas (bit0=ant1, bit1=ant2, etc)
-        antenna_bits = 0
-        for ant in antennas:
-            antenna_bits |= (1 << (ant - 1))
-
-        dbyte1 = (antenna_bits >> 8) & 0xFF
-        dbyte0 = antenna_bits & 0xFF
-
-        # Monta comando (mantido)
-        command = bytearray([
-            0xC8, 0x8C,  # Header
-            0x00, 0x0B,  # Length
-            0x28,        # CMD
-            dbyte2,
-            dbyte1,
-            dbyte0
-        ])
-
-        # BCC (já correto)
-        bcc = 0
-        for b in command[2:]:
-            bcc ^= b
-        command.append(bcc)
+        response = self.run_control_command(command, timeout=1.0)
 
-        command.extend([0x0D, 0x0A])
-
-        response = self.run_control_command(bytes(command), timeout=1.0)
-
-        if not response or len(response) < 9:
-            return False
-
-        if response[4] == CMD_SET_ANTENNA_RESPONSE and response[5] == 0x01:
+        result = protocol.decode_set_result(response, CMD_SET_ANTENNA_RESPONSE) if response else None
+        if result and result.ok:
+            self.invalidate_properties('active_antennas', 'antenna_powers')
             if self.debug:
                 print(f"[OK] Antenas configuradas: {antennas}")
             return True
 
         return False
 
-    def get_reader_info(self) -> Dict[str, any]:
+    # ---------------------------
+    # Cache de propriedades
+    # ---------------------------
+    def get_cached_property(self, name: str, fetch: Callable[[], any], refresh: bool = False):
+        """
+        Retorna uma propriedade do dispositivo, consultando o hardware apenas
+        se o valor em cache estiver ausente ou expirado
+
+        Args:
+            name: Nome da propriedade (chave de property_ttls)
+            fetch: Função que lê a propriedade do dispositivo
+            refresh: Ignora o cache e consulta o dispositivo
+
+        Returns:
+            Valor da propriedade ou None (falhas de leitura não são cacheadas)
+        """
+        ttl = self.property_ttls.get(name, 0)
+        with self._properties_lock:
+            cached = self._properties.get(name)
+        if cached and not refresh and time.monotonic() - cached[1] < ttl:
+            return cached[0]
+
+        value = fetch()
+        if value is not None:
+            with self._properties_lock:
+                self._properties[name] = (value, time.monotonic())
+        elif cached and not refresh:
+            # Mantém o último valor conhecido se a leitura falhar
+            return cached[0]
+        return value
+
+    def invalidate_properties(self, *names: str):
+        """Descarta propriedades em cache (todas, se nenhum nome for informado)"""
+        with self._properties_lock:
+            if not names:
+                self._properties.clear()
+            for name in names:
+                self._properties.pop(name, None)
+
+    def stale_properties(self) -> List[str]:
+        """Lista as propriedades ausentes ou expiradas no cache"""
+        now = time.monotonic()
+        with self._properties_lock:
+            return [name for name, ttl in self.property_ttls.items()
+                    if name not in self._properties or now - self._properties[name][1] >= ttl]
+
+    def get_reader_info(self, refresh: bool = False) -> Dict[str, any]:
         """
         Obtém informações completas do leitor
+
+        Propriedades ainda válidas no cache não geram comandos ao dispositivo.
+
+        Args:
+            refresh: Ignora o cache e consulta todas as propriedades
         """
         info = {
             'connected': self.is_connected(),
@@ -770,19 +899,19 @@ class UR4Reader:
         if not self.is_connected():
             return info
 
-        serial_num = self.get_serial_number()
+        serial_num = self.get_cached_property('module_id', self.get_serial_number, refresh)
         if serial_num:
             info['serial_number'] = serial_num
 
-        powers = self.get_antenna_power()
+        powers = self.get_cached_property('antenna_powers', self.get_antenna_power, refresh)
         if powers:
             info['antenna_powers'] = powers
             info['active_antennas'] = sorted(list(powers.keys()))
             info['antenna_count'] = len(powers)
         else:
-            antennas = self.get_active_antennas()
+            antennas = self.get_cached_property('active_antennas', self.get_active_antennas, refresh)
             if antennas:
-                physical_antennas = [a for a in antennas if 1 <= a <= 8]
+                physical_antennas = [a for a in antennas if 1 <= a <= protocol.MAX_ANTENNAS]
                 info['active_antennas'] = physical_antennas
                 info['antenna_count'] = len(physical_antennas)
 
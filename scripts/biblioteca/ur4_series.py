@@ -0,0 +1,164 @@
+"""
+UR4 Read Series
+===============
+
+Séries temporais por antena para ajuste de potência: leituras, EPCs
+distintos e RSSI mín/médio/máx em três resoluções (segundo, minuto e
+hora), cada uma em um buffer circular de tamanho fixo.
+
+Cada leitura entra direto nas três resoluções (o minuto e a hora são a
+mesma agregação em baldes mais largos, com mín/máx/soma exatos). Um
+balde reaproveitado pelo anel é zerado antes de receber dados, então a
+memória não cresce com o tempo de execução: só os EPCs distintos do
+balde aberto de cada resolução ficam em um conjunto, descartado quando
+o balde fecha.
+
+Uso:
+    series = ReadSeries()
+    reader = UR4Reader(port='COM4', series=series)
+    ...
+    series.snapshot()  # arrays compactos para gráficos
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+# Resolução -> (largura do balde em segundos, quantidade de baldes)
+RESOLUTIONS = {
+    'second': (1, 300),    # 5 minutos
+    'minute': (60, 180),   # 3 horas
+    'hour': (3600, 168),   # 7 dias
+}
+
+
+class RingSeries:
+    """
+    Buffer circular de baldes de largura fixa
+
+    Cada posição guarda o número do balde (instante // largura) a que
+    pertence; posições de baldes antigos são zeradas ao serem reusadas e
+    tratadas como vazias na leitura.
+    """
+
+    __slots__ = ('width', 'slots', 'bucket', 'count', 'unique', 'rssi_min', 'rssi_sum', 'rssi_max',
+                 '_open_bucket', '_open_epcs')
+
+    def __init__(self, width: int, slots: int):
+        self.width = width
+        self.slots = slots
+        self.bucket = [-1] * slots
+        self.count = [0] * slots
+        self.unique = [0] * slots
+        self.rssi_min = [0] * slots
+        self.rssi_sum = [0] * slots
+        self.rssi_max = [0] * slots
+        self._open_bucket = -1
+        self._open_epcs: Set[bytes] = set()
+
+    def add(self, now: float, epc: bytes, rssi_raw: int):
+        bucket = int(now // self.width)
+        i = bucket % self.slots
+        if self.bucket[i] != bucket:
+            self.bucket[i] = bucket
+            self.count[i] = 0
+            self.unique[i] = 0
+            self.rssi_min[i] = rssi_raw
+            self.rssi_sum[i] = 0
+            self.rssi_max[i] = rssi_raw
+        if bucket != self._open_bucket:
+            self._open_bucket = bucket
+            self._open_epcs = set()
+
+        self.count[i] += 1
+        self.rssi_sum[i] += rssi_raw
+        if rssi_raw < self.rssi_min[i]:
+            self.rssi_min[i] = rssi_raw
+        elif rssi_raw > self.rssi_max[i]:
+            self.rssi_max[i] = rssi_raw
+        if epc not in self._open_epcs:
+            self._open_epcs.add(epc)
+            self.unique[i] += 1
+
+    def arrays(self, now: float) -> dict:
+        """Baldes do mais antigo ao atual (vazios com contagem 0 e RSSI null)"""
+        last = int(now // self.width)
+        first = last - self.slots + 1
+        count, unique, rssi_min, rssi_mean, rssi_max = [], [], [], [], []
+        for bucket in range(first, last + 1):
+            i = bucket % self.slots
+            if self.bucket[i] != bucket or not self.count[i]:
+                count.append(0)
+                unique.append(0)
+                rssi_min.append(None)
+                rssi_mean.append(None)
+                rssi_max.append(None)
+                continue
+            count.append(self.count[i])
+            unique.append(self.unique[i])
+            rssi_min.append(self.rssi_min[i] / 10.0)
+            rssi_mean.append(round(self.rssi_sum[i] / self.count[i] / 10.0, 1))
+            rssi_max.append(self.rssi_max[i] / 10.0)
+        return {
+            'start': first * self.width,  # Início do primeiro balde (segundos da época)
+            'width': self.width,
+            'count': count,
+            'unique': unique,
+            'rssi_min': rssi_min,
+            'rssi_mean': rssi_mean,
+            'rssi_max': rssi_max,
+        }
+
+
+class ReadSeries:
+    """
+    Séries por antena em todas as resoluções (thread-safe)
+
+    Args:
+        resolutions: Nome -> (largura em segundos, baldes); padrão RESOLUTIONS
+        clock: Relógio em segundos da época (time.time)
+    """
+
+    def __init__(self, resolutions: Optional[Dict[str, tuple]] = None, clock=time.time):
+        self.resolutions = dict(resolutions or RESOLUTIONS)
+        self.clock = clock
+        self._antennas: Dict[int, Dict[str, RingSeries]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, antenna: int, epc: bytes, rssi_raw: int, now: Optional[float] = None):
+        """Registra uma leitura (RSSI em décimos de dBm, como no frame)"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            rings = self._antennas.get(antenna)
+            if rings is None:
+                rings = self._antennas[antenna] = {
+                    name: RingSeries(width, slots) for name, (width, slots) in self.resolutions.items()
+                }
+            for ring in rings.values():
+                ring.add(now, epc, rssi_raw)
+
+    def antennas(self) -> List[int]:
+        with self._lock:
+            return sorted(self._antennas)
+
+    def snapshot(self, resolutions: Optional[Iterable[str]] = None,
+                 antennas: Optional[Iterable[int]] = None) -> dict:
+        """
+        Arrays compactos para gráficos
+
+        Returns:
+            {'generated_at': s, 'antennas': {'<antena>': {'<resolução>': {start, width,
+             count, unique, rssi_min, rssi_mean, rssi_max}}}}
+        """
+        now = self.clock()
+        names = list(resolutions or self.resolutions)
+        with self._lock:
+            selected = sorted(self._antennas) if antennas is None else \
+                [antenna for antenna in antennas if antenna in self._antennas]
+            return {
+                'generated_at': now,
+                'antennas': {
+                    str(antenna): {name: self._antennas[antenna][name].arrays(now) for name in names}
+                    for antenna in selected
+                },
+            }
@@ -0,0 +1,145 @@
+"""
+UR4 Zone Map
+============
+
+Mapa de zonas: o que cada antena significa na linha de produção,
+compartilhado pelo leitor (rfid_reader.py, modo edge) e pela API.
+
+Cada antena (1-16, mais a 0 reportada por alguns firmwares) pertence a
+uma estação e tem um papel: 'inicio' abre a sessão de produção da
+etiqueta na estação e 'fim' finaliza a sessão aberta naquela estação.
+Um único UR4 atende assim várias estações em paralelo.
+
+Uma etiqueta tem no máximo uma sessão em produção em toda a planta: o
+início em outra estação não abre uma segunda sessão (a já aberta continua
+na estação de origem) e o fim só finaliza a sessão da própria estação.
+Etiqueta produzida em qualquer estação fica bloqueada em todas.
+
+config.json:
+    "zones": {
+        "1": {"station": "linha_a", "role": "inicio"},
+        "2": {"station": "linha_a", "role": "fim"},
+        "3": {"station": "linha_b", "role": "inicio"},
+        "4": {"station": "linha_b", "role": "fim"}
+    },
+    "antenna3_enabled": true,
+    "antenna3_power": 20
+
+Sem "zones" vale o mapa original: antena 1 inicia e antenas 0 e 2
+finalizam, na estação "portal". Antenas fora do mapa são ignoradas nas
+sessões (a leitura só fica registrada como evento).
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+MAX_ANTENNAS = 16  # Mesmo limite de ur4_protocol
+
+ROLE_START = 'inicio'
+ROLE_FINISH = 'fim'
+ROLES = (ROLE_START, ROLE_FINISH)
+
+DEFAULT_STATION = 'portal'
+DEFAULT_POWER = 5
+
+
+class Zone(NamedTuple):
+    station: str
+    role: str
+
+
+DEFAULT_ZONES: Dict[int, Zone] = {
+    0: Zone(DEFAULT_STATION, ROLE_FINISH),
+    1: Zone(DEFAULT_STATION, ROLE_START),
+    2: Zone(DEFAULT_STATION, ROLE_FINISH),
+}
+
+
+def parse_zones(raw: Optional[dict]) -> Dict[int, Zone]:
+    """
+    Valida o mapa de zonas do config.json
+
+    Args:
+        raw: Valor de config['zones'] ({"<antena>": {"station": ..., "role": ...}})
+
+    Returns:
+        Dict antena -> Zone (o mapa padrão se raw for vazio)
+
+    Raises:
+        ValueError: antena fora de 0-16, papel desconhecido, estação vazia ou
+            estação sem antena de início ou de fim
+    """
+    if not raw:
+        return dict(DEFAULT_ZONES)
+    if not isinstance(raw, dict):
+        raise ValueError("zones deve ser um objeto {antena: {station, role}}")
+
+    zones = {}
+    for key, entry in raw.items():
+        try:
+            antenna = int(key)
+        except (TypeError, ValueError):
+            raise ValueError(f"Antena inválida no mapa de zonas: {key!r}")
+        if not 0 <= antenna <= MAX_ANTENNAS:
+            raise ValueError(f"Antena fora de 0-{MAX_ANTENNAS} no mapa de zonas: {antenna}")
+        if not isinstance(entry, dict):
+            raise ValueError(f"Zona da antena {antenna} deve ser um objeto {{station, role}}")
+        station = str(entry.get('station') or '').strip()
+        role = entry.get('role')
+        if not station:
+            raise ValueError(f"Antena {antenna} sem estação no mapa de zonas")
+        if role not in ROLES:
+            raise ValueError(f"Papel inválido para a antena {antenna}: {role!r} (use {' ou '.join(ROLES)})")
+        zones[antenna] = Zone(station, role)
+
+    for station in stations(zones):
+        roles = {zone.role for zone in zones.values() if zone.station == station}
+        if roles != set(ROLES):
+            raise ValueError(f"Estação '{station}' precisa de antenas de início e de fim")
+    return zones
+
+
+def zones_to_config(zones: Dict[int, Zone]) -> dict:
+    """Formato gravado no config.json"""
+    return {str(antenna): zone._asdict() for antenna, zone in sorted(zones.items())}
+
+
+def load_zones(config: dict) -> Dict[int, Zone]:
+    return parse_zones(config.get('zones'))
+
+
+def stations(zones: Dict[int, Zone]) -> List[str]:
+    """Estações do mapa, na ordem das antenas"""
+    seen = []
+    for _, zone in sorted(zones.items()):
+        if zone.station not in seen:
+            seen.append(zone.station)
+    return seen
+
+
+def configured_antennas(config: dict, zones: Optional[Dict[int, Zone]] = None) -> List[int]:
+    """Antenas físicas (1-16) citadas no mapa de zonas ou com antennaN_* no config"""
+    zones = load_zones(config) if zones is None else zones
+    antennas = {antenna for antenna in zones if antenna >= 1}
+    antennas.update(antenna for antenna in range(1, MAX_ANTENNAS + 1)
+                    if f'antenna{antenna}_enabled' in config or f'antenna{antenna}_power' in config)
+    return sorted(antennas)
+
+
+def enabled_antennas(config: dict, zones: Optional[Dict[int, Zone]] = None) -> List[int]:
+    """Antenas a ativar no dispositivo (padrão: ativas se estiverem no mapa de zonas)"""
+    zones = load_zones(config) if zones is None else zones
+    return [antenna for antenna in configured_antennas(config, zones)
+            if config.get(f'antenna{antenna}_enabled', antenna in zones)]
+
+
+def antenna_power(config: dict, antenna: int) -> int:
+    return int(config.get(f'antenna{antenna}_power', DEFAULT_POWER))
+
+
+def antenna_keys(antennas: Iterable[int] = range(1, MAX_ANTENNAS + 1)) -> Dict[str, type]:
+    """Chaves antennaN_enabled/antennaN_power aceitas no config e seus tipos"""
+    keys = {}
+    for antenna in antennas:
+        keys[f'antenna{antenna}_enabled'] = bool
+        keys[f'antenna{antenna}_power'] = int
+    return keys
@@ -0,0 +1,343 @@
+"""
+Portal RFID - Sessões na borda
+Motor de sessões de produção executado no processo do leitor (modo --edge)
+
+As mesmas regras de register_rfid_event (mapa de zonas do config.json:
+antena de início abre e antena de fim finaliza a sessão da estação,
+etiqueta já produzida é bloqueada) rodam localmente sobre um
+estado persistido em SQLite. Só o início e o fim de cada sessão vão para a
+API, por uma fila (outbox) gravada no mesmo banco e enviada em lotes por
+uma thread própria, de modo que lentidão ou queda da API não atrasa o
+portal. A API valida cada registro de forma idempotente pelo edge_id.
+
+Com PORTAL_SESSION_EXPIRY_MIN (o mesmo da API, backend/session_sweeper.py)
+as sessões locais em produção expiram com a mesma idade: a etiqueta que
+volta à antena de início depois disso abre uma sessão nova, como no modo
+API, em vez de continuar presa à sessão que a API já expirou.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+import ur4_zones
+
+# Timezone de Brasília (UTC-3), o mesmo usado pela API
+BRASILIA_TZ = timezone(timedelta(hours=-3))
+
+TAG_LENGTH = 24
+
+EXPIRED_STATUS = 'expirado'
+
+# Resultados de process()
+STARTED = 'inicio'
+COMPLETED = 'fim'
+ALREADY_ACTIVE = 'ja_ativa'
+BLOCKED = 'bloqueada'
+NO_SESSION = 'sem_sessao'
+INVALID = 'invalida'
+
+
+def brasilia_now() -> datetime:
+    return datetime.now(BRASILIA_TZ)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class EdgeStateStore:
+    """
+    Estado local das sessões e fila de envio (SQLite)
+
+    Tabelas:
+        sessions: uma linha por sessão (edge_id, tag, horários, status)
+        outbox:   registros de início/fim ainda não confirmados pela API
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                edge_id TEXT PRIMARY KEY,
+                tag_id TEXT NOT NULL,
+                antenna_1_time TEXT NOT NULL,
+                antenna_2_time TEXT,
+                status TEXT NOT NULL,
+                station TEXT
+            );
+            CREATE INDEX IF NOT EXISTS ix_sessions_tag ON sessions (tag_id, status);
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        # Estados criados antes do mapa de zonas: sessões abertas ficam na estação padrão
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if 'station' not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN station TEXT")
+            self._conn.execute("UPDATE sessions SET station = ?", (ur4_zones.DEFAULT_STATION,))
+
+    def find(self, tag_id: str, status: str, station: Optional[str] = None) -> Optional[dict]:
+        """Sessão da etiqueta com o status (em qualquer estação, se station for None)"""
+        query = ("SELECT edge_id, tag_id, antenna_1_time, antenna_2_time, status, station FROM sessions "
+                 "WHERE tag_id = ? AND status = ?")
+        params = (tag_id, status)
+        if station is not None:
+            query += " AND station = ?"
+            params += (station,)
+        with self._lock:
+            row = self._conn.execute(query + " LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('edge_id', 'tag_id', 'antenna_1_time', 'antenna_2_time', 'status', 'station'), row))
+
+    def start(self, tag_id: str, when: datetime, station: str = ur4_zones.DEFAULT_STATION,
+              antenna: int = 1) -> dict:
+        """Cria a sessão e enfileira o início na mesma transação"""
+        record = {'edge_id': uuid.uuid4().hex, 'kind': 'start', 'tag_id': tag_id,
+                  'antenna_1_time': when.isoformat(), 'antenna_2_time': None,
+                  'station': station, 'antenna_number': antenna}
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute(
+                    "INSERT INTO sessions (edge_id, tag_id, antenna_1_time, status, station) "
+                    "VALUES (?, ?, ?, 'em_producao', ?)",
+                    (record['edge_id'], tag_id, record['antenna_1_time'], station)
+                )
+                self._conn.execute("INSERT INTO outbox (payload) VALUES (?)", (json.dumps(record),))
+        return record
+
+    def complete(self, session: dict, when: datetime, antenna: int = 2) -> dict:
+        """Finaliza a sessão e enfileira o fim na mesma transação"""
+        record = {'edge_id': session['edge_id'], 'kind': 'complete', 'tag_id': session['tag_id'],
+                  'antenna_1_time': session['antenna_1_time'], 'antenna_2_time': when.isoformat(),
+                  'station': session.get('station'), 'antenna_number': antenna}
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute(
+                    "UPDATE sessions SET antenna_2_time = ?, status = 'finalizado' WHERE edge_id = ?",
+                    (record['antenna_2_time'], record['edge_id'])
+                )
+                self._conn.execute("INSERT INTO outbox (payload) VALUES (?)", (json.dumps(record),))
+        return record
+
+    def set_status(self, edge_id: str, status: str):
+        with self._lock:
+            self._conn.execute("UPDATE sessions SET status = ? WHERE edge_id = ?", (status, edge_id))
+
+    def forget(self, edge_id: str):
+        """Remove a sessão local (ex: cancelada na API)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE edge_id = ?", (edge_id,))
+
+    def pending(self, limit: int = 100) -> List[tuple]:
+        """Próximos registros da fila, na ordem de criação: [(id, payload)]"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload FROM outbox ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def acknowledge(self, ids: List[int]):
+        if not ids:
+            return
+        with self._lock:
+            self._conn.execute(
+                f"DELETE FROM outbox WHERE id IN ({','.join('?' * len(ids))})", ids
+            )
+
+    def mark_attempt(self, ids: List[int]):
+        if not ids:
+            return
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE outbox SET attempts = attempts + 1 WHERE id IN ({','.join('?' * len(ids))})", ids
+            )
+
+    def backlog(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EdgeSessionEngine:
+    """
+    Regras de sessão de register_rfid_event aplicadas localmente
+
+    process() não faz I/O de rede: decide com base no estado local e
+    grava a sessão e o registro da fila em uma única transação.
+
+    Args:
+        zones: Mapa de zonas (ur4_zones); pode ser trocado em execução
+            quando o config.json muda
+        max_age_minutes: Idade a partir da qual uma sessão local em produção
+            expira (padrão: PORTAL_SESSION_EXPIRY_MIN; 0 desliga)
+    """
+
+    def __init__(self, store: EdgeStateStore, clock: Callable[[], datetime] = brasilia_now,
+                 zones: Optional[Dict[int, ur4_zones.Zone]] = None,
+                 max_age_minutes: Optional[float] = None):
+        self.store = store
+        self.clock = clock
+        self.zones = zones if zones is not None else dict(ur4_zones.DEFAULT_ZONES)
+        self.max_age_minutes = _env_float('PORTAL_SESSION_EXPIRY_MIN', 0) \
+            if max_age_minutes is None else max_age_minutes
+
+    def _active(self, tag_id: str, station: Optional[str] = None) -> Optional[dict]:
+        """Sessão em produção da etiqueta; expira localmente a que passou da idade máxima"""
+        session = self.store.find(tag_id, 'em_producao', station)
+        if session is None or self.max_age_minutes <= 0:
+            return session
+        started_at = datetime.fromisoformat(session['antenna_1_time'])
+        if self.clock() - started_at > timedelta(minutes=self.max_age_minutes):
+            # Mesma regra do session_sweeper da API: a sessão não conta como produzida
+            self.store.set_status(session['edge_id'], EXPIRED_STATUS)
+            return None
+        return session
+
+    def process(self, tag_id: str, antenna: int) -> str:
+        if len(tag_id) != TAG_LENGTH:
+            return INVALID
+
+        zone = self.zones.get(antenna)
+        if zone is None:
+            return NO_SESSION
+
+        if zone.role == ur4_zones.ROLE_START:
+            if self.store.find(tag_id, 'finalizado'):
+                return BLOCKED
+            if self._active(tag_id):
+                return ALREADY_ACTIVE
+            self.store.start(tag_id, self.clock(), zone.station, antenna)
+            return STARTED
+
+        session = self._active(tag_id, zone.station)
+        if session is None:
+            return NO_SESSION
+        self.store.complete(session, self.clock(), antenna)
+        return COMPLETED
+
+
+class EdgeUploader:
+    """
+    Envia a fila de início/fim de sessões para a API em lotes
+
+    Registros só saem da fila quando a API responde; em caso de falha o
+    envio é repetido com espera exponencial (até max_backoff segundos).
+
+    Args:
+        store: Estado local com a fila
+        url: Endpoint POST /api/edge/sessions
+        portal_id: Identificação do portal enviada em cada lote
+        batch_size: Registros por requisição
+    """
+
+    def __init__(self, store: EdgeStateStore, url: str, portal_id: str,
+                 batch_size: int = 100, timeout: float = 5.0, max_backoff: float = 30.0):
+        self.store = store
+        self.url = url
+        self.portal_id = portal_id
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.stats: Dict[str, int] = {'enviados': 0, 'falhas': 0, 'bloqueados': 0, 'ausentes': 0,
+                                      'expirados': 0, 'recusados': 0}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="edge-uploader", daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        """Acorda o envio (chamado após enfileirar um registro)"""
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        """Tenta esvaziar a fila antes de parar; o que sobrar fica persistido"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def flush_once(self) -> bool:
+        """Envia um lote; retorna False se a API não respondeu"""
+        batch = self.store.pending(self.batch_size)
+        if not batch:
+            return True
+        ids = [row_id for row_id, _ in batch]
+        try:
+            response = requests.post(
+                self.url,
+                json={'portal_id': self.portal_id, 'records': [record for _, record in batch]},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            results = response.json().get('results', [])
+        except Exception as e:
+            self.store.mark_attempt(ids)
+            self.stats['falhas'] += 1
+            print(f"   🔌 Envio de sessões adiado ({len(ids)} na fila): {e}")
+            return False
+
+        for (_, record), result in zip(batch, results):
+            status = result.get('status')
+            if status == 'blocked':
+                # Etiqueta já produzida segundo a API: bloquear também localmente
+                self.store.set_status(record['edge_id'], 'finalizado')
+                self.stats['bloqueados'] += 1
+            elif status == 'missing':
+                # Sessão cancelada na API: liberar a etiqueta localmente
+                self.store.forget(record['edge_id'])
+                self.stats['ausentes'] += 1
+            elif status == 'expired':
+                # Sessão expirada na API: não conta como produzida, a etiqueta fica livre
+                self.store.forget(record['edge_id'])
+                self.stats['expirados'] += 1
+            elif status in ('invalid', 'error'):
+                # Recusado pela API: reenviar não adianta, o registro sai da fila
+                self.stats['recusados'] += 1
+                print(f"   ⚠️ Registro {record.get('edge_id')} recusado pela API: {result.get('error', status)}")
+        self.store.acknowledge(ids[:len(results)])
+        self.stats['enviados'] += len(results)
+        return True
+
+    def _run(self):
+        backoff = 1.0
+        while True:
+            ok = self.flush_once()
+            if self._stop.is_set() and (not ok or not self.store.backlog()):
+                return
+            if not ok:
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = 1.0
+            if self.store.backlog():
+                continue
+            self._wake.wait(5.0)
+            self._wake.clear()
@@ -16,6 +16,10 @@ import threading
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'biblioteca'))
 
 from ur4_reader import UR4Reader, detect_serial_port, list_serial_ports
+import ur4_zones
+from ur4_series import ReadSeries
+from edge_sessions import (EdgeStateStore, EdgeSessionEngine, EdgeUploader,
+                           STARTED, COMPLETED, ALREADY_ACTIVE, BLOCKED, INVALID)
 
 # Configurações da API
 try:
@@ -24,9 +28,14 @@ try:
 except ImportError:
     API_HOST = "localhost"
     API_PORT = 8000
+API_HOST = os.environ.get('PORTAL_API_HOST', API_HOST)
+API_PORT = int(os.environ.get('PORTAL_API_PORT', API_PORT))
 
 API_URL = f"http://{API_HOST}:{API_PORT}/api/rfid/event"
+EDGE_API_URL = f"http://{API_HOST}:{API_PORT}/api/edge/sessions"
+HEALTH_URL = f"http://{API_HOST}:{API_PORT}/health"
 TIMEOUT_HTTP = 5
+API_READY_TIMEOUT = 30  # Tempo máximo esperando a API subir antes de iniciar o inventário
 
 # Configurações do Portal
 LOCAL_PORTAL = 'Biamar - Linha de Produção'
@@ -37,18 +46,88 @@ DEVICE_INFO_FILE = os.path.join(os.path.dirname(__file__), '..', 'database', 'de
 REFRESH_SIGNAL_FILE = os.path.join(os.path.dirname(__file__), '..', 'database', 'refresh_signal.txt')
 CONFIG_CHANGED_FILE = os.path.join(os.path.dirname(__file__), '..', 'database', 'config_changed.txt')
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), '..', 'database', 'config.json')
+EDGE_STATE_FILE = os.path.join(os.path.dirname(__file__), '..', 'database', 'edge_state.db')
+SERIES_FILE = os.path.join(os.path.dirname(__file__), '..', 'database', 'read_series.json')
+SERIES_WRITE_INTERVAL = 2  # Segundos entre gravações das séries por antena (lidas pela API)
 
 # Estatísticas
 stats = {
     'total_tags': 0,
     'inicio': 0,
     'fim': 0,
-    'erros_api': 0
+    'erros_api': 0,
+    'bloqueadas': 0
 }
 
+# Modo edge (--edge): motor de sessões local e envio em segundo plano
+edge_engine = None
+edge_uploader = None
 
-def save_device_info(reader, port, force_debug=False):
-    """Salva informações do dispositivo em arquivo JSON"""
+# Mapa de zonas do config.json: (mtime/tamanho do arquivo, mapa)
+_zones_cache = (None, ur4_zones.DEFAULT_ZONES)
+
+
+def load_config():
+    """Lê o config.json (dict vazio se ausente)"""
+    if not os.path.exists(CONFIG_FILE):
+        return {}
+    with open(CONFIG_FILE, 'r') as f:
+        return json.load(f)
+
+
+def current_zones():
+    """Mapa de zonas (antena -> estação/papel), relido só quando o config.json muda"""
+    global _zones_cache
+    try:
+        st = os.stat(CONFIG_FILE)
+        version = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        version = None
+    if _zones_cache[0] != version:
+        try:
+            zones = ur4_zones.load_zones(load_config())
+        except ValueError as e:
+            print(f"⚠️ Mapa de zonas inválido no config.json ({e}), usando o padrão")
+            zones = dict(ur4_zones.DEFAULT_ZONES)
+        _zones_cache = (version, zones)
+    return _zones_cache[1]
+
+
+def _device_info_changed(device_info):
+    """Compara com o device_info.json atual, ignorando o campo last_update"""
+    try:
+        with open(DEVICE_INFO_FILE, 'r') as f:
+            current = json.load(f)
+    except Exception:
+        return True
+    current.pop('last_update', None)
+    candidate = {k: v for k, v in device_info.items() if k != 'last_update'}
+    return current != candidate
+
+
+def _touch_device_info():
+    """Marca o device_info.json como verificado agora sem reescrever o conteúdo"""
+    try:
+        os.utime(DEVICE_INFO_FILE, None)
+    except OSError:
+        pass
+
+
+def save_device_info(reader, port, force_debug=False, refresh=False):
+    """
+    Salva informações do dispositivo em arquivo JSON
+
+    As propriedades vêm do cache do UR4Reader (o dispositivo só é consultado
+    para propriedades expiradas) e o arquivo só é reescrito quando algum
+    valor muda; caso contrário apenas o mtime é atualizado, que a API usa
+    para saber se a informação está recente.
+
+    Args:
+        reader: UR4Reader conectado
+        port: Porta serial em uso
+        force_debug: Ativa logs detalhados durante a coleta
+        refresh: Ignora o cache e consulta todas as propriedades
+    """
     try:
         # Verificar se o reader está conectado (is_connected é FUNÇÃO)
         if not reader or not hasattr(reader, 'is_connected') or not reader.is_connected():
@@ -69,24 +148,12 @@ def save_device_info(reader, port, force_debug=False):
         old_debug = getattr(reader, 'debug', False)
         if force_debug:
             reader.debug = True
+            print(f"\n📊 DEBUG - Propriedades expiradas no cache: {reader.stale_properties()}")
         
-        # Aguardar dispositivo estar pronto
-        time.sleep(0.5)
-        
-        # Tentar ler potências diretamente
-        if force_debug:
-            print(f"\n📊 DEBUG - Tentando ler potências das antenas...")
-        powers = reader.get_antenna_power()
-        if force_debug:
-            print(f"   Resultado de get_antenna_power(): {powers}")
-        
-        # Pequeno delay entre comandos
-        time.sleep(0.3)
-        
-        # Obter informações completas
+        # Obter informações completas (apenas propriedades expiradas tocam o dispositivo)
         if force_debug:
             print(f"\n📊 DEBUG - Obtendo informações completas do reader...")
-        info = reader.get_reader_info()
+        info = reader.get_reader_info(refresh=refresh)
         
         # Restaurar debug
         reader.debug = old_debug
@@ -98,6 +165,14 @@ def save_device_info(reader, port, force_debug=False):
             print(f"   Port: {info.get('port', 'N/A')}")
             print(f"   Firmware: {info.get('firmware_version', 'N/A')}")
         
+        # Antenas do mapa de zonas habilitadas no config.json
+        try:
+            config = load_config()
+        except (ValueError, OSError):
+            config = {}
+        zones = current_zones()
+        configured = ur4_zones.enabled_antennas(config, zones) or [1, 2]
+        
         # Extrair potências das antenas
         antenna_powers = info.get('antenna_powers', {})
         
@@ -108,17 +183,14 @@ def save_device_info(reader, port, force_debug=False):
                 print(f"⚠️ Não foi possível ler potências das antenas, usando valores padrão")
             
             # Usar valores padrão sem tentar configurar o dispositivo
-            antenna_powers = {
-                1: {'read_power': 0.0, 'write_power': 0.0},
-                2: {'read_power': 0.0, 'write_power': 0.0}
-            }
+            antenna_powers = {antenna: {'read_power': 0.0, 'write_power': 0.0} for antenna in configured}
         
-        # Extrair potências das antenas 1 e 2
+        # Extrair potências das antenas 1 e 2 (campos usados pela tela)
         ant1_power = antenna_powers.get(1, {}).get('read_power', 5.0)
         ant2_power = antenna_powers.get(2, {}).get('read_power', 5.0)
         
-        # Forçar antenas 1 e 2 como ativas
-        active_antennas = [1, 2]
+        # Antenas ativas segundo o config (o dispositivo reporta todas as portas com potência)
+        active_antennas = configured
         
         # Module ID (retornado pelo dispositivo) vs Serial Number (gravado fisicamente)
         module_id = info.get('serial_number', 'N/A')
@@ -132,13 +204,22 @@ def save_device_info(reader, port, force_debug=False):
             "hardware_version": info.get('hardware_version', 'UR4 RFID Reader'),
             "antenna1_power": f"{ant1_power:.1f} dBm",
             "antenna2_power": f"{ant2_power:.1f} dBm",
+            "antenna_powers": {str(antenna): f"{antenna_powers.get(antenna, {}).get('read_power', 0.0):.1f} dBm"
+                               for antenna in active_antennas},
             "work_mode": info.get('work_mode', 'Active Mode'),
-            "antenna_count": 2,
+            "antenna_count": len(active_antennas),
             "active_antennas": active_antennas,
+            "zones": ur4_zones.zones_to_config(zones),
+            "outages": reader.get_outage_stats(),
             "last_update": datetime.now().isoformat(),
             "error": None
         }
         
+        # Sem mudanças: apenas renovar o mtime
+        if not _device_info_changed(device_info):
+            _touch_device_info()
+            return
+        
         # Criar diretório se não existir
         os.makedirs(os.path.dirname(DEVICE_INFO_FILE), exist_ok=True)
         
@@ -151,8 +232,8 @@ def save_device_info(reader, port, force_debug=False):
         print(f"   🆔 Module ID: {device_info['module_id']}")
         print(f"   🔌 Porta: {device_info['port']}")
         print(f"   💾 Firmware: {device_info['firmware_version']}")
-        print(f"   📶 Antena 1: {device_info['antenna1_power']}")
-        print(f"   📶 Antena 2: {device_info['antenna2_power']}")
+        for antenna, power in device_info['antenna_powers'].items():
+            print(f"   📶 Antena {antenna}: {power}")
         print(f"   📡 Antenas ativas: {device_info['active_antennas']}")
         
     except Exception as e:
@@ -167,14 +248,16 @@ def callback_rfid(epc: str, antenna: int, rssi: int):
     
     Args:
         epc: ID da tag RFID
-        antenna: Número da antena (1 ou 2)
+        antenna: Número da antena (1-16)
         rssi: Intensidade do sinal em dBm
     """
     global stats
     
-    # Determinar sentido baseado na antena
-    sentido = "inicio" if antenna == 1 else "fim"
-    emoji = "➡️" if antenna == 1 else "✅"
+    # Determinar sentido pelo papel da antena no mapa de zonas
+    zone = current_zones().get(antenna)
+    sentido = zone.role if zone else "sem zona"
+    emoji = {ur4_zones.ROLE_START: "➡️", ur4_zones.ROLE_FINISH: "✅"}.get(sentido, "❔")
+    estacao = f" | {zone.station}" if zone else ""
     
     # Preparar payload para API
     payload = {
@@ -185,7 +268,7 @@ def callback_rfid(epc: str, antenna: int, rssi: int):
     # Timestamp para log
     timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
     
-    print(f"{emoji} [{timestamp}] EPC: {epc} | {sentido.upper()} | Ant:{antenna} | RSSI:{rssi}dBm")
+    print(f"{emoji} [{timestamp}] EPC: {epc} | {sentido.upper()}{estacao} | Ant:{antenna} | RSSI:{rssi}dBm")
     
     # Enviar para API
     try:
@@ -198,9 +281,9 @@ def callback_rfid(epc: str, antenna: int, rssi: int):
         if response.status_code in [200, 201]:
             print(f"   ✅ Enviado com sucesso! (Status: {response.status_code})")
             stats['total_tags'] += 1
-            if antenna == 1:
+            if sentido == ur4_zones.ROLE_START:
                 stats['inicio'] += 1
-            else:
+            elif sentido == ur4_zones.ROLE_FINISH:
                 stats['fim'] += 1
         else:
             print(f"   ⚠️  Resposta inesperada: {response.status_code}")
@@ -217,6 +300,37 @@ def callback_rfid(epc: str, antenna: int, rssi: int):
         stats['erros_api'] += 1
 
 
+def callback_edge(epc: str, antenna: int, rssi: int):
+    """
+    Callback do modo edge: aplica as regras de sessão localmente
+
+    Nenhuma requisição é feita aqui; início e fim de sessão entram na fila
+    persistida e são enviados pela thread do EdgeUploader.
+    """
+    timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    edge_engine.zones = current_zones()
+    result = edge_engine.process(epc, antenna)
+
+    if result == STARTED:
+        print(f"➡️ [{timestamp}] EPC: {epc} | INICIO | Ant:{antenna} | RSSI:{rssi}dBm")
+        stats['inicio'] += 1
+    elif result == COMPLETED:
+        print(f"✅ [{timestamp}] EPC: {epc} | FIM | Ant:{antenna} | RSSI:{rssi}dBm")
+        stats['fim'] += 1
+    elif result == BLOCKED:
+        print(f"⛔ [{timestamp}] EPC: {epc} | ETIQUETA JÁ PRODUZIDA | Ant:{antenna}")
+        stats['bloqueadas'] += 1
+        return
+    elif result == INVALID:
+        print(f"⚠️ [{timestamp}] EPC: {epc} | Tag inválida (deve ter 24 caracteres)")
+        return
+    else:
+        return  # Sessão já ativa ou fim sem sessão: nada a enviar
+
+    stats['total_tags'] += 1
+    edge_uploader.notify()
+
+
 def mostrar_cabecalho():
     """Mostra informações iniciais"""
     print("=" * 70)
@@ -230,7 +344,7 @@ def mostrar_cabecalho():
     print("-" * 70)
 
 
-def mostrar_estatisticas():
+def mostrar_estatisticas(reader=None):
     """Mostra estatísticas finais"""
     print("\n" + "=" * 70)
     print("📊 ESTATÍSTICAS FINAIS:")
@@ -238,6 +352,17 @@ def mostrar_estatisticas():
     print(f"   ➡️  Início (Antena 1): {stats['inicio']}")
     print(f"   ✅  Fim (Antena 2): {stats['fim']}")
     print(f"   ❌  Erros de API: {stats['erros_api']}")
+    if edge_uploader is not None:
+        print(f"   ⛔  Bloqueadas (já produzidas): {stats['bloqueadas']}")
+        print(f"   📤  Sessões enviadas: {edge_uploader.stats['enviados']} "
+              f"(pendentes: {edge_uploader.store.backlog()}, falhas de envio: {edge_uploader.stats['falhas']})")
+    if reader is not None:
+        blind = reader.get_blind_window_stats()
+        print(f"   🙈  Inventário pausado por comandos: {blind['count']}x "
+              f"(total {blind['total_ms']:.0f} ms, máx {blind['max_ms']:.0f} ms)")
+        outages = reader.get_outage_stats()
+        print(f"   🔌  Quedas do dispositivo recuperadas: {outages['count']}x "
+              f"(total {outages['total_s']:.1f} s, máx {outages['max_s']:.1f} s)")
     print(f"   📍 Local: {LOCAL_PORTAL}")
     print("=" * 70)
 
@@ -249,19 +374,16 @@ def apply_config_to_device(reader):
             print(f"⚠️ Arquivo de configuração não encontrado")
             return False
         
-        with open(CONFIG_FILE, 'r') as f:
-            config = json.load(f)
+        config = load_config()
+        zones = ur4_zones.load_zones(config)
+        active_antennas = ur4_zones.enabled_antennas(config, zones)
         
         print(f"\n🔧 Aplicando configurações ao UR4...")
-        print(f"   Antena 1: {'Ativa' if config.get('antenna1_enabled', True) else 'Inativa'} @ {config.get('antenna1_power', 5)} dBm")
-        print(f"   Antena 2: {'Ativa' if config.get('antenna2_enabled', True) else 'Inativa'} @ {config.get('antenna2_power', 5)} dBm")
-        
-        # Configurar antenas ativas
-        active_antennas = []
-        if config.get('antenna1_enabled', True):
-            active_antennas.append(1)
-        if config.get('antenna2_enabled', True):
-            active_antennas.append(2)
+        for antenna in ur4_zones.configured_antennas(config, zones):
+            zone = zones.get(antenna)
+            print(f"   Antena {antenna}: {'Ativa' if antenna in active_antennas else 'Inativa'} @ "
+                  f"{ur4_zones.antenna_power(config, antenna)} dBm"
+                  f"{f' ({zone.station}/{zone.role})' if zone else ''}")
         
         if active_antennas:
             success = reader.set_active_antennas(active_antennas)
@@ -270,23 +392,14 @@ def apply_config_to_device(reader):
             else:
                 print(f"   ⚠️ Falha ao configurar antenas")
         
-        time.sleep(0.2)
-        
-        # Configurar potências
-        power1 = config.get('antenna1_power', 5)
-        power2 = config.get('antenna2_power', 5)
-        
-        if reader.set_antenna_power(antenna=1, read_power=power1, write_power=power1, save=True):
-            print(f"   ✅ Antena 1: {power1} dBm")
-        else:
-            print(f"   ⚠️ Falha ao configurar potência da antena 1")
-        
-        time.sleep(0.2)
-        
-        if reader.set_antenna_power(antenna=2, read_power=power2, write_power=power2, save=True):
-            print(f"   ✅ Antena 2: {power2} dBm")
-        else:
-            print(f"   ⚠️ Falha ao configurar potência da antena 2")
+        # Configurar potências (todas as antenas configuradas, ativas ou não)
+        for antenna in ur4_zones.configured_antennas(config, zones):
+            time.sleep(0.2)
+            power = ur4_zones.antenna_power(config, antenna)
+            if reader.set_antenna_power(antenna=antenna, read_power=power, write_power=power, save=True):
+                print(f"   ✅ Antena {antenna}: {power} dBm")
+            else:
+                print(f"   ⚠️ Falha ao configurar potência da antena {antenna}")
         
         print(f"✅ Configurações aplicadas com sucesso!")
         return True
@@ -296,11 +409,49 @@ def apply_config_to_device(reader):
         return False
 
 
+def write_series_periodically(series, interval=SERIES_WRITE_INTERVAL):
+    """Thread que grava as séries por antena em read_series.json (troca atômica do arquivo)"""
+    tmp_path = SERIES_FILE + '.tmp'
+    while True:
+        time.sleep(interval)
+        if not series.antennas():
+            continue
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(series.snapshot(), f, separators=(',', ':'))
+            os.replace(tmp_path, SERIES_FILE)
+        except OSError as e:
+            print(f"⚠️ Erro ao gravar séries das antenas: {e}")
+
+
+def wait_until(condition, timeout, interval=0.05):
+    """Espera a condição ficar verdadeira (retorna assim que ficar) ou o tempo acabar"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+    return True
+
+
+def api_ready():
+    try:
+        return requests.get(HEALTH_URL, timeout=1).json().get('status') == 'healthy'
+    except (requests.exceptions.RequestException, ValueError):
+        return False
+
+
 def update_device_info_periodically(reader, port, interval=120):
     """Thread para atualizar informações do dispositivo periodicamente"""
     last_signal_time = None
     last_config_time = None
     
+    # Primeira coleta só com o inventário já rodando, para não atrasar as primeiras leituras
+    wait_until(lambda: reader.is_reading, timeout=10)
+    print("📊 Coletando informações do dispositivo...")
+    save_device_info(reader, port)
+    update_device_info_periodically.last_update = time.time()
+    
     while True:
         time.sleep(5)  # Verifica a cada 5 segundos
         
@@ -356,7 +507,7 @@ def update_device_info_periodically(reader, port, interval=120):
             if force_update or time_since_last >= interval:
                 # Atualizar informações completas do dispositivo
                 # Debug apenas em atualizações forçadas (botão na UI)
-                save_device_info(reader, port, force_debug=force_update)
+                save_device_info(reader, port, force_debug=force_update, refresh=force_update)
                 update_device_info_periodically.last_update = current_time
                 
                 if not force_update:
@@ -368,12 +519,33 @@ def update_device_info_periodically(reader, port, interval=120):
 
 def main():
     """Função principal"""
+    global edge_engine, edge_uploader
     import argparse
     
     parser = argparse.ArgumentParser(description='Portal RFID Biamar UR4')
     parser.add_argument('--port', help='Porta serial (ex: COM4 ou /dev/ttyUSB0)')
     parser.add_argument('--list-ports', action='store_true', help='Lista portas disponíveis')
     parser.add_argument('--debug', action='store_true', help='Ativa modo debug')
+    parser.add_argument('--multiplex', action='store_true',
+                        help='Envia comandos de controle sem parar o inventário')
+    parser.add_argument('--capture', metavar='ARQUIVO',
+                        help='Grava todo o tráfego serial em uma captura binária')
+    parser.add_argument('--replay', metavar='ARQUIVO',
+                        help='Reproduz uma captura em vez de usar o dispositivo')
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help='Velocidade do replay (1 = tempo real, 0 = máxima)')
+    parser.add_argument('--emulate', action='store_true',
+                        help='Usa um UR4 emulado (sem hardware), como no benchmark de inicialização')
+    parser.add_argument('--watchdog', type=float, default=30.0, metavar='SEGUNDOS',
+                        help='Sem frames por este tempo, confere o dispositivo e reconecta se '
+                             'não responder (0 desativa a reconexão automática)')
+    parser.add_argument('--idle-probe', type=float, default=0, metavar='SEGUNDOS',
+                        help='Também confere o dispositivo a cada N segundos com o portal vazio '
+                             '(cada consulta para o inventário por um instante; 0 = só após leituras)')
+    parser.add_argument('--edge', action='store_true',
+                        help='Calcula as sessões no leitor e envia só início/fim para a API')
+    parser.add_argument('--edge-state', default=EDGE_STATE_FILE, metavar='ARQUIVO',
+                        help='Banco SQLite do estado local do modo edge')
     args = parser.parse_args()
     
     # Listar portas se solicitado
@@ -388,7 +560,19 @@ def main():
         return
     
     # Detectar ou usar porta especificada
-    if args.port:
+    serial_factory = None
+    simulated = bool(args.replay or args.emulate)
+    if args.replay:
+        from ur4_capture import ReplaySerial
+        port = args.replay
+        serial_factory = ReplaySerial.factory(speed=args.replay_speed)
+        print(f"⏯️  Reproduzindo captura: {port} (velocidade {args.replay_speed or 'máxima'})")
+    elif args.emulate:
+        from ur4_emulator import EmulatedUR4
+        port = 'emu'
+        serial_factory = EmulatedUR4.factory(tag_rate=50)
+        print("🧪 Usando UR4 emulado")
+    elif args.port:
         port = args.port
         print(f"🔌 Usando porta especificada: {port}")
     else:
@@ -406,7 +590,16 @@ def main():
     mostrar_cabecalho()
     
     # Criar leitor
-    reader = UR4Reader(port=port, debug=args.debug)
+    # Reconexão automática reaplicando o config.json (no replay a captura apenas termina)
+    supervised = args.watchdog > 0 and not args.replay
+    series = ReadSeries()
+    reader = UR4Reader(port=port, debug=args.debug, multiplex=args.multiplex,
+                       serial_factory=serial_factory, capture_path=args.capture,
+                       auto_reconnect=supervised, watchdog_timeout=args.watchdog if supervised else None,
+                       idle_probe_interval=args.idle_probe if supervised and args.idle_probe > 0 else None,
+                       on_reconnect=apply_config_to_device if supervised else None, series=series)
+    if args.capture:
+        print(f"⏺️  Gravando tráfego serial em: {args.capture}")
     
     # Conectar
     print(f"\n🔧 Conectando à {port}...")
@@ -420,22 +613,37 @@ def main():
             print("   4. Faça logout/login para aplicar permissões")
         return
     
-    # Iniciar thread para atualizar informações periodicamente
-    update_thread = threading.Thread(
-        target=update_device_info_periodically,
-        args=(reader, port, 120),  # Atualiza a cada 2 minutos
-        daemon=True
-    )
-    update_thread.start()
-    
     print("✅ Conectado com sucesso!")
     
-    # Aguardar dispositivo estabilizar antes de enviar comandos
-    time.sleep(1.0)
+    # Replay/emulação não têm dispositivo real: nada de device_info.json nem sinais da API
+    if not simulated:
+        # Thread que coleta as informações do dispositivo (primeira vez logo após o
+        # inventário começar) e as atualiza periodicamente
+        update_thread = threading.Thread(
+            target=update_device_info_periodically,
+            args=(reader, port, 120),  # Atualiza a cada 2 minutos
+            daemon=True
+        )
+        update_thread.start()
+        
+        # Séries de leituras/RSSI por antena para a API (gráficos de ajuste de potência)
+        threading.Thread(target=write_series_periodically, args=(series,), daemon=True).start()
     
-    # Salvar informações do dispositivo (sem debug excessivo na primeira vez)
-    print("📊 Coletando informações do dispositivo...")
-    save_device_info(reader, port)
+    callback = callback_rfid
+    if args.edge:
+        store = EdgeStateStore(args.edge_state)
+        edge_engine = EdgeSessionEngine(store)
+        edge_uploader = EdgeUploader(store, EDGE_API_URL, PORTAL_ID, timeout=TIMEOUT_HTTP)
+        edge_uploader.start()
+        callback = callback_edge
+        print(f"🧠 Modo edge: estado em {args.edge_state} ({store.backlog()} registro(s) pendente(s))")
+    elif not api_ready():
+        # Sem a API as leituras seriam perdidas: espera ela subir (boot simultâneo)
+        print("⏳ Aguardando a API...")
+        if wait_until(api_ready, timeout=API_READY_TIMEOUT, interval=0.1):
+            print("✅ API pronta")
+        else:
+            print(f"⚠️ API não respondeu em {API_READY_TIMEOUT}s, iniciando mesmo assim")
     
     print("🚀 Portal ATIVO - Monitorando tags...")
     print("-" * 70)
@@ -443,7 +651,7 @@ def main():
     try:
         # Iniciar leitura contínua com callback personalizado
         reader.read_continuous(
-            callback=callback_rfid,
+            callback=callback,
             anti_spam_delay=5.0,  # 5 segundos entre leituras da mesma tag
             print_output=False  # Não imprimir saída padrão (usamos nosso callback)
         )
@@ -451,7 +659,9 @@ def main():
         print("\n\n🛑 Parando portal...")
     finally:
         reader.disconnect()
-        mostrar_estatisticas()
+        if edge_uploader is not None:
+            edge_uploader.stop()
+        mostrar_estatisticas(reader)
         print("👋 Portal RFID finalizado. Até mais!")
 
 
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Gerador de dados sintéticos em escala para o banco do portal (rfid_portal.db).
+
+Preenche as tabelas com volumes e distribuições parecidos com os de uma
+linha real ao longo de anos, usando executemany em transações grandes:
+
+  - Sessões em dias úteis (turno 07:00-17:00) espalhadas por --years
+    anos, duração log-normal (mediana ~5 min); as iniciadas nas últimas
+    horas ficam em produção e uma fração pequena das antigas, expirada
+  - Uma etiqueta por sessão (rfid_tags), como na produção: etiqueta
+    finalizada não reinicia
+  - Eventos com cauda longa por sessão (Pareto): a maioria das peças gera
+    poucas leituras, algumas ficam paradas no portal e geram centenas
+  - Leituras rejeitadas com cauda ainda mais longa: poucas etiquetas
+    produzidas respondem milhares de vezes (peça esquecida perto da
+    antena), mais algumas leituras truncadas (validação)
+
+Chamadas repetidas acrescentam ao banco (os ids das etiquetas continuam e
+os instantes são sorteados no mesmo período), então o benchmark de escala
+(bench_scale.py) cresce o mesmo arquivo passo a passo. Ao final, os
+agregados (rollups.py) e os sketches de duração (sketches.py) são
+reconstruídos para que /api/stats/* reflitam os dados gerados.
+
+Uso:
+    python seed_scale.py --sessions 1000000 [--db /tmp/rfid_portal_scale.db]
+        [--years 3] [--events-per-session 8] [--rejected-per-session 2]
+
+Não aponte --db para o banco de produção: os dados gerados se misturam
+aos reais.
+"""
+
+import argparse
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, BRASILIA_TZ, brasilia_now, epoch_ms, migrate_db
+import rollups
+import sketches
+
+DEFAULT_DB = '/tmp/rfid_portal_scale.db'
+BATCH_SESSIONS = 20_000
+TAG_PREFIX = 'E2801160600'  # + 13 dígitos hexadecimais = 24 caracteres
+
+DAY_MS = 86_400_000
+SHIFT_START_MS = 7 * 3_600_000
+SHIFT_MS = 10 * 3_600_000
+ACTIVE_WINDOW_MS = 4 * 3_600_000  # Sessões mais novas que isso podem estar em produção
+ACTIVE_RATIO = 0.3
+EXPIRED_RATIO = 0.002
+DURATION_MEDIAN_S = 300
+DURATION_SIGMA = 0.6
+
+# Caudas (Pareto): quanto menor o alpha, mais longa a cauda
+EVENTS_ALPHA = 1.2
+REJECTED_ALPHA = 1.1
+BLOCKED_SESSION_RATIO = 0.3  # Fração das sessões finalizadas com releituras bloqueadas
+MAX_READS = 2000
+VALIDATION_RATIO = 0.05      # Fração das rejeições que são leituras truncadas
+
+# Instantes em ms da época; as colunas DateTime guardam o horário de Brasília sem timezone
+LOCAL_OFFSET_MS = int(BRASILIA_TZ.utcoffset(None).total_seconds() * 1000)
+_dates = {}
+
+
+def _local_text(ms: int) -> str:
+    """ms da época -> 'AAAA-MM-DD HH:MM:SS.ffffff' (horário de Brasília, como o SQLAlchemy grava)"""
+    days, rem = divmod(ms + LOCAL_OFFSET_MS, DAY_MS)
+    day = _dates.get(days)
+    if day is None:
+        day = _dates[days] = (date(1970, 1, 1) + timedelta(days=days)).isoformat()
+    hours, rem = divmod(rem, 3_600_000)
+    minutes, rem = divmod(rem, 60_000)
+    seconds, millis = divmod(rem, 1000)
+    return f"{day} {hours:02d}:{minutes:02d}:{seconds:02d}.{millis * 1000:06d}"
+
+
+def _pareto(rng: random.Random, alpha: float, mean: float) -> int:
+    """Inteiro >= 0 com cauda de Pareto e média aproximada 'mean'"""
+    scale = mean * (alpha - 1) / alpha
+    return min(int(rng.paretovariate(alpha) * scale), MAX_READS)
+
+
+class Seeder:
+    """
+    Gera e grava lotes de sessões, eventos, rejeições e etiquetas
+
+    Args:
+        path: Arquivo SQLite (criado com o esquema dos modelos se não existir)
+        years: Período coberto, terminando agora
+        events_per_session: Média de eventos por sessão
+        rejected_per_session: Média de leituras rejeitadas por sessão
+        seed: Semente do gerador (cada chamada de add() deriva a sua)
+    """
+
+    def __init__(self, path: str, years: float = 3, events_per_session: float = 8,
+                 rejected_per_session: float = 2, seed: int = 1):
+        self.path = path
+        self.events_per_session = events_per_session
+        self.rejected_per_session = rejected_per_session
+        self.seed = seed
+        now = brasilia_now()
+        self.now_ms = epoch_ms(now)
+        first_day = (now - timedelta(days=365 * years)).date()
+        days = (first_day + timedelta(days=d) for d in range((now.date() - first_day).days + 1))
+        # Início do turno de cada dia útil, em ms da época
+        self.shifts = [epoch_ms(datetime(day.year, day.month, day.day)) + SHIFT_START_MS
+                       for day in days if day.weekday() < 5]
+
+        engine = create_engine(f'sqlite:///{path}')
+        Base.metadata.create_all(engine)
+        migrate_db(engine)
+        engine.dispose()
+
+    def counts(self) -> dict:
+        conn = sqlite3.connect(self.path)
+        try:
+            return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ('production_sessions', 'rfid_events', 'rejected_readings', 'rfid_tags')}
+        finally:
+            conn.close()
+
+    def _start_ms(self, rng: random.Random) -> int:
+        while True:
+            start = rng.choice(self.shifts) + int(rng.random() * SHIFT_MS)
+            if start < self.now_ms:
+                return start
+
+    def _session(self, rng: random.Random, index: int, sessions, events, rejected, tags):
+        tag = f"{TAG_PREFIX}{index:013X}"
+        t1 = self._start_ms(rng)
+        t2 = t1 + int(rng.lognormvariate(math.log(DURATION_MEDIAN_S), DURATION_SIGMA) * 1000)
+        status = 'finalizado'
+        if t2 > self.now_ms or (self.now_ms - t1 < ACTIVE_WINDOW_MS and rng.random() < ACTIVE_RATIO):
+            status = 'em_producao'
+        elif rng.random() < EXPIRED_RATIO:
+            status = 'expirado'
+        if status != 'finalizado':
+            t2 = None
+
+        session_id = index + 1
+        t1_text = _local_text(t1)
+        t2_text = _local_text(t2) if t2 else None
+        sessions.append((session_id, tag, t1_text, t2_text, (t2 - t1) / 1000 if t2 else None, status,
+                         t1_text, t2_text or t1_text, 'portal', t1, t2, t1))
+        tags.append((tag, f"Tag {tag}", t1_text, 1))
+
+        # Eventos: leitura de início, releituras enquanto a peça está no portal e leituras de fim
+        events.append((tag, 1, t1_text, session_id, t1))
+        span = (t2 - t1) if t2 else 60_000
+        for _ in range(_pareto(rng, EVENTS_ALPHA, max(self.events_per_session - 2, 0))):
+            when = t1 + int(rng.random() * span)
+            events.append((tag, 1, _local_text(when), session_id, when))
+        if t2:
+            for k in range(1 + rng.randrange(2)):
+                when = t2 + k * 200
+                events.append((tag, 2, _local_text(when), session_id, when))
+
+        if t2 and self.rejected_per_session and rng.random() < BLOCKED_SESSION_RATIO:
+            reason = f"Etiqueta já foi produzida em {t2_text[8:10]}/{t2_text[5:7]}/{t2_text[:4]} {t2_text[11:19]}"
+            for _ in range(_pareto(rng, REJECTED_ALPHA, self.rejected_per_session / BLOCKED_SESSION_RATIO)):
+                when = t2 + 60_000 + int(rng.random() * 3 * DAY_MS)
+                if when >= self.now_ms:
+                    continue
+                if rng.random() < VALIDATION_RATIO:
+                    short = tag[:rng.randrange(8, 24)]
+                    rejected.append((short, 1, _local_text(when),
+                                     f"Tag inválida: deve ter 24 caracteres (recebido: {len(short)})",
+                                     'validation', when))
+                else:
+                    rejected.append((tag, 1, _local_text(when), reason, 'blocked', when))
+
+    def add(self, sessions: int, progress: bool = True) -> dict:
+        """Acrescenta 'sessions' sessões (com eventos, rejeições e etiquetas); retorna as contagens"""
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA cache_size=-200000")
+        first = conn.execute("SELECT COALESCE(MAX(id), 0) FROM production_sessions").fetchone()[0]
+        rng = random.Random(self.seed * 1_000_003 + first)
+        added = {'sessions': 0, 'events': 0, 'rejected': 0}
+        started = time.perf_counter()
+        try:
+            for offset in range(0, sessions, BATCH_SESSIONS):
+                session_rows, event_rows, rejected_rows, tag_rows = [], [], [], []
+                for index in range(first + offset, first + min(offset + BATCH_SESSIONS, sessions)):
+                    self._session(rng, index, session_rows, event_rows, rejected_rows, tag_rows)
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO production_sessions (id, tag_id, antenna_1_time, antenna_2_time, duration_seconds, "
+                        "status, created_at, updated_at, station, antenna_1_ms, antenna_2_ms, created_ms) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", session_rows)
+                    conn.executemany(
+                        "INSERT INTO rfid_events (tag_id, antenna_number, event_time, session_id, event_ms) "
+                        "VALUES (?, ?, ?, ?, ?)", event_rows)
+                    conn.executemany(
+                        "INSERT INTO rejected_readings (tag_id, antenna_number, event_time, reason, reason_type, event_ms) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", rejected_rows)
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO rfid_tags (tag_id, description, created_at, active) VALUES (?, ?, ?, ?)",
+                        tag_rows)
+                added['sessions'] += len(session_rows)
+                added['events'] += len(event_rows)
+                added['rejected'] += len(rejected_rows)
+                if progress:
+                    rate = added['events'] / (time.perf_counter() - started)
+                    print(f"\r   {added['sessions']:,}/{sessions:,} sessões, {added['events']:,} eventos, "
+                          f"{added['rejected']:,} rejeições ({rate:,.0f} eventos/s)", end='', flush=True)
+        finally:
+            conn.close()
+        if progress:
+            print()
+        return added
+
+    def rebuild_aggregates(self):
+        """Reconstrói production_rollups e duration_sketches a partir das sessões"""
+        engine = create_engine(f'sqlite:///{self.path}')
+        db = sessionmaker(bind=engine)()
+        try:
+            rollups.rebuild(db)
+            sketches.rebuild(db)
+        finally:
+            db.close()
+            engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos em escala para o banco do portal')
+    parser.add_argument('--sessions', type=int, default=1_000_000, help='Sessões a acrescentar')
+    parser.add_argument('--db', default=DEFAULT_DB)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--events-per-session', type=float, default=8)
+    parser.add_argument('--rejected-per-session', type=float, default=2)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-aggregates', action='store_true', help='Não reconstruir rollups/sketches')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        open(args.db, 'wb').close()
+    seeder = Seeder(args.db, args.years, args.events_per_session, args.rejected_per_session, args.seed)
+    t0 = time.perf_counter()
+    added = seeder.add(args.sessions)
+    print(f"📦 {added['sessions']:,} sessões, {added['events']:,} eventos e {added['rejected']:,} rejeições "
+          f"em {time.perf_counter() - t0:.1f}s")
+    if not args.no_aggregates:
+        t0 = time.perf_counter()
+        seeder.rebuild_aggregates()
+        print(f"📊 Agregados reconstruídos em {time.perf_counter() - t0:.1f}s")
+    totals = seeder.counts()
+    print(f"✅ {args.db} ({os.path.getsize(args.db) / 1e6:,.0f} MB): " +
+          ", ".join(f"{table} {count:,}" for table, count in totals.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,10 @@
 # Script para iniciar o navegador em modo kiosk
 
 echo "Aguardando serviço Portal RFID iniciar..."
-sleep 15
+for i in $(seq 1 120); do
+    curl -s -f http://localhost:8000/health > /dev/null 2>&1 && break
+    sleep 0.5
+done
 
 echo "Iniciando navegador em modo kiosk..."
 
@@ -19,12 +19,9 @@ API_PID=$!
 echo $API_PID > ../logs/api.pid
 cd ..
 
-# Aguardar API inicializar
-sleep 3
-
-# Iniciar leitor RFID
+# Iniciar leitor RFID (ele mesmo aguarda a API ficar pronta antes do inventário)
 cd scripts
-nohup python3 ur4_rfid_serial.py --port /dev/portal_rfid > ../logs/rfid.log 2>&1 &
+nohup python3 rfid_reader.py --port /dev/portal_rfid > ../logs/rfid.log 2>&1 &
 RFID_PID=$!
 echo $RFID_PID > ../logs/rfid.pid
 cd ..
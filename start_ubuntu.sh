@@ -64,9 +64,13 @@ cd ..
 echo "  ✓ API iniciada (PID: $API_PID)"
 echo "  📄 Log: logs/api.log"
 
-# Aguardar um pouco mais para garantir que a API iniciou
+# Aguardar a API responder (em vez de um tempo fixo)
 echo "  ⏳ Aguardando API inicializar..."
-sleep 5
+for i in $(seq 1 150); do
+    curl -s -f http://localhost:8000/health > /dev/null 2>&1 && break
+    ps -p $API_PID > /dev/null || break
+    sleep 0.2
+done
 
 # Verificar se API está rodando
 if ! ps -p $API_PID > /dev/null; then
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Script de teste do codec do protocolo UR4 contra o dispositivo emulado
+Execute: python3 test_protocol.py
+"""
+import sys
+import os
+
+# Adicionar biblioteca do leitor ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'scripts', 'biblioteca'))
+
+import ur4_protocol as protocol
+from ur4_capture import ReplaySerial
+from ur4_emulator import EmulatedUR4
+from ur4_reader import UR4Reader
+
+
+def test_fixed_frames():
+    """Frames pré-montados idênticos aos bytes documentados do UR4"""
+    assert protocol.START_INVENTORY_FRAME == bytes.fromhex('C88C000A820000880D0A')
+    assert protocol.STOP_INVENTORY_FRAME == bytes.fromhex('C88C00088C840D0A')
+    assert protocol.GET_POWER_FRAME == bytes.fromhex('C88C0008121A0D0A')
+    assert protocol.GET_ANTENNA_CONFIG_FRAME == bytes.fromhex('C88C00082A220D0A')
+    assert protocol.GET_MODULE_ID_FRAME == bytes.fromhex('C88C0008040C0D0A')
+
+
+def test_extract_frames_resync():
+    """Extração com lixo entre frames, BCC inválido e frame incompleto"""
+    good = protocol.build_frame(protocol.RESP_SET_POWER, b'\x01')
+    corrupt = bytearray(good)
+    corrupt[-3] ^= 0xFF
+    buffer = bytearray(b'\x00\xC8' + good + bytes(corrupt) + b'\xFF' + good + good[:5])
+    assert protocol.extract_frames(buffer) == [good, good]
+    assert bytes(buffer) == good[:5]
+    buffer.extend(good[5:])
+    assert protocol.extract_frames(buffer) == [good]
+    assert not buffer
+
+
+def test_round_trip_with_emulator():
+    """Comandos codificados, respondidos pelo emulador e decodificados"""
+    device = EmulatedUR4(tag_rate=0, response_delay=0)
+
+    def transact(frame):
+        device.write(frame)
+        frames = protocol.extract_frames(bytearray(device.read(device.in_waiting)))
+        assert len(frames) == 1
+        return protocol.decode_frame(frames[0])
+
+    assert transact(protocol.encode_set_power(2, 21.5, 21.5, save=True)).ok
+    assert transact(protocol.encode_set_antennas([1, 2, 4])).ok
+
+    report = transact(protocol.GET_POWER_FRAME)
+    assert report.powers[2] == protocol.AntennaPower(21.5, 21.5)
+    assert transact(protocol.GET_ANTENNA_CONFIG_FRAME).antennas == [1, 2, 4]
+    assert transact(protocol.GET_MODULE_ID_FRAME).module_id == '1E004D00'
+
+
+def test_inventory_frames():
+    """Frames de inventário do emulador decodificados em TagRead"""
+    epc = bytes.fromhex('E28011606000020000000001')
+    device = EmulatedUR4(tag_rate=1000, epcs=[epc], antennas=[2])
+    device.write(protocol.START_INVENTORY_FRAME)
+    import time
+    time.sleep(0.01)
+    frames = protocol.extract_frames(bytearray(device.read(device.in_waiting)))
+    assert frames
+    tag = protocol.decode_inventory(frames[0])
+    assert tag.epc == epc.hex().upper() and tag.antenna == 2 and tag.rssi < 0
+
+
+def test_reader_against_emulator():
+    """UR4Reader completo usando o dispositivo emulado como porta serial"""
+    reader = UR4Reader(port='emu', serial_factory=EmulatedUR4.factory(tag_rate=200))
+    assert reader.connect()
+    assert reader.set_antenna_power(1, 12.0, 12.0)
+    info = reader.get_reader_info()
+    assert info['serial_number'] == '1E004D00'
+    assert info['antenna_powers'][1] == {'read_power': 12.0, 'write_power': 12.0}
+    tag = reader.read_single(timeout=1.0)
+    assert tag and len(tag['epc']) == 24
+    reader.disconnect()
+
+
+def test_replay_ends_with_capture():
+    """Replay sem loop encerra read_continuous no fim da captura"""
+    import tempfile
+    import threading
+    import time
+
+    path = os.path.join(tempfile.mkdtemp(), 'emu.ur4cap')
+    reader = UR4Reader(port='emu', serial_factory=EmulatedUR4.factory(tag_rate=200), capture_path=path)
+    assert reader.connect()
+    threading.Timer(0.3, reader.stop_inventory).start()
+    reader.read_continuous(print_output=False)
+    reader.disconnect()
+
+    seen = []
+    replay = UR4Reader(port=path, serial_factory=ReplaySerial.factory(speed=0), watchdog_timeout=0)
+    assert replay.connect()
+    worker = threading.Thread(target=replay.read_continuous,
+                              kwargs={'callback': lambda epc, ant, rssi: seen.append(epc),
+                                      'anti_spam_delay': 0, 'print_output': False})
+    worker.start()
+    worker.join(5.0)
+    alive = worker.is_alive()
+    replay.disconnect()
+    assert not alive and seen
+
+
+def test_watchdog_idle_portal():
+    """Watchdog não para o inventário de um portal vazio (consulta só é opcional)"""
+    import threading
+
+    for idle_probe, probes in ((None, 0), (0.3, 1)):
+        reader = UR4Reader(port='emu', serial_factory=EmulatedUR4.factory(tag_rate=0),
+                           auto_reconnect=True, watchdog_timeout=0.2, idle_probe_interval=idle_probe)
+        assert reader.connect()
+        threading.Timer(1.0, reader.stop_inventory).start()
+        reader.read_continuous(print_output=False)
+        reader.disconnect()
+        assert (reader.blind_window['count'] >= probes) if probes else reader.blind_window['count'] == 0
+        assert reader.outages['count'] == 0
+
+
+def test_command_latency():
+    """Comandos sem espera fixa após a escrita (resposta lida assim que chega)"""
+    import time
+
+    reader = UR4Reader(port='emu', serial_factory=EmulatedUR4.factory(tag_rate=0, response_delay=0.005))
+    assert reader.connect()
+    start = time.perf_counter()
+    reader.send_command(protocol.STOP_INVENTORY_FRAME)
+    sent = time.perf_counter() - start
+    start = time.perf_counter()
+    frame = reader.send_command_and_wait(protocol.GET_MODULE_ID_FRAME)
+    answered = time.perf_counter() - start
+    reader.disconnect()
+    assert protocol.decode_frame(frame).module_id == '1E004D00'
+    assert sent < 0.01 and answered < 0.04
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("🧪 Teste do Protocolo UR4 - Portal RFID Biamar")
+    print("=" * 60)
+
+    tests = [test_fixed_frames, test_extract_frames_resync, test_round_trip_with_emulator,
+             test_inventory_frames, test_reader_against_emulator, test_replay_ends_with_capture,
+             test_watchdog_idle_portal, test_command_latency]
+    failures = 0
+    for i, test in enumerate(tests, 1):
+        try:
+            test()
+            print(f"   ✅ {i}. {test.__doc__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {i}. {test.__doc__}: {type(e).__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ TODOS OS TESTES PASSARAM!" if not failures else f"❌ {failures} TESTE(S) FALHARAM")
+    print("=" * 60)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,77 @@
+"""
+Fixtures dos testes da API e dos scripts
+
+O banco, o config.json e os arquivos de sinal ficam em um diretório
+temporário: as variáveis PORTAL_* são definidas antes de importar o
+backend, que lê PORTAL_DATABASE na importação de models.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+TMP_DIR = Path(tempfile.mkdtemp(prefix='portal-tests-'))
+DATABASE_PATH = TMP_DIR / 'rfid_portal.db'
+DATABASE_PATH.touch()  # Sem o arquivo, init_db cai no banco em memória
+
+os.environ.update({
+    'PORTAL_DATABASE': str(DATABASE_PATH),
+    'PORTAL_SESSION_EXPIRY_MIN': '0',
+    'PORTAL_LOOP_MONITOR': '0',
+    'PORTAL_AUDIT_BUFFER': '0',
+    'PORTAL_READ_ENGINE': 'primary',
+})
+for path in ('backend', 'scripts', os.path.join('scripts', 'biblioteca')):
+    sys.path.insert(0, str(ROOT / path))
+
+
+@pytest.fixture(scope='session')
+def api():
+    """Módulo main com config.json e sinais no diretório temporário"""
+    import main
+
+    main.CONFIG_PATH = TMP_DIR / 'config.json'
+    main.CONFIG_SIGNAL_PATH = TMP_DIR / 'config_changed.txt'
+    main.REFRESH_SIGNAL_PATH = TMP_DIR / 'refresh_signal.txt'
+    main.DEVICE_INFO_PATH = TMP_DIR / 'device_info.json'
+    return main
+
+
+@pytest.fixture(scope='session')
+def _client(api):
+    from fastapi.testclient import TestClient
+
+    with TestClient(api.app) as client:
+        yield client
+
+
+@pytest.fixture
+def clean_db(_client, api):
+    """Esvazia as tabelas ao final do teste"""
+    yield
+    from models import Base
+
+    db = api.SessionLocal()
+    try:
+        for table in reversed(Base.metadata.sorted_tables):
+            db.execute(table.delete())
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def client(_client, clean_db):
+    return _client
+
+
+@pytest.fixture
+def db(api, clean_db):
+    session = api.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
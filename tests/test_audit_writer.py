@@ -0,0 +1,115 @@
+"""Buffer de auditoria: fila sem bloqueio, spill de lotes que falharam e regravação"""
+import json
+import sqlite3
+from datetime import timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from audit_writer import AuditWriter
+from models import Base, ProductionSession, RFIDEvent, RejectedReading, brasilia_now
+
+
+def _event(tag='E28011606000020000000001'):
+    now = brasilia_now()
+    return {'tag_id': tag, 'antenna_number': 1, 'event_time': now, 'session_id': None,
+            'event_ms': int(now.timestamp() * 1000)}
+
+
+def test_submit_never_blocks_when_full(tmp_path, api):
+    writer = AuditWriter(api.SessionLocal, max_pending=1, spill_path=str(tmp_path / 'spill.jsonl'))
+    assert writer.submit('event', _event())
+    assert not writer.submit('event', _event())
+    assert writer.stats['overflow'] == 1
+
+
+def test_full_queue_falls_back_to_request_transaction(client, db, api, tmp_path, monkeypatch):
+    writer = AuditWriter(api.SessionLocal, max_pending=1, spill_path=str(tmp_path / 'spill.jsonl'))
+    writer.submit('event', _event())  # Enche a fila (a thread não está rodando)
+    monkeypatch.setattr(api, 'audit_writer', writer)
+
+    response = client.post('/api/rfid/event', json={'tag_id': 'CURTA', 'antenna_number': 1})
+    assert response.status_code == 200
+    assert db.query(RejectedReading).filter_by(tag_id='CURTA').count() == 1
+    assert writer.stats['overflow'] == 1
+
+
+def test_failed_batch_is_spilled_and_replayed(tmp_path, db, api, monkeypatch):
+    spill = tmp_path / 'spill.jsonl'
+    broken = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'ausente' / 'x.db'}"))
+    monkeypatch.setattr(AuditWriter, 'MAX_RETRIES', 1)
+
+    failing = AuditWriter(broken, spill_path=str(spill))
+    failing._write([('event', _event()), ('rejected', {**_event(), 'reason': 'teste', 'reason_type': 'validation'})])
+    assert failing.stats['failed_rows'] == 2 and failing.stats['spill_pending'] == 2
+    assert failing.stats['lost_rows'] == 0
+    rows = [json.loads(line) for line in spill.read_text().splitlines()]
+    assert [row['kind'] for row in rows] == ['event', 'rejected']
+
+    writer = AuditWriter(api.SessionLocal, spill_path=str(spill))
+    writer.start()
+    writer.stop()
+    assert not spill.exists() and not (tmp_path / 'spill.jsonl.replay').exists()
+    assert writer.stats['replayed_rows'] == 2 and writer.stats['spill_pending'] == 0
+    assert db.query(RFIDEvent).count() == 1
+    assert db.query(RejectedReading).one().event_time is not None
+
+
+def test_health_reports_spilled_rows(client, api, tmp_path, monkeypatch):
+    writer = AuditWriter(api.SessionLocal, spill_path=str(tmp_path / 'spill.jsonl'))
+    writer.stats['spill_pending'] = 3
+    monkeypatch.setattr(api, 'audit_writer', writer)
+
+    body = client.get('/health').json()
+    assert body['status'] == 'degraded'
+    assert body['audit_buffer']['spill_pending'] == 3
+
+
+def test_stop_spills_queue_when_database_is_locked(tmp_path, monkeypatch):
+    path = tmp_path / 'travado.db'
+    engine = create_engine(f"sqlite:///{path}", connect_args={'timeout': 0.2})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    spill = tmp_path / 'spill.jsonl'
+    monkeypatch.setattr(AuditWriter, 'MAX_RETRIES', 2)
+
+    locker = sqlite3.connect(path)
+    locker.execute("BEGIN EXCLUSIVE")
+    writer = AuditWriter(Session, batch_size=2, spill_path=str(spill))
+    for i in range(5):
+        writer.submit('event', _event(f"E2801160600002{i:010d}"))
+    writer.start()
+    writer.stop(timeout=0.1)
+    assert writer.pending() == 0 and writer.stats['spill_pending'] >= 3
+
+    # O lote que estava em gravação também acaba no spill
+    writer._thread.join(10)
+    assert writer.stats['spill_pending'] == 5 and writer.stats['lost_rows'] == 0
+    locker.rollback()
+    locker.close()
+
+    replay = AuditWriter(Session, spill_path=str(spill))
+    replay.start()
+    replay.stop()
+    with Session() as db:
+        assert db.query(RFIDEvent).count() == 5
+    engine.dispose()
+
+
+def test_touch_only_moves_updated_at_forward(db, api):
+    finished_at = brasilia_now()
+    finished = ProductionSession(tag_id='E28011606000020000000001', status='finalizado', updated_at=finished_at)
+    active = ProductionSession(tag_id='E28011606000020000000002', status='em_producao', updated_at=finished_at)
+    db.add_all([finished, active])
+    db.commit()
+
+    writer = AuditWriter(api.SessionLocal)
+    older, newer = finished_at - timedelta(seconds=5), finished_at + timedelta(seconds=5)
+    writer._write([('touch', {'id': finished.id, 'updated_at': newer}),
+                   ('touch', {'id': active.id, 'updated_at': older})])
+    db.expire_all()
+    assert finished.updated_at == active.updated_at == finished_at.replace(tzinfo=None)
+
+    writer._write([('touch', {'id': active.id, 'updated_at': newer})])
+    db.expire_all()
+    assert active.updated_at == newer.replace(tzinfo=None)
@@ -0,0 +1,125 @@
+"""Operações administrativas em massa: cancelamento, importação e desativação de tags"""
+import io
+from datetime import timedelta
+
+import pytest
+
+import bulk_admin
+from models import ProductionRollup, ProductionSession, RFIDTag, brasilia_now
+
+
+def _tag(n, prefix='E2801160600002'):
+    return f"{prefix}{n:010d}"
+
+
+def _session(db, tag, status, minutes_ago=10):
+    db.add(ProductionSession(tag_id=tag, status=status,
+                             antenna_1_time=brasilia_now() - timedelta(minutes=minutes_ago)))
+    db.commit()
+
+
+def _statuses(db):
+    return sorted((s.tag_id, s.status) for s in db.query(ProductionSession))
+
+
+def test_cancel_only_active_by_default(db):
+    _session(db, _tag(1), 'em_producao')
+    _session(db, _tag(2), 'expirado')
+    _session(db, _tag(3), 'finalizado')
+
+    assert bulk_admin.cancel_sessions(db)['cancelled_count'] == 1
+    assert _statuses(db) == [(_tag(2), 'expirado'), (_tag(3), 'finalizado')]
+    assert bulk_admin.cancel_sessions(db, status='expirado')['cancelled_count'] == 1
+    assert _statuses(db) == [(_tag(3), 'finalizado')]
+    # Cancelamentos entram nos agregados (dia e hora)
+    assert {r.cancelled for r in db.query(ProductionRollup)} == {2}
+
+
+def test_cancel_rejects_finished_sessions(db, client):
+    with pytest.raises(ValueError):
+        bulk_admin.cancel_sessions(db, status='finalizado')
+    assert client.post('/api/admin/sessions/cancel', json={'status': 'finalizado'}).status_code == 400
+
+
+def test_cancel_filters(db):
+    _session(db, _tag(1), 'em_producao', minutes_ago=120)
+    _session(db, _tag(2), 'em_producao', minutes_ago=5)
+    _session(db, _tag(3, prefix='E2801160600%02'), 'em_producao', minutes_ago=120)
+
+    assert bulk_admin.cancel_sessions(db, older_than_minutes=60, tag_prefix='E2801160600%')['cancelled_count'] == 1
+    assert [tag for tag, _ in _statuses(db)] == [_tag(1), _tag(2)]
+    assert bulk_admin.cancel_sessions(db, older_than_minutes=60)['cancelled_count'] == 1
+    assert [tag for tag, _ in _statuses(db)] == [_tag(2)]
+
+
+CSV = (
+    "tag_id,descricao,ativa\n"
+    f"{_tag(1)},Camisa,1\n"
+    f"{_tag(2)},Calça,nao\n"
+    "\n"
+    "CURTA,Inválida\n"
+    f"{_tag(1)},Repetida\n"
+    f"{_tag(3).lower()}\n"
+)
+
+
+def _import(db, update_existing, batch_size=2, data=CSV):
+    return bulk_admin.import_tags(db, io.BytesIO(data.encode()), update_existing, batch_size)
+
+
+def test_import_without_update(db):
+    db.add(RFIDTag(tag_id=_tag(2), description='Original', active=True))
+    db.commit()
+
+    result = _import(db, update_existing=False)
+    assert (result['rows'], result['inserted'], result['skipped_existing']) == (3, 2, 1)
+    assert (result['duplicates'], result['invalid'], result['updated']) == (1, 1, 0)
+    assert result['errors'] == ['Linha 5: tag inválida (5 caracteres)']
+
+    tags = {t.tag_id: t for t in db.query(RFIDTag)}
+    assert tags[_tag(1)].description == 'Camisa'  # Primeira ocorrência vale
+    assert tags[_tag(2)].description == 'Original' and tags[_tag(2)].active
+    assert tags[_tag(3)].description == f"Tag {_tag(3)}"
+
+
+def test_import_with_update(db):
+    db.add(RFIDTag(tag_id=_tag(2), description='Original', active=True))
+    db.commit()
+
+    result = _import(db, update_existing=True)
+    assert (result['rows'], result['inserted'], result['updated'], result['skipped_existing']) == (3, 2, 1, 0)
+    tag = db.query(RFIDTag).filter_by(tag_id=_tag(2)).one()
+    db.refresh(tag)
+    assert tag.description == 'Calça' and not tag.active
+
+    # Reimportar o mesmo arquivo: nada novo
+    again = _import(db, update_existing=True)
+    assert (again['inserted'], again['updated']) == (0, 3)
+    assert db.query(RFIDTag).count() == 3
+
+
+def test_import_counts_only_this_file(db, monkeypatch):
+    # Uma tag cadastrada por outra requisição no meio da importação não conta como inserida
+    execute = db.execute
+    state = {'done': False}
+
+    def concurrent(stmt, *args, **kwargs):
+        result = execute(stmt, *args, **kwargs)
+        if args and not state['done']:
+            state['done'] = True
+            execute(RFIDTag.__table__.insert(), {'tag_id': _tag(9), 'description': 'outra'})
+        return result
+    monkeypatch.setattr(db, 'execute', concurrent)
+
+    result = _import(db, update_existing=False)
+    assert result['inserted'] == 3 and db.query(RFIDTag).count() == 4
+
+
+def test_deactivate_tags(db):
+    db.add_all([RFIDTag(tag_id=_tag(1), active=True), RFIDTag(tag_id=_tag(2), active=False)])
+    db.commit()
+
+    result = bulk_admin.deactivate_tags(db, [_tag(1), _tag(1).lower(), _tag(2), _tag(3), ' '])
+    assert {k: result[k] for k in ('requested', 'deactivated', 'already_inactive', 'not_found')} == \
+        {'requested': 3, 'deactivated': 1, 'already_inactive': 1, 'not_found': 1}
+    assert db.query(RFIDTag).filter_by(active=True).count() == 0
@@ -0,0 +1,140 @@
+"""Versões por tabela (incremento só após commit) e If-None-Match do etag_guard"""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+import conditional
+from models import Base, ProductionSession, RFIDTag, brasilia_now
+
+TAG = 'E28011606000020000000001'
+
+
+@pytest.fixture
+def Session(tmp_path):
+    conditional.track_writes()
+    engine = create_engine(f"sqlite:///{tmp_path / 'conditional.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _session(Session) -> int:
+    with Session() as db:
+        session = ProductionSession(tag_id=TAG, antenna_1_time=brasilia_now(), status='em_producao')
+        db.add(session)
+        db.commit()
+        return session.id
+
+
+def test_orm_insert_bumps_only_after_commit(Session):
+    before = conditional.version('rfid_tags')
+    with Session() as db:
+        db.add(RFIDTag(tag_id=TAG))
+        db.flush()
+        assert conditional.version('rfid_tags') == before
+        db.commit()
+    assert conditional.version('rfid_tags') == before + 1
+
+
+def test_orm_update_bumps_after_commit(Session):
+    session_id = _session(Session)
+    before = conditional.version('production_sessions')
+    with Session() as db:
+        db.get(ProductionSession, session_id).status = 'finalizado'
+        db.flush()
+        assert conditional.version('production_sessions') == before
+        db.commit()
+    assert conditional.version('production_sessions') == before + 1
+
+
+def test_rollback_does_not_bump(Session):
+    before = conditional.version('rfid_tags')
+    with Session() as db:
+        db.add(RFIDTag(tag_id=TAG))
+        db.flush()
+        db.rollback()
+        db.commit()  # Commit vazio depois do rollback também não incrementa
+    assert conditional.version('rfid_tags') == before
+
+
+def test_updated_at_only_change_does_not_bump(Session):
+    session_id = _session(Session)
+    before = conditional.version('production_sessions')
+    with Session() as db:
+        db.get(ProductionSession, session_id).updated_at = brasilia_now()
+        db.commit()
+    assert conditional.version('production_sessions') == before
+
+
+def test_core_update_through_session(Session):
+    session_id = _session(Session)
+    table = ProductionSession.__table__
+    before = conditional.version('production_sessions')
+    with Session() as db:
+        db.execute(update(table).where(table.c.id == session_id).values(status='expirado'))
+        assert conditional.version('production_sessions') == before
+        db.commit()
+    assert conditional.version('production_sessions') == before + 1
+
+
+def test_touch_with_bump_version_false(Session):
+    session_id = _session(Session)
+    table = ProductionSession.__table__
+    before = conditional.version('production_sessions')
+    with Session() as db:
+        db.execute(update(table).where(table.c.id == session_id).values(updated_at=brasilia_now())
+                   .execution_options(bump_version=False))
+        db.commit()
+    assert conditional.version('production_sessions') == before
+
+
+def test_writes_outside_a_session_are_not_tracked(Session):
+    # Documentado: só gravações feitas por Sessions do SQLAlchemy incrementam
+    session_id = _session(Session)
+    table = ProductionSession.__table__
+    before = conditional.version('production_sessions')
+    with Session.kw['bind'].begin() as conn:
+        conn.execute(update(table).where(table.c.id == session_id).values(status='expirado'))
+    assert conditional.version('production_sessions') == before
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, False),
+    ('', False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", W/"abc"', True),
+    ('"xyz",W/"abc"', True),
+    ('"xyz", "uvw"', False),
+    ('*', True),
+    ('"abcd"', False),
+])
+def test_matches(header, expected):
+    assert conditional._matches(header, '"abc"') is expected
+
+
+def test_etag_guard_returns_304():
+    state = {'extra': 'a'}
+    app = FastAPI()
+
+    @app.get('/x', dependencies=[Depends(conditional.etag_guard('rfid_tags', extra=lambda: state['extra']))])
+    def endpoint():
+        return {'ok': True}
+
+    client = TestClient(app)
+    first = client.get('/x')
+    etag = first.headers['etag']
+    assert first.status_code == 200 and etag.startswith(f'"{conditional.BOOT_ID}-')
+    assert first.headers['cache-control'] == 'no-cache'
+
+    assert client.get('/x', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/x', headers={'If-None-Match': f'W/{etag}'}).status_code == 304
+    assert client.get('/x', headers={'If-None-Match': '*'}).status_code == 304
+
+    conditional.bump('rfid_tags')
+    assert client.get('/x', headers={'If-None-Match': etag}).status_code == 200
+    etag = client.get('/x').headers['etag']
+    state['extra'] = 'b'
+    assert client.get('/x', headers={'If-None-Match': etag}).status_code == 200
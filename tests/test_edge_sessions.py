@@ -0,0 +1,172 @@
+"""Modo edge: idempotência de /api/edge/sessions e fila (outbox) do leitor"""
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import edge_sessions
+from models import EdgeAlias, ProductionSession, RejectedReading, brasilia_now
+
+TAG = 'E28011606000020000000001'
+OTHER_TAG = 'E28011606000020000000002'
+URL = '/api/edge/sessions'
+
+
+def _start(tag=TAG, edge_id=None, when=None):
+    when = when or brasilia_now() - timedelta(minutes=5)
+    return {'edge_id': edge_id or uuid.uuid4().hex, 'kind': 'start', 'tag_id': tag,
+            'antenna_1_time': when.isoformat(), 'station': 'portal', 'antenna_number': 1}
+
+
+def _complete(start, when=None):
+    when = when or brasilia_now()
+    return {**start, 'kind': 'complete', 'antenna_2_time': when.isoformat(), 'antenna_number': 2}
+
+
+def _send(client, *records):
+    response = client.post(URL, json={'portal_id': 'teste', 'records': list(records)})
+    assert response.status_code == 200, response.text
+    return [result['status'] for result in response.json()['results']]
+
+
+def test_duplicate_start_and_complete(client, db):
+    start = _start()
+    assert _send(client, start, start) == ['created', 'duplicate']
+    assert _send(client, _complete(start)) == ['completed']
+    assert _send(client, _complete(start), start) == ['duplicate', 'duplicate']
+
+    session = db.query(ProductionSession).one()
+    assert session.status == 'finalizado' and session.edge_id == start['edge_id']
+    assert session.duration_seconds == pytest.approx(300, abs=5)
+
+
+def test_start_of_produced_tag_is_blocked(client, db):
+    start = _start()
+    _send(client, start, _complete(start))
+    assert _send(client, _start()) == ['blocked']
+    assert db.query(ProductionSession).count() == 1
+    assert db.query(RejectedReading).filter_by(reason_type='blocked').count() == 1
+
+
+def test_complete_without_session_is_missing(client):
+    assert _send(client, _complete(_start())) == ['missing']
+
+
+def test_merged_into_session_opened_by_event(client, db):
+    client.post('/api/rfid/event', json={'tag_id': TAG, 'antenna_number': 1}).raise_for_status()
+    start = _start()
+    assert _send(client, start) == ['merged']
+    assert db.query(ProductionSession).one().edge_id == start['edge_id']
+    assert _send(client, _complete(start)) == ['completed']
+
+
+def test_merged_start_with_second_edge_id(client, db):
+    first, second = _start(), _start()
+    assert _send(client, first, second) == ['created', 'merged']
+    assert db.query(EdgeAlias).one().edge_id == second['edge_id']
+    assert _send(client, second) == ['duplicate']
+
+    # O fim da segunda borda encontra a sessão pelo apelido
+    assert _send(client, _complete(second)) == ['completed']
+    assert _send(client, _complete(first)) == ['duplicate']
+    assert db.query(ProductionSession).one().status == 'finalizado'
+
+
+def test_bad_record_does_not_reject_batch(client, db, api, monkeypatch):
+    good, bad_shape, failing, last = _start(), _start(OTHER_TAG), _start(), _start(OTHER_TAG)
+    bad_shape['antenna_1_time'] = 'ontem'
+    failing['tag_id'] = 'E28011606000020000000003'
+    apply = api._apply_edge_record
+
+    def flaky(db, record):
+        if record.edge_id == failing['edge_id']:
+            db.add(ProductionSession(tag_id=record.tag_id, status='em_producao'))
+            db.flush()
+            raise RuntimeError('falha no registro')
+        return apply(db, record)
+    monkeypatch.setattr(api, '_apply_edge_record', flaky)
+
+    assert _send(client, good, bad_shape, failing, 'lixo', last) == ['created', 'invalid', 'error', 'invalid', 'created']
+    # Só o registro que falhou é desfeito
+    assert sorted(s.tag_id for s in db.query(ProductionSession)) == [TAG, OTHER_TAG]
+
+
+
+def test_locked_database_rejects_whole_batch(client, db, api, monkeypatch):
+    first, locked = _start(), _start(OTHER_TAG)
+    apply = api._apply_edge_record
+
+    def flaky(db, record):
+        if record.edge_id == locked['edge_id']:
+            raise OperationalError('INSERT', {}, Exception('database is locked'))
+        return apply(db, record)
+    monkeypatch.setattr(api, '_apply_edge_record', flaky)
+
+    # Falha transitória: nada é gravado e a borda reenvia o lote inteiro
+    assert client.post(URL, json={'records': [first, locked]}).status_code == 500
+    assert db.query(ProductionSession).count() == 0
+
+
+# --- Fila do leitor contra a API (requests.post -> TestClient) ---
+
+@pytest.fixture
+def edge(client, tmp_path, monkeypatch):
+    def post(url, json=None, timeout=None):
+        return client.post(URL, json=json)
+    monkeypatch.setattr(edge_sessions.requests, 'post', post)
+
+    store = edge_sessions.EdgeStateStore(str(tmp_path / 'edge.db'))
+    engine = edge_sessions.EdgeSessionEngine(store)
+    uploader = edge_sessions.EdgeUploader(store, URL, 'teste')
+    yield store, engine, uploader
+    store.close()
+
+
+def test_outbox_start_and_complete(edge, db):
+    store, engine, uploader = edge
+    assert engine.process(TAG, 1) == edge_sessions.STARTED
+    assert engine.process(TAG, 1) == edge_sessions.ALREADY_ACTIVE
+    assert engine.process(TAG, 2) == edge_sessions.COMPLETED
+    assert store.backlog() == 2
+
+    assert uploader.flush_once()
+    assert store.backlog() == 0 and uploader.stats['enviados'] == 2
+    assert db.query(ProductionSession).one().status == 'finalizado'
+    assert engine.process(TAG, 1) == edge_sessions.BLOCKED
+
+
+def test_outbox_blocked_marks_tag_produced(edge, client):
+    store, engine, uploader = edge
+    start = _start()
+    _send(client, start, _complete(start))  # Produzida por outro portal
+
+    assert engine.process(TAG, 1) == edge_sessions.STARTED
+    uploader.flush_once()
+    assert uploader.stats['bloqueados'] == 1
+    assert engine.process(TAG, 1) == edge_sessions.BLOCKED
+
+
+def test_outbox_missing_forgets_local_session(edge, client):
+    store, engine, uploader = edge
+    engine.process(TAG, 1)
+    uploader.flush_once()
+    client.post('/api/sessions/cancel-active').raise_for_status()  # Cancelada na API
+
+    engine.process(TAG, 2)
+    uploader.flush_once()
+    assert uploader.stats['ausentes'] == 1
+    assert store.find(TAG, 'finalizado') is None
+    assert engine.process(TAG, 1) == edge_sessions.STARTED
+
+
+def test_outbox_drops_rejected_record(edge, db):
+    store, engine, uploader = edge
+    engine.process(TAG, 1)
+    store._conn.execute("INSERT INTO outbox (payload) VALUES (?)", ('{"edge_id": "x", "kind": "start"}',))
+    engine.process(OTHER_TAG, 1)
+
+    assert uploader.flush_once()
+    assert store.backlog() == 0
+    assert uploader.stats['recusados'] == 1 and uploader.stats['enviados'] == 3
+    assert db.query(ProductionSession).count() == 2
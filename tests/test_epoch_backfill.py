@@ -0,0 +1,105 @@
+"""migrate_db num banco antigo: colunas *_ms preenchidas iguais às gravadas pelo ORM"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+import models
+from models import ProductionSession, RFIDEvent, RejectedReading, epoch_ms
+
+# Schema anterior às colunas *_ms (tabelas que elas passaram a acompanhar)
+BASELINE = (
+    "CREATE TABLE production_sessions (id INTEGER PRIMARY KEY AUTOINCREMENT, tag_id VARCHAR(100) NOT NULL, "
+    "antenna_1_time DATETIME, antenna_2_time DATETIME, duration_seconds FLOAT, status VARCHAR(20), "
+    "created_at DATETIME, updated_at DATETIME)",
+    "CREATE TABLE rfid_events (id INTEGER PRIMARY KEY AUTOINCREMENT, tag_id VARCHAR(100) NOT NULL, "
+    "antenna_number INTEGER NOT NULL, event_time DATETIME, session_id INTEGER)",
+    "CREATE TABLE rejected_readings (id INTEGER PRIMARY KEY AUTOINCREMENT, tag_id VARCHAR(100) NOT NULL, "
+    "antenna_number INTEGER, event_time DATETIME, reason VARCHAR(255) NOT NULL, reason_type VARCHAR(50))",
+)
+
+# Horário de Brasília sem timezone, como o SQLAlchemy grava: virada do dia em UTC,
+# virada do ano, milissegundos arredondados para cima e para baixo
+TIMES = [
+    datetime(2024, 1, 15, 8, 30, 0),
+    datetime(2024, 6, 30, 21, 59, 59, 999400),
+    datetime(2024, 12, 31, 22, 0, 0, 123456),
+    datetime(2025, 2, 28, 23, 59, 59, 500600),
+    datetime(2026, 10, 19, 0, 0, 0, 1),
+]
+
+
+def _stamp(dt):
+    return dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with engine.begin() as conn:
+        for ddl in BASELINE:
+            conn.execute(text(ddl))
+        for i, dt in enumerate(TIMES):
+            conn.execute(text("INSERT INTO production_sessions (tag_id, antenna_1_time, antenna_2_time, status, created_at) "
+                              "VALUES (:tag, :start, :end, 'finalizado', :start)"),
+                         {'tag': f'TAG{i}', 'start': _stamp(dt), 'end': _stamp(TIMES[-1 - i])})
+            conn.execute(text("INSERT INTO rfid_events (tag_id, antenna_number, event_time) VALUES (:tag, 1, :at)"),
+                         {'tag': f'TAG{i}', 'at': _stamp(dt)})
+            conn.execute(text("INSERT INTO rejected_readings (tag_id, antenna_number, event_time, reason) "
+                              "VALUES (:tag, 1, :at, 'teste')"), {'tag': f'TAG{i}', 'at': _stamp(dt)})
+        # Sessão aberta: sem antenna_2_time, a coluna ms fica nula
+        conn.execute(text("INSERT INTO production_sessions (tag_id, antenna_1_time, status, created_at) "
+                          "VALUES ('OPEN', :at, 'em_producao', :at)"), {'at': _stamp(TIMES[0])})
+    yield engine
+    engine.dispose()
+
+
+def _ms_rows(engine, table, columns):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")).all()
+
+
+def test_migrate_backfills_like_listener(baseline):
+    models.migrate_db(baseline)
+
+    columns = {col['name'] for col in inspect(baseline).get_columns('production_sessions')}
+    assert {'antenna_1_ms', 'antenna_2_ms', 'created_ms'} <= columns
+    indexes = {index['name'] for index in inspect(baseline).get_indexes('production_sessions')}
+    assert 'ix_production_sessions_status_start' in indexes
+
+    sessions = _ms_rows(baseline, 'production_sessions', ['antenna_1_ms', 'antenna_2_ms', 'created_ms'])
+    for i, dt in enumerate(TIMES):
+        assert tuple(sessions[i]) == (epoch_ms(dt), epoch_ms(TIMES[-1 - i]), epoch_ms(dt))
+    assert tuple(sessions[-1]) == (epoch_ms(TIMES[0]), None, epoch_ms(TIMES[0]))
+    for table in ('rfid_events', 'rejected_readings'):
+        assert [row[0] for row in _ms_rows(baseline, table, ['event_ms'])] == [epoch_ms(dt) for dt in TIMES]
+
+    # Mesmos instantes gravados pelo ORM (listener before_insert) no banco migrado
+    db = sessionmaker(bind=baseline)()
+    try:
+        for i, dt in enumerate(TIMES):
+            db.add(ProductionSession(tag_id=f'ORM{i}', antenna_1_time=dt, antenna_2_time=TIMES[-1 - i],
+                                     created_at=dt, status='finalizado'))
+            db.add(RFIDEvent(tag_id=f'ORM{i}', antenna_number=1, event_time=dt))
+            db.add(RejectedReading(tag_id=f'ORM{i}', antenna_number=1, event_time=dt, reason='teste'))
+        db.commit()
+        orm = db.query(ProductionSession.antenna_1_ms, ProductionSession.antenna_2_ms, ProductionSession.created_ms) \
+            .filter(ProductionSession.tag_id.like('ORM%')).order_by(ProductionSession.id).all()
+        assert [tuple(row) for row in orm] == [tuple(row) for row in sessions[:len(TIMES)]]
+        events = [ms for ms, in db.query(RFIDEvent.event_ms).filter(RFIDEvent.tag_id.like('ORM%')).order_by(RFIDEvent.id)]
+        assert events == [epoch_ms(dt) for dt in TIMES]
+    finally:
+        db.close()
+
+
+def test_backfill_in_batches_only_fills_nulls(baseline):
+    models.migrate_db(baseline)
+    with baseline.begin() as conn:
+        conn.execute(text("UPDATE rfid_events SET event_ms = NULL"))
+        conn.execute(text("UPDATE rfid_events SET event_ms = -1 WHERE id = 1"))
+
+    models.backfill_epoch_columns(baseline, batch_size=2)
+
+    events = [row[0] for row in _ms_rows(baseline, 'rfid_events', ['event_ms'])]
+    assert events == [-1] + [epoch_ms(dt) for dt in TIMES[1:]]
@@ -0,0 +1,100 @@
+"""Engine de leitura: modos ro e snapshot sobre um banco em arquivo"""
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, RFIDTag
+from read_engine import ReadEngine
+
+
+@pytest.fixture
+def primary(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'portal.db'}")
+    Base.metadata.create_all(engine)
+    yield engine, sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def make_engine(primary, tmp_path):
+    engines = []
+
+    def make(mode, routes=('tags',)):
+        engine, factory = primary
+        read = ReadEngine(factory, engine, mode=mode, routes=routes,
+                          database_path=str(tmp_path / 'portal.db'),
+                          snapshot_path=str(tmp_path / 'snapshot.db'), refresh_interval=3600)
+        read.start()
+        engines.append(read)
+        return read
+    yield make
+    for read in engines:
+        read.stop()
+
+
+def _add_tag(factory, tag_id):
+    db = factory()
+    try:
+        db.add(RFIDTag(tag_id=tag_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _count_tags(factory):
+    db = factory()
+    try:
+        return db.query(func.count(RFIDTag.id)).scalar()
+    finally:
+        db.close()
+
+
+def test_snapshot_refresh_changes_version(primary, make_engine):
+    _, factory = primary
+    _add_tag(factory, 'A')
+    read = make_engine('snapshot')
+    before = read.version('tags')
+    assert read.routed('tags') and before
+
+    _add_tag(factory, 'B')
+    assert _count_tags(read.session_factory('tags')) == 1  # Cópia ainda antiga, mesmo ETag
+    assert read.version('tags') == before
+
+    assert read.refresh()
+    assert read.version('tags') != before
+    assert _count_tags(read.session_factory('tags')) == 2
+    assert read.version('sessions') == ''  # Rota não desviada: ETag não muda
+
+
+@pytest.mark.parametrize('mode', ['ro', 'snapshot'])
+def test_writes_through_read_engine_rejected(primary, make_engine, mode):
+    _, factory = primary
+    _add_tag(factory, 'A')
+    read = make_engine(mode)
+
+    db = read.session_factory('tags')()
+    try:
+        db.add(RFIDTag(tag_id='B'))
+        with pytest.raises(OperationalError, match='readonly|read-only|query_only'):
+            db.commit()
+        db.rollback()
+    finally:
+        db.close()
+    assert _count_tags(factory) == 1
+
+
+def test_ro_sees_last_commit(primary, make_engine):
+    _, factory = primary
+    read = make_engine('ro')
+    assert read.version('tags') == ''
+    _add_tag(factory, 'A')
+    assert _count_tags(read.session_factory('tags')) == 1
+
+
+def test_missing_database_falls_back_to_primary(primary, tmp_path):
+    engine, factory = primary
+    read = ReadEngine(factory, engine, mode='ro', routes=('tags',),
+                      database_path=str(tmp_path / 'ausente.db'))
+    read.start()
+    assert read.mode == 'primary' and read.session_factory('tags') is factory
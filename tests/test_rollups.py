@@ -0,0 +1,98 @@
+"""Agregados por dia/hora: upsert incremental igual à reconstrução (rollups.py rebuild)"""
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import rollups
+from models import BRASILIA_TZ, Base, ProductionRollup, ProductionSession
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..', 'backend')
+BASE = datetime(2026, 3, 10, 8, 15, tzinfo=BRASILIA_TZ)
+
+
+def _snapshot(db):
+    rows = db.query(ProductionRollup).order_by(ProductionRollup.granularity, ProductionRollup.bucket_start)
+    return [(r.granularity, r.bucket_start, r.completed, r.cancelled, r.duration_count,
+             pytest.approx(r.duration_sum), pytest.approx(r.duration_sumsq), r.duration_min, r.duration_max)
+            for r in rows]
+
+
+def _finish(db, n, finished_at, duration):
+    session = ProductionSession(tag_id=f"E2801160600002{n:010d}", status='finalizado',
+                                antenna_1_time=finished_at - timedelta(seconds=duration or 0),
+                                antenna_2_time=finished_at, duration_seconds=duration)
+    db.add(session)
+    db.flush()
+    rollups.record_completed(db, session)
+    db.commit()
+
+
+def _produce(db):
+    # Duas horas no primeiro dia, uma no dia seguinte e uma sessão sem duração
+    for n, (offset, duration) in enumerate([(0, 30.0), (10, 45.5), (70, 12.0), (24 * 60, 90.0), (24 * 60 + 5, None)]):
+        _finish(db, n, BASE + timedelta(minutes=offset), duration)
+
+
+def test_incremental_matches_rebuild(db):
+    _produce(db)
+    incremental = _snapshot(db)
+    assert len(incremental) == 2 + 3
+
+    day = db.query(ProductionRollup).filter_by(granularity='day', bucket_start=BASE.replace(
+        hour=0, minute=0, tzinfo=None)).one()
+    assert (day.completed, day.duration_count, day.duration_min, day.duration_max) == (3, 3, 12.0, 45.5)
+
+    assert rollups.rebuild(db) == len(incremental)
+    db.expire_all()
+    assert _snapshot(db) == incremental
+
+
+def test_rebuild_keeps_cancelled(db):
+    _produce(db)
+    rollups.record_cancelled(db, BASE, 2)                        # Período com finalizadas
+    rollups.record_cancelled(db, BASE + timedelta(days=5), 1)    # Só cancelamentos
+    db.commit()
+    before = _snapshot(db)
+
+    rollups.rebuild(db)
+    db.expire_all()
+    assert _snapshot(db) == before
+    hour = db.query(ProductionRollup).filter_by(granularity='hour', bucket_start=BASE.replace(
+        minute=0, tzinfo=None)).one()
+    assert (hour.completed, hour.cancelled) == (2, 2)
+
+
+def test_rebuild_fixes_drifted_rollups(db):
+    _produce(db)
+    expected = _snapshot(db)
+    db.query(ProductionRollup).update({'completed': 99, 'duration_sum': 0.0})
+    db.add(ProductionRollup(granularity='hour', bucket_start=datetime(2020, 1, 1), completed=3, cancelled=0,
+                            duration_count=0, duration_sum=0.0, duration_sumsq=0.0))
+    db.commit()
+
+    rollups.rebuild(db)
+    db.expire_all()
+    assert _snapshot(db) == expected
+
+
+def test_rebuild_cli(tmp_path):
+    path = tmp_path / 'cli.db'
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        _produce(db)
+        expected = _snapshot(db)
+        db.query(ProductionRollup).delete()
+        db.commit()
+
+    output = subprocess.run([sys.executable, 'rollups.py', 'rebuild'], cwd=BACKEND, capture_output=True, text=True,
+                            env={**os.environ, 'PORTAL_DATABASE': str(path)}, check=True).stdout
+    assert '5 período(s)' in output
+    with sessionmaker(bind=engine)() as db:
+        assert _snapshot(db) == expected
+    engine.dispose()
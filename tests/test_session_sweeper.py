@@ -0,0 +1,179 @@
+"""Expiração de sessões paradas em produção e leituras de fim de sessões expiradas"""
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import edge_sessions
+from models import DurationSketch, ProductionRollup, ProductionSession, RejectedReading, brasilia_now
+from session_sweeper import EXPIRED_STATUS, SessionSweeper, expire_sessions
+
+TAG = 'E28011606000020000000001'
+
+
+def _add(db, tag, minutes_ago, status='em_producao', **fields):
+    session = ProductionSession(tag_id=tag, antenna_1_time=brasilia_now() - timedelta(minutes=minutes_ago),
+                                status=status, station='portal', **fields)
+    db.add(session)
+    db.commit()
+    return session
+
+
+def _tag(n):
+    return f"E2801160600002{n:010d}"
+
+
+def test_expire_sessions_in_batches(db):
+    old = [_add(db, _tag(i), 120 + i) for i in range(5)]
+    recent = _add(db, _tag(10), 5)
+    finished = _add(db, _tag(11), 300, status='finalizado')
+
+    assert expire_sessions(db, max_age_minutes=60, batch_size=2) == 5
+    db.expire_all()
+    assert {s.status for s in old} == {EXPIRED_STATUS}
+    assert recent.status == 'em_producao' and finished.status == 'finalizado'
+    assert expire_sessions(db, max_age_minutes=60, batch_size=2) == 0
+
+
+def test_sweep_now_stats(db, api):
+    _add(db, _tag(1), 120)
+    sweeper = SessionSweeper(api.SessionLocal, max_age_minutes=60, batch_size=10)
+    assert sweeper.sweep_now() == 1
+    assert sweeper.sweep_now() == 0
+    assert sweeper.stats['runs'] == 2 and sweeper.stats['expired_total'] == 1
+    assert sweeper.stats['last_expired'] == 0 and sweeper.stats['errors'] == 0
+    assert sweeper.snapshot()['enabled']
+
+
+def test_sweep_now_counts_errors(tmp_path):
+    broken = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'ausente' / 'x.db'}"))
+    sweeper = SessionSweeper(broken, max_age_minutes=60)
+    assert sweeper.sweep_now() == 0
+    assert sweeper.stats['errors'] == 1 and sweeper.stats['last_error']
+
+
+def test_from_env_disabled_by_default(api, monkeypatch):
+    monkeypatch.delenv('PORTAL_SESSION_EXPIRY_MIN', raising=False)
+    assert SessionSweeper.from_env(api.SessionLocal) is None
+    monkeypatch.setenv('PORTAL_SESSION_EXPIRY_MIN', '0')
+    assert SessionSweeper.from_env(api.SessionLocal) is None
+    monkeypatch.setenv('PORTAL_SESSION_EXPIRY_MIN', '30')
+    assert SessionSweeper.from_env(api.SessionLocal).max_age_minutes == 30
+
+
+def _not_counted(db, session):
+    db.expire_all()
+    assert session.status == EXPIRED_STATUS and session.antenna_2_time is None
+    assert db.query(ProductionRollup).count() == 0 and db.query(DurationSketch).count() == 0
+    assert db.query(RejectedReading).filter_by(reason_type='expired').count() == 1
+
+
+def test_event_finish_of_expired_session(client, db):
+    session = _add(db, TAG, 120, status=EXPIRED_STATUS)
+    body = client.post('/api/rfid/event', json={'tag_id': TAG, 'antenna_number': 2}).json()
+    assert body['expired'] and body['session_id'] == session.id
+    _not_counted(db, session)
+
+    # Expirada não bloqueia: a etiqueta abre uma sessão nova
+    assert client.post('/api/rfid/event', json={'tag_id': TAG, 'antenna_number': 1}).json()['success']
+    assert db.query(ProductionSession).filter_by(status='em_producao').count() == 1
+
+
+def _edge_complete(edge_id):
+    return {'edge_id': edge_id, 'kind': 'complete', 'tag_id': TAG,
+            'antenna_1_time': (brasilia_now() - timedelta(hours=2)).isoformat(),
+            'antenna_2_time': brasilia_now().isoformat(), 'station': 'portal', 'antenna_number': 2}
+
+
+def test_edge_complete_of_expired_session(client, db):
+    edge_id = uuid.uuid4().hex
+    session = _add(db, TAG, 120, status=EXPIRED_STATUS, edge_id=edge_id)
+    response = client.post('/api/edge/sessions', json={'records': [_edge_complete(edge_id)]})
+    assert response.json()['results'][0]['status'] == 'expired'
+    _not_counted(db, session)
+
+
+def test_outbox_expired_frees_tag(client, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(edge_sessions.requests, 'post',
+                        lambda url, json=None, timeout=None: client.post('/api/edge/sessions', json=json))
+    store = edge_sessions.EdgeStateStore(str(tmp_path / 'edge.db'))
+    engine = edge_sessions.EdgeSessionEngine(store)
+    uploader = edge_sessions.EdgeUploader(store, '/api/edge/sessions', 'teste')
+    try:
+        engine.process(TAG, 1)
+        uploader.flush_once()
+        expire_sessions(db, max_age_minutes=-1)  # Tudo que está em produção expira
+        engine.process(TAG, 2)
+        uploader.flush_once()
+        assert uploader.stats['expirados'] == 1
+        assert engine.process(TAG, 1) == edge_sessions.STARTED
+    finally:
+        store.close()
+
+
+# --- Mesma idade máxima na borda e na API ---
+
+class Clock:
+    def __init__(self, start):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sweeper(api, monkeypatch):
+    """Expiração ligada na API (60 min) sem a thread de varredura"""
+    monkeypatch.setattr(api, 'sweeper', SessionSweeper(api.SessionLocal, max_age_minutes=60))
+
+
+def test_edge_reentry_after_expiry(client, db, sweeper, tmp_path, monkeypatch):
+    monkeypatch.setattr(edge_sessions.requests, 'post',
+                        lambda url, json=None, timeout=None: client.post('/api/edge/sessions', json=json))
+    store = edge_sessions.EdgeStateStore(str(tmp_path / 'edge.db'))
+    clock = Clock(brasilia_now() - timedelta(hours=3))
+    engine = edge_sessions.EdgeSessionEngine(store, clock=clock, max_age_minutes=60)
+    uploader = edge_sessions.EdgeUploader(store, '/api/edge/sessions', 'teste')
+    try:
+        assert engine.process(TAG, 1) == edge_sessions.STARTED
+        uploader.flush_once()
+
+        # A peça volta à entrada depois da idade máxima: sessão nova, como no modo API
+        clock.now += timedelta(hours=2)
+        assert engine.process(TAG, 1) == edge_sessions.STARTED
+        assert store.find(TAG, EXPIRED_STATUS) is not None
+        clock.now += timedelta(minutes=5)
+        assert engine.process(TAG, 2) == edge_sessions.COMPLETED
+
+        # A API ainda não varreu: o início novo expira a sessão antiga na hora
+        assert uploader.flush_once()
+        assert uploader.stats['expirados'] == 0
+        statuses = {s.status: s for s in db.query(ProductionSession)}
+        assert set(statuses) == {EXPIRED_STATUS, 'finalizado'}
+        assert statuses['finalizado'].duration_seconds == pytest.approx(300, abs=1)
+        assert engine.process(TAG, 1) == edge_sessions.BLOCKED
+    finally:
+        store.close()
+
+
+def test_edge_local_expiry_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv('PORTAL_SESSION_EXPIRY_MIN', raising=False)
+    store = edge_sessions.EdgeStateStore(str(tmp_path / 'edge.db'))
+    clock = Clock(brasilia_now())
+    engine = edge_sessions.EdgeSessionEngine(store, clock=clock)
+    try:
+        engine.process(TAG, 1)
+        clock.now += timedelta(days=3)
+        assert engine.process(TAG, 1) == edge_sessions.ALREADY_ACTIVE
+        assert engine.process(TAG, 2) == edge_sessions.COMPLETED
+    finally:
+        store.close()
+
+
+def test_event_finish_of_overdue_session_before_sweep(client, db, sweeper):
+    session = _add(db, TAG, 120)
+    body = client.post('/api/rfid/event', json={'tag_id': TAG, 'antenna_number': 2}).json()
+    assert body['expired'] and body['session_id'] == session.id
+    _not_counted(db, session)
@@ -0,0 +1,88 @@
+"""DDSketch: serialização (varint/zigzag), mescla e erro relativo dos quantis"""
+import math
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import sketches
+from models import BRASILIA_TZ
+from sketches import DDSketch
+
+
+@pytest.mark.parametrize('value', [0, 1, 127, 128, 300, 2 ** 32, 2 ** 63 + 5])
+def test_varint_round_trip(value):
+    out = bytearray()
+    sketches._write_varint(out, value)
+    assert sketches._read_varint(bytes(out) + b'\xff', 0) == (value, len(out))
+
+
+def _samples(n=20000, seed=7):
+    rng = random.Random(seed)
+    # Segundos a horas, com alguns zeros e valores abaixo de 1 s (índices negativos)
+    values = [rng.lognormvariate(4, 1.5) for _ in range(n)]
+    return values + [0.0] * 50 + [rng.uniform(0.002, 0.9) for _ in range(200)]
+
+
+def _sketch(values, accuracy=sketches.DEFAULT_ACCURACY):
+    sketch = DDSketch(accuracy)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def test_bytes_round_trip():
+    sketch = _sketch(_samples())
+    assert min(sketch.bins) < 0 < max(sketch.bins)  # Deltas zigzag negativos e positivos
+    copy = DDSketch.from_bytes(sketch.to_bytes())
+    assert copy.bins == sketch.bins
+    assert (copy.zero_count, copy.count, copy.sum, copy.min, copy.max) == \
+        (sketch.zero_count, sketch.count, sketch.sum, sketch.min, sketch.max)
+    assert copy.relative_accuracy == sketch.relative_accuracy
+
+    empty = DDSketch.from_bytes(DDSketch().to_bytes())
+    assert empty.count == 0 and empty.quantile(0.5) is None
+
+
+def test_unknown_version_rejected():
+    data = bytearray(DDSketch().to_bytes())
+    data[0] = 99
+    with pytest.raises(ValueError):
+        DDSketch.from_bytes(bytes(data))
+
+
+@pytest.mark.parametrize('accuracy', [0.01, 0.02])
+@pytest.mark.parametrize('q', [0.5, 0.9, 0.99])
+def test_quantile_within_relative_accuracy(accuracy, q):
+    values = _samples()
+    exact = sorted(values)[math.floor(q * (len(values) - 1))]
+    estimate = _sketch(values, accuracy).quantile(q)
+    assert abs(estimate - exact) <= accuracy * exact + 1e-9
+
+
+def test_merge_equals_single_sketch():
+    values = _samples()
+    whole = _sketch(values)
+    merged = DDSketch()
+    for part in (values[:7000], values[7000:15000], values[15000:]):
+        merged.merge(_sketch(part))
+    assert merged.bins == whole.bins and merged.zero_count == whole.zero_count
+    assert merged.count == whole.count and merged.sum == pytest.approx(whole.sum)
+    for q in (0.5, 0.99):
+        assert merged.quantile(q) == whole.quantile(q)
+
+    with pytest.raises(ValueError):
+        merged.merge(DDSketch(0.05))
+
+
+def test_daily_sketches_merge_over_range(db):
+    day = datetime(2026, 3, 10, tzinfo=BRASILIA_TZ)
+    values = _samples(n=500)
+    for i, value in enumerate(values):
+        sketches.record_duration(db, day + timedelta(days=i % 3, minutes=i % 1440), value)
+    db.commit()
+
+    merged = sketches.merged_sketch(db, day, day + timedelta(days=3))
+    assert merged.count == len(values)
+    assert merged.quantile(0.99) == _sketch(values).quantile(0.99)
+    assert sketches.merged_sketch(db, day, day + timedelta(days=1)).count == len(values[::3])  # Só o primeiro dia
@@ -0,0 +1,118 @@
+"""Mapa de zonas (ur4_zones) e roteamento das leituras por estação na API"""
+import json
+
+import pytest
+
+import ur4_zones
+from models import ProductionSession, RFIDEvent
+from ur4_zones import Zone
+
+TAG = 'E28011606000020000000001'
+
+TWO_STATIONS = {
+    "1": {"station": "linha_a", "role": "inicio"},
+    "2": {"station": "linha_a", "role": "fim"},
+    "3": {"station": "linha_b", "role": "inicio"},
+    "4": {"station": "linha_b", "role": "fim"},
+}
+
+
+def test_parse_zones_default():
+    assert ur4_zones.parse_zones(None) == ur4_zones.DEFAULT_ZONES
+    assert ur4_zones.parse_zones({}) == ur4_zones.DEFAULT_ZONES
+
+
+def test_parse_zones_round_trip():
+    zones = ur4_zones.parse_zones(TWO_STATIONS)
+    assert zones[3] == Zone('linha_b', 'inicio')
+    assert ur4_zones.stations(zones) == ['linha_a', 'linha_b']
+    assert ur4_zones.zones_to_config(zones) == TWO_STATIONS
+
+
+@pytest.mark.parametrize('raw, message', [
+    ([1, 2], 'objeto'),
+    ({"x": {"station": "a", "role": "inicio"}}, 'Antena inválida'),
+    ({"17": {"station": "a", "role": "inicio"}}, 'fora de 0-16'),
+    ({"1": "linha_a"}, 'deve ser um objeto'),
+    ({"1": {"station": " ", "role": "inicio"}, "2": {"station": "a", "role": "fim"}}, 'sem estação'),
+    ({"1": {"station": "a", "role": "meio"}}, 'Papel inválido'),
+    ({"1": {"station": "a", "role": "inicio"}}, 'início e de fim'),
+])
+def test_parse_zones_errors(raw, message):
+    with pytest.raises(ValueError, match=message):
+        ur4_zones.parse_zones(raw)
+
+
+def test_enabled_antennas():
+    # Padrão: antenas do mapa ficam ativas (a 0 não é física)
+    assert ur4_zones.enabled_antennas({}) == [1, 2]
+    config = {"zones": TWO_STATIONS, "antenna3_enabled": False, "antenna5_power": 10}
+    assert ur4_zones.configured_antennas(config) == [1, 2, 3, 4, 5]
+    # Fora do mapa só ativa com antennaN_enabled explícito
+    assert ur4_zones.enabled_antennas(config) == [1, 2, 4]
+    assert ur4_zones.enabled_antennas({**config, "antenna5_enabled": True}) == [1, 2, 4, 5]
+
+
+# --- Roteamento em /api/rfid/event ---
+
+@pytest.fixture
+def two_stations(api):
+    original = api.CONFIG_PATH.read_text() if api.CONFIG_PATH.exists() else None
+    api.CONFIG_PATH.write_text(json.dumps({"zones": TWO_STATIONS}, indent=2))
+    yield
+    if original is None:
+        api.CONFIG_PATH.unlink()
+    else:
+        api.CONFIG_PATH.write_text(original)
+
+
+def _read(client, antenna, tag=TAG):
+    response = client.post('/api/rfid/event', json={'tag_id': tag, 'antenna_number': antenna})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_finish_only_in_own_station(client, db, two_stations):
+    assert _read(client, 1)['station'] == 'linha_a'
+    assert 'linha_b' in _read(client, 4)['error']
+    assert db.query(ProductionSession).one().status == 'em_producao'
+
+    assert _read(client, 2)['success']
+    session = db.query(ProductionSession).one()
+    assert session.status == 'finalizado' and session.station == 'linha_a'
+
+
+def test_start_in_other_station_keeps_single_session(client, db, two_stations):
+    _read(client, 1)
+    assert _read(client, 3)['success']
+    session = db.query(ProductionSession).one()
+    assert session.station == 'linha_a'
+    assert db.query(RFIDEvent).filter_by(antenna_number=3).one().session_id == session.id
+
+
+def test_produced_tag_blocked_in_every_station(client, db, two_stations):
+    _read(client, 1)
+    _read(client, 2)
+    assert _read(client, 3)['error'] == 'ETIQUETA JÁ PRODUZIDA'
+    assert db.query(ProductionSession).count() == 1
+
+
+def test_antenna_outside_map_only_records_event(client, db, two_stations):
+    body = _read(client, 7)
+    assert body['success'] and body['station'] is None
+    assert db.query(ProductionSession).count() == 0
+    assert db.query(RFIDEvent).filter_by(antenna_number=7).count() == 1
+
+
+def test_stats_etag_follows_config(client, api):
+    etag = client.get('/api/stats').headers['etag']
+    assert client.get('/api/stats', headers={'If-None-Match': etag}).status_code == 304
+
+    config = json.loads(api.CONFIG_PATH.read_text())
+    api.CONFIG_PATH.write_text(json.dumps({**config, "zones": TWO_STATIONS}))
+    try:
+        response = client.get('/api/stats', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert [station['station'] for station in response.json()['stations']] == ['linha_a', 'linha_b']
+    finally:
+        api.CONFIG_PATH.write_text(json.dumps(config))